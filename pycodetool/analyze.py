@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+usage:
+  analyze.py <file or folder> [<file or folder> ...]
+
+Count what framework_to_standard_python would have to change (such as
+Substring calls, StreamReader objects, enumerator loops, duplicate
+methods and "from System" imports) without rewriting anything or
+writing any output file, so a migration can be planned. Folders are
+searched for .py files (including compressed ones such as .py.gz; see
+is_python_path), and files are analyzed in parallel.
+"""
+import os
+import re
+import sys
+from bisect import bisect_right
+from multiprocessing import Pool
+
+from compression import compression_suffixes
+from compression import get_compression
+from compression import open_compressed
+from parsing import quoted_or_comment_rx
+from pct import console_replacements
+from pct import tostring_to_str
+from scopetree import PCTScope
+from slicerewrite import substrings_to_slices
+
+analysis_keys = [
+    "lines",
+    "system_imports",
+    "substring_calls",
+    "stream_readers",
+    "stream_writers",
+    "enumerator_loops",
+    "duplicate_methods",
+    "console_calls",
+    "tostring_calls",
+]
+
+# Only lines containing a trigger token are examined (str.find is much
+# faster than scanning every line with a regex). Then each family whose
+# token is still in the line once quoted text and the comment are
+# removed is counted by its regex. ToString, Substring and Console calls
+# are changed the same way PCTParser changes them instead, so the counts
+# match what a conversion does (see _count_line).
+trigger_tokens = ["from System", "def ", "class ", "ToString",
+                  "Substring", "Console."]
+families = [
+    ("stream_readers", "StreamReader", re.compile(r"\bStreamReader\s*\(")),
+    ("stream_writers", "StreamWriter", re.compile(r"\bStreamWriter\s*\(")),
+    ("enumerator_loops", "MoveNext",
+     re.compile(r"\bwhile\s+enumerator\.MoveNext\(\)\s*:")),
+]
+for family in families:
+    trigger_tokens.append(family[1])
+console_rx = re.compile("|".join([re.escape(replacement[0])
+                                  for replacement in console_replacements]))
+system_import_rx = re.compile(r"[ \t]*from System[. ]")
+definition_rx = re.compile(r"([ \t]*)(class|def)[ \t]+(\w+)")
+mlD = "\"\"\""  # multiline_delimiter (the same as PCTParser)
+
+
+def new_report():
+    result = {}
+    for key in analysis_keys:
+        result[key] = 0
+    return result
+
+
+def merge_reports(reports):
+    """Add up the counts of several reports."""
+    result = new_report()
+    for report in reports:
+        for key in analysis_keys:
+            result[key] += report.get(key, 0)
+    return result
+
+
+def _get_code(line):
+    """Remove quoted text and the comment (if any) from a line."""
+    if ('"' not in line) and ("'" not in line) and ("#" not in line):
+        return line
+    return quoted_or_comment_rx.sub(" ", line)
+
+
+def _count_line(line, result):
+    """Add the changes that would be made to line to result."""
+    code = _get_code(line)
+    for key, token, family_rx in families:
+        if token in code:
+            result[key] += len(family_rx.findall(code))
+    if "ToString" in line:
+        # (This may move a Substring call to the comment.)
+        line, changes, errors = tostring_to_str(line)
+        result["tostring_calls"] += len(changes)
+    if "Substring" in line:
+        result["substring_calls"] += len(substrings_to_slices(line)[1])
+    if "Console." in line:
+        # PCTParser replaces these even in quoted text and the comment.
+        result["console_calls"] += len(console_rx.findall(line))
+
+
+def analyze_data(data):
+    """
+    Count the changes that would be made to the code in the string
+    data (see analysis_keys).
+    """
+    result = new_report()
+    if len(data) < 1:
+        return result
+    result["lines"] = data.count("\n")
+    if data[-1:] != "\n":
+        result["lines"] += 1
+    # Triple-quoted strings (or comments) are skipped like in
+    # PCTParser: a position is inside one if an odd number of
+    # delimiters come before it.
+    ml_indices = list()
+    ml_index = data.find(mlD)
+    while ml_index > -1:
+        ml_indices.append(ml_index)
+        ml_index = data.find(mlD, ml_index + len(mlD))
+
+    def is_in_ml_string(index):
+        return bisect_right(ml_indices, index) % 2 == 1
+
+    line_starts = set()
+    for token in trigger_tokens:
+        index = data.find(token)
+        while index > -1:
+            line_starts.add(data.rfind("\n", 0, index) + 1)
+            index = data.find(token, index + len(token))
+
+    # Definitions are tracked in a scope tree like PCTParser does, so a
+    # method is only a duplicate if its name is already a method in the
+    # same scope (not, for example, a nested function of the same name
+    # in another method):
+    scope = PCTScope("module")
+    skip_indent = None  # that of a duplicate (its body is skipped)
+    for line_start in sorted(line_starts):
+        if is_in_ml_string(line_start):
+            continue
+        line_end = data.find("\n", line_start)
+        if line_end < 0:
+            line_end = len(data)
+        line = data[line_start:line_end]
+        line_strip = line.strip()
+        if line_strip[:1] == "#":
+            continue
+        indent = line[:len(line) - len(line.lstrip(" \t"))]
+        if skip_indent is not None:
+            if len(indent) > len(skip_indent):
+                continue  # PCTParser comments out the duplicate's body
+            skip_indent = None
+        match = definition_rx.match(line)
+        if match is not None:
+            while ((scope.indent is not None)
+                    and (len(indent) <= len(scope.indent))):
+                scope = scope.parent
+            kind = "method"
+            if match.group(2) == "class":
+                kind = "class"
+            name = match.group(3)
+            previous_scope = scope.children.get(name)
+            if ((kind == "method") and (previous_scope is not None)
+                    and (previous_scope.kind == "method")):
+                result["duplicate_methods"] += 1
+                skip_indent = indent
+                continue
+            scope = scope.add_child(kind, name, indent=indent)
+        elif system_import_rx.match(line) is not None:
+            result["system_imports"] += 1
+            continue  # PCTParser comments out the whole line
+        _count_line(line, result)
+    return result
+
+
+def analyze_path(path):
+    """
+    Analyze one file. The return is (path, report) so results from
+    a pool can be matched up with their files.
+    """
+    if get_compression(path) is not None:
+        infile = open_compressed(path, 'rb')
+    else:
+        infile = open(path, 'rb')
+    data = infile.read().decode("utf-8", "replace")
+    infile.close()
+    return path, analyze_data(data)
+
+
+def is_python_path(path):
+    """
+    Check whether path ends with .py, optionally followed by a suffix
+    in compression_suffixes (such as code.py.gz).
+    """
+    lower_path = path.lower()
+    if lower_path.endswith(".py"):
+        return True
+    for suffix in compression_suffixes:
+        if lower_path.endswith(".py" + suffix):
+            return True
+    return False
+
+
+def find_python_files(path):
+    """
+    Yield path if it is a file, or else the Python files under it (see
+    is_python_path).
+    """
+    if not os.path.isdir(path):
+        yield path
+        return
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if is_python_path(name):
+                yield os.path.join(root, name)
+
+
+def analyze_paths(paths, processes=None, chunksize=16):
+    """
+    Analyze many files using a pool of processes.
+
+    Sequential arguments:
+    paths -- Provide files and/or folders (see find_python_files).
+
+    Keyword arguments:
+    processes -- Set the number of worker processes (default: one per
+                 CPU). If 1, do not start any.
+
+    Returns a dict with "files" (a report for each file path) and
+    "totals" (all of the reports added together, plus the "files"
+    count).
+    """
+    file_paths = list()
+    for path in paths:
+        file_paths.extend(find_python_files(path))
+    reports = {}
+    if (processes == 1) or (len(file_paths) < 2):
+        for file_path in file_paths:
+            reports[file_path] = analyze_path(file_path)[1]
+    else:
+        pool = Pool(processes=processes)
+        try:
+            for file_path, report in pool.imap_unordered(
+                    analyze_path, file_paths, chunksize):
+                reports[file_path] = report
+        finally:
+            pool.close()
+            pool.join()
+    totals = merge_reports(reports.values())
+    totals["files"] = len(reports)
+    return {"files": reports, "totals": totals}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    result = analyze_paths(sys.argv[1:])
+    for file_path in sorted(result["files"]):
+        report = result["files"][file_path]
+        changes = [key + "=" + str(report[key]) for key in analysis_keys
+                   if (key != "lines") and (report[key] > 0)]
+        if len(changes) > 0:
+            print(file_path + ": " + ", ".join(changes))
+    print("")
+    print("totals:")
+    totals = result["totals"]
+    for key in ["files"] + analysis_keys:
+        print("  " + key + ": " + str(totals[key]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
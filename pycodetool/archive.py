@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+usage:
+  archive.py <source archive> <destination archive>
+
+Translate each .py member of a zip or tar archive (such as a
+SharpDevelop export; see framework_to_standard_python) and write a new
+archive with the translated members in the same order. Other members
+are copied as they are. Nothing is extracted to disk: each member's
+bytes go straight to a parser and the output goes straight into the
+destination archive.
+
+Members are converted by a pool of processes. A zip file allows random
+access, so each worker opens the source archive once and reads the
+members it is given by name. A tar file (especially a compressed one)
+can only be read in order, so it is read here and the bytes are sent
+to the workers. Either way, members are handed out in windows (see
+translate_archive) so only a few are in memory at once.
+
+The destination must be the same kind of archive as the source: .zip
+for a zip file, or else .tar optionally followed by .gz, .bz2 or .xz
+(such as .tar.gz or .tgz), which chooses the compression.
+"""
+import copy
+import io
+import os
+import sys
+import tarfile
+import traceback
+import zipfile
+from multiprocessing import Pool
+from multiprocessing import cpu_count
+
+from parserpool import PCTParserPool
+
+_parser_pool = PCTParserPool()
+# ^ reused for each member in a worker (see _init_worker)
+_zip_file = None  # the source ZipFile opened by each worker
+tar_write_modes = [
+    (".tar.gz", "w:gz"),
+    (".tgz", "w:gz"),
+    (".tar.bz2", "w:bz2"),
+    (".tbz2", "w:bz2"),
+    (".tar.xz", "w:xz"),
+    (".txz", "w:xz"),
+    (".tar", "w"),
+]
+
+
+def is_python_name(name):
+    """Check whether an archive member name is a Python file."""
+    return name.lower().endswith(".py")
+
+
+def get_tar_write_mode(path):
+    """Get the tarfile mode for writing path, or None if not a tar."""
+    lower_path = path.lower()
+    for suffix, mode in tar_write_modes:
+        if lower_path.endswith(suffix):
+            return mode
+    return None
+
+
+def _init_worker(zip_path, quiet):
+    global _parser_pool
+    global _zip_file
+    _parser_pool = PCTParserPool()
+    _zip_file = None
+    if zip_path is not None:
+        _zip_file = zipfile.ZipFile(zip_path, 'r')
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+
+def _translate_member(item):
+    """
+    Get (name, output bytes, None) for an item (name, bytes), where
+    bytes is None to read the member from the worker's zip file, or
+    (name, None, error) if it could not be translated.
+    """
+    name, data = item
+    try:
+        if data is None:
+            data = _zip_file.read(name)
+        with _parser_pool.parser() as parser:
+            parser.parse_path(name, data=data)
+            outfile = io.BytesIO()
+            parser.framework_to_standard_python(outfile,
+                                                source_map_enable=False)
+        return name, outfile.getvalue(), None
+    except Exception:
+        return name, None, traceback.format_exc()
+
+
+def _iterate_windows(items, window_size):
+    """Yield lists of up to window_size items, in order."""
+    window = list()
+    for item in items:
+        window.append(item)
+        if len(window) >= window_size:
+            yield window
+            window = list()
+    if len(window) > 0:
+        yield window
+
+
+class PCTArchiveReader:
+    """
+    Read the members of a zip or tar archive in order.
+
+    members:
+    path -- the path of the archive
+    is_zip -- True for a zip file, False for a tar file
+    """
+    path = None
+    is_zip = None
+    _archive = None
+
+    def __init__(self, path):
+        self.path = path
+        self.is_zip = zipfile.is_zipfile(path)
+        if self.is_zip:
+            self._archive = zipfile.ZipFile(path, 'r')
+        elif tarfile.is_tarfile(path):
+            self._archive = tarfile.open(path, 'r:*')
+        else:
+            raise ValueError("'" + path + "' is not a zip nor tar file.")
+
+    def iterate_members(self):
+        """
+        Yield (info, name, read) for each member, where info is its
+        ZipInfo or TarInfo and read is a function that gets its bytes
+        (None if it is not a regular file, such as a folder).
+        """
+        if self.is_zip:
+            for info in self._archive.infolist():
+                read = None
+                if not info.filename.endswith("/"):
+                    read = self._get_zip_reader(info.filename)
+                yield info, info.filename, read
+            return
+        for info in self._archive:
+            read = None
+            if info.isfile():
+                read = self._get_tar_reader(info)
+            yield info, info.name, read
+
+    def _get_zip_reader(self, name):
+        return lambda: self._archive.read(name)
+
+    def _get_tar_reader(self, info):
+        def read():
+            member_file = self._archive.extractfile(info)
+            try:
+                return member_file.read()
+            finally:
+                member_file.close()
+        return read
+
+    def close(self):
+        self._archive.close()
+
+
+class PCTArchiveWriter:
+    """
+    Write members to a new zip or tar archive, keeping the metadata
+    (such as the date and permissions) of each source member.
+
+    members:
+    path -- the path of the archive
+    is_zip -- True for a zip file, False for a tar file (see
+              get_tar_write_mode)
+    """
+    path = None
+    is_zip = None
+    _archive = None
+
+    def __init__(self, path):
+        self.path = path
+        mode = get_tar_write_mode(path)
+        self.is_zip = mode is None
+        if self.is_zip:
+            self._archive = zipfile.ZipFile(path, 'w',
+                                            zipfile.ZIP_DEFLATED)
+        else:
+            self._archive = tarfile.open(path, mode)
+
+    def add(self, info, data):
+        """
+        Add a member.
+
+        Sequential arguments:
+        info -- Provide the ZipInfo or TarInfo of the source member (the
+                same kind as the archive).
+        data -- Provide the bytes (None if not a regular file).
+        """
+        info = copy.copy(info)
+        if self.is_zip:
+            info.compress_type = zipfile.ZIP_DEFLATED
+            if data is None:
+                data = b""
+            self._archive.writestr(info, data)
+        elif data is None:
+            self._archive.addfile(info)
+        else:
+            info.size = len(data)
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self._archive.close()
+
+
+def translate_archive(source_path, destination_path, processes=None,
+                      window_size=None, quiet=True):
+    """
+    Translate the Python members of an archive (see the module
+    docstring).
+
+    Sequential arguments:
+    source_path -- Provide the path of a zip or tar archive.
+    destination_path -- Set the path of the archive to write (see the
+                        module docstring for the formats).
+
+    Keyword arguments:
+    processes -- Set the number of worker processes (default: one per
+                 CPU). If 1, do not start any.
+    window_size -- Set how many members are read and handed out at
+                   once (default: 4 per process).
+    quiet -- Discard the messages PCTParser prints for each member
+             (otherwise the output of workers is interleaved).
+
+    Returns a list of (member name, error) for each member that could
+    not be translated (each of those is copied as it was).
+    """
+    global _parser_pool
+    global _zip_file
+    if processes is None:
+        processes = cpu_count()
+    if window_size is None:
+        window_size = 4 * processes
+    reader = PCTArchiveReader(source_path)
+    zip_path = None
+    if reader.is_zip:
+        zip_path = source_path
+    if reader.is_zip != (get_tar_write_mode(destination_path) is None):
+        reader.close()
+        raise ValueError("'" + destination_path + "' must be the same"
+                         " kind of archive as '" + source_path + "'.")
+    writer = PCTArchiveWriter(destination_path)
+    failures = list()
+    pool = None
+    previous_pool = _parser_pool
+    previous_zip_file = _zip_file
+    previous_stdout = sys.stdout
+    if processes == 1:
+        _init_worker(zip_path, quiet)
+    else:
+        pool = Pool(processes=processes, initializer=_init_worker,
+                    initargs=(zip_path, quiet))
+    try:
+        for window in _iterate_windows(reader.iterate_members(),
+                                       window_size):
+            datas = list()  # the bytes of each member, if already read
+            items = list()
+            indices = list()  # the index in window of each item
+            for index in range(len(window)):
+                info, name, read = window[index]
+                data = None
+                if (read is not None) and not reader.is_zip:
+                    data = read()  # in order, since a tar is sequential
+                datas.append(data)
+                if (read is not None) and is_python_name(name):
+                    items.append((name, data))
+                    indices.append(index)
+            if pool is not None:
+                results = pool.map(_translate_member, items)
+            else:
+                results = [_translate_member(item) for item in items]
+            for result_index in range(len(results)):
+                name, output, error = results[result_index]
+                if error is not None:
+                    failures.append((name, error))
+                else:
+                    datas[indices[result_index]] = output
+            for index in range(len(window)):
+                info, name, read = window[index]
+                data = datas[index]
+                if (data is None) and (read is not None):
+                    data = read()
+                writer.add(info, data)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        else:
+            if sys.stdout is not previous_stdout:
+                sys.stdout.close()
+                sys.stdout = previous_stdout
+            if _zip_file is not None:
+                _zip_file.close()
+            _parser_pool = previous_pool
+            _zip_file = previous_zip_file
+        reader.close()
+        writer.close()
+    return failures
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        return 1
+    failures = translate_archive(sys.argv[1], sys.argv[2])
+    for name, error in failures:
+        print("  ERROR: '" + name + "' was copied without being"
+              " translated: " + error.rstrip(), file=sys.stderr)
+    if len(failures) > 0:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Build a call graph of the methods (and functions) in a preprocessed
+file and find the ones that can't be reached from the entry points.
+
+Call sites are not matched against every method pairwise. Instead,
+the uses of each method name are looked up in the identifier index
+(see identindex.py), and each use is resolved from the scope it is in
+(see scopetree.py): self.name and cls.name to the method of the
+enclosing class and the overrides in its subclasses (since self may
+be an instance of one), Class.name to the method of that class, and
+a plain name to a function visible from that scope. A use on any
+other object (such as obj.name) can't be resolved without types, so
+it counts as a use of every method with that name.
+
+A reference that is not a call (such as a method passed as a callback)
+also counts, so a method is only reported as unreachable if nothing
+could call it.
+"""
+import re
+from bisect import bisect_right
+from collections import deque
+
+receiver_rx = re.compile(r"([^\W\d][\w.]*)\s*\.\s*\Z")
+definition_rx = re.compile(r"(?:def|class)\s+\Z")
+self_receivers = ["self", "cls"]
+
+
+def is_dunder(name):
+    """Check whether Python calls the method implicitly (__x__)."""
+    return ((len(name) > 4) and name.startswith("__")
+            and name.endswith("__"))
+
+
+class PCTCallGraph:
+    """
+    Find which methods may call which.
+
+    members:
+    scope_tree -- the module PCTScope (with last_lineN set, as it is
+                  after preprocessing)
+    methods -- every method (and function) PCTScope, in line order
+    calls -- a dict of each method PCTScope to the set of method
+             scopes it uses (the module and class bodies are keyed as
+             the module PCTScope, since they run on import)
+    """
+    scope_tree = None
+    methods = None
+    calls = None
+    _starts = None  # the lineN of each scope in _scopes, in order
+    _scopes = None  # every class and method scope, in line order
+    _subclasses = None  # each class PCTScope to its direct subclasses
+
+    def __init__(self, scope_tree, identifier_index, get_line):
+        """
+        Sequential arguments:
+        scope_tree -- Provide the module PCTScope from preprocessing.
+        identifier_index -- Provide the PCTIdentifierIndex of the same
+                            lines.
+        get_line -- Provide a function that gets a line (as indexed)
+                    by its index (lineN - 1).
+        """
+        self.scope_tree = scope_tree
+        self.calls = {}
+        scopes = [scope for scope in scope_tree.walk()
+                  if (scope.parent is not None)
+                  and (scope.lineN is not None)]
+        scopes.sort(key=lambda scope: (scope.lineN, scope.depth))
+        self._scopes = scopes
+        self._starts = [scope.lineN for scope in scopes]
+        self.methods = [scope for scope in scopes
+                        if scope.kind == "method"]
+        self._subclasses = {}
+        for scope in scopes:
+            if scope.kind != "class":
+                continue
+            for base_name in scope.base_names:
+                base = scope.parent.find_visible_scope(base_name)
+                if (base is not None) and (base.kind == "class"):
+                    self._subclasses.setdefault(base, list()).append(scope)
+        methods_by_name = {}
+        for method in self.methods:
+            methods_by_name.setdefault(method.name, list()).append(method)
+        for name, same_named in methods_by_name.items():
+            for lineN, column in identifier_index.find(name):
+                line = get_line(lineN - 1)
+                before = line[:column]
+                if definition_rx.search(before) is not None:
+                    continue
+                caller = self.find_caller(lineN)
+                for callee in self.resolve_use(before, name, caller,
+                                               same_named):
+                    if callee is not caller:
+                        self.calls.setdefault(caller, set()).add(callee)
+
+    def find_scope_at(self, lineN):
+        """
+        Get the innermost class or method scope that contains the line,
+        or the module scope.
+        """
+        index = bisect_right(self._starts, lineN) - 1
+        if index < 0:
+            return self.scope_tree
+        scope = self._scopes[index]
+        while scope.parent is not None:
+            if (scope.last_lineN is None) or (lineN <= scope.last_lineN):
+                return scope
+            scope = scope.parent
+        return scope
+
+    def find_caller(self, lineN):
+        """
+        Get the method scope that the line is in, or the module scope
+        if it is not in a method (module and class bodies).
+        """
+        scope = self.find_scope_at(lineN)
+        while (scope.parent is not None) and (scope.kind != "method"):
+            scope = scope.parent
+        return scope
+
+    def get_subclasses(self, class_scope):
+        """
+        Get every class scope in the file that derives from class_scope
+        (directly or not).
+        """
+        results = list()
+        stack = list(self._subclasses.get(class_scope, ()))
+        while len(stack) > 0:
+            scope = stack.pop()
+            if scope in results:
+                continue
+            results.append(scope)
+            stack.extend(self._subclasses.get(scope, ()))
+        return results
+
+    def resolve_use(self, before, name, caller, same_named):
+        """
+        Get the methods that a use of name may refer to (see the module
+        docstring).
+
+        Sequential arguments:
+        before -- Provide the text of the line before the use.
+        name -- Provide the method name that is used.
+        caller -- Provide the scope where the use is.
+        same_named -- Provide every method with that name.
+        """
+        match = receiver_rx.search(before)
+        if match is None:
+            if before.rstrip()[-1:] == ".":
+                return same_named  # such as a call on a call's result
+            scope = caller
+            while scope is not None:
+                child = scope.children.get(name)
+                if ((child is not None) and (child.kind == "method")
+                        and ((scope is caller)
+                             or (scope.kind != "class"))):
+                    return [child]
+                scope = scope.parent
+            return list()
+        receiver = match.group(1)
+        owner = None
+        if receiver in self_receivers:
+            owner = caller.get_class_scope()
+        else:
+            owner = caller.find_visible_scope(receiver)
+        if (owner is not None) and (owner.kind == "class"):
+            child = owner.children.get(name)
+            if (child is not None) and (child.kind == "method"):
+                results = [child]
+                if receiver in self_receivers:
+                    for subclass in self.get_subclasses(owner):
+                        override = subclass.children.get(name)
+                        if ((override is not None)
+                                and (override.kind == "method")):
+                            results.append(override)
+                return results
+        return same_named
+
+    def get_roots(self, entry_points=None):
+        """
+        Get the scopes to start from: the module (code outside of
+        methods runs on import), methods Python calls implicitly (such
+        as __init__), and entry_points.
+
+        Keyword arguments:
+        entry_points -- Provide fully qualified method names (such as
+                        "MyClass.run") or PCTScope objects.
+        """
+        roots = [self.scope_tree]
+        for method in self.methods:
+            if is_dunder(method.name):
+                roots.append(method)
+        if entry_points is not None:
+            for entry_point in entry_points:
+                if not hasattr(entry_point, "kind"):
+                    found = self.scope_tree.find_scope(entry_point)
+                    if found is None:
+                        raise ValueError("There is no '" + entry_point
+                                         + "' scope.")
+                    entry_point = found
+                roots.append(entry_point)
+        return roots
+
+    def get_reachable(self, entry_points=None):
+        """
+        Get the set of scopes reachable from the roots (see
+        get_roots) by following calls.
+        """
+        reached = set()
+        queue = deque(self.get_roots(entry_points=entry_points))
+        while len(queue) > 0:
+            scope = queue.popleft()
+            if scope in reached:
+                continue
+            reached.add(scope)
+            for callee in self.calls.get(scope, ()):
+                if callee not in reached:
+                    queue.append(callee)
+        return reached
+
+    def get_unreachable(self, entry_points=None):
+        """
+        Get the method scopes that are not reachable (see
+        get_reachable), in line order.
+        """
+        reached = self.get_reachable(entry_points=entry_points)
+        return [method for method in self.methods
+                if method not in reached]
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Read and write compressed files (chosen by the file extension, such as
+code.py.gz) through streaming codecs, so that compressed input does
+not have to be decompressed to disk first and output is compressed as
+it is written.
+"""
+import gzip
+try:
+    import lzma
+except ImportError:
+    lzma = None  # Python 2 (without backports.lzma)
+    try:
+        from backports import lzma
+    except ImportError:
+        pass
+
+compression_suffixes = {
+    ".gz": "gzip",
+    ".xz": "xz",
+}
+
+
+def get_compression(path):
+    """
+    Get the compression ("gzip" or "xz") that the extension of path
+    indicates, or None (also if path is a stream rather than a path).
+    """
+    if hasattr(path, "write") or hasattr(path, "read"):
+        return None
+    for suffix, compression in compression_suffixes.items():
+        if path.lower().endswith(suffix):
+            return compression
+    return None
+
+
+def open_compressed(path, mode, compression=None):
+    """
+    Open a binary stream that decompresses what is read from (or
+    compresses what is written to) the file at path.
+
+    Sequential arguments:
+    path -- Provide the path of the compressed file.
+    mode -- Set the mode: 'rb' or 'wb'.
+
+    Keyword arguments:
+    compression -- Set the compression (default: see get_compression).
+    """
+    if compression is None:
+        compression = get_compression(path)
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "xz":
+        if lzma is None:
+            raise RuntimeError("Reading or writing '" + path + "' requires"
+                               " the lzma module (or backports.lzma).")
+        return lzma.open(path, mode)
+    raise ValueError("compression must be one of "
+                     + str(sorted(compression_suffixes.values())))
+
+
+def read_compressed(path, compression=None):
+    """Get the decompressed bytes of the file at path."""
+    infile = open_compressed(path, 'rb', compression=compression)
+    try:
+        return infile.read()
+    finally:
+        infile.close()
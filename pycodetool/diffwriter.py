@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Write only what changed (instead of the whole rewritten file) while
+the rewritten lines are produced, so no separate diff needs to be
+computed afterward.
+
+Formats:
+"unified" -- a unified diff (such as for patch or code review)
+"json" -- a compact edit list: {"from": path, "to": path, "edits": [...]}
+          where each edit is one of the following (n is the 1-based
+          line number in the original file):
+          ["r", n, text] -- replace line n with text
+          ["i", n, text] -- insert text after line n (0 for the top)
+          ["d", n] -- delete line n
+"""
+import json
+from collections import deque
+from outputwriter import PCTOutputWriter
+
+diff_formats = ["unified", "json"]
+no_newline_marker = "\\ No newline at end of file"
+# ^ follows a unified diff line that has no newline in its file (the
+#   rewritten file always ends with one, so only the last original line
+#   can need it)
+
+
+def _format_range_unified(start, stop):
+    """Format a hunk range the same way as difflib.unified_diff."""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return str(beginning)
+    if length == 0:
+        beginning -= 1
+    return str(beginning) + "," + str(length)
+
+
+class PCTDiffWriter:
+    """
+    Receive each output line along with the index of the loaded line
+    it came from (-1 if inserted) and write the changes.
+    """
+    diff_format = None
+    context_count = None
+    edit_count = None
+    _outfile = None
+    _get_loaded_line = None
+    _loaded_count = None
+    _old_index = None  # the next loaded line not yet accounted for
+    _new_index = None
+    _context = None
+    _hunk = None
+    _hunk_old_start = None
+    _hunk_new_start = None
+    _trailing_count = None
+    _minus = None
+    _plus = None
+    _is_first_edit = None
+    _from_final_newline_enable = None
+    _is_end_in_minus = None  # the last loaded line (without a newline)
+    #                        # is pending removal
+
+    def __init__(self, path, get_loaded_line, loaded_count,
+                 from_path=None, to_path=None, diff_format="unified",
+                 context_count=3, encoding=None, atomic_enable=False,
+                 from_final_newline_enable=True):
+        """
+        Sequential arguments:
+        path -- Set the file to write the diff or edit list to.
+        get_loaded_line -- Provide a function that returns the original
+                           text of a loaded line given its index.
+        loaded_count -- Set how many lines were loaded.
+
+        Keyword arguments:
+        from_path -- Name the original file in the header.
+        to_path -- Name the rewritten file in the header.
+        diff_format -- Choose a format from diff_formats.
+        context_count -- Set how many unchanged lines surround each
+                         unified diff hunk.
+        from_final_newline_enable -- Set to False if the last loaded
+                                     line has no newline, so a unified
+                                     diff marks it (see
+                                     no_newline_marker) and replaces it
+                                     even if unchanged.
+        """
+        if diff_format not in diff_formats:
+            raise ValueError("diff_format must be one of "
+                             + str(diff_formats))
+        self.diff_format = diff_format
+        self.context_count = context_count
+        self.edit_count = 0
+        self._get_loaded_line = get_loaded_line
+        self._loaded_count = loaded_count
+        self._old_index = 0
+        self._new_index = 0
+        self._context = deque(maxlen=context_count)
+        self._minus = list()
+        self._plus = list()
+        self._is_first_edit = True
+        self._from_final_newline_enable = from_final_newline_enable
+        self._is_end_in_minus = False
+        self._outfile = PCTOutputWriter(path, encoding=encoding,
+                                        atomic_enable=atomic_enable)
+        if from_path is None:
+            from_path = ""
+        if to_path is None:
+            to_path = ""
+        if diff_format == "unified":
+            self._outfile.write_line("--- " + from_path)
+            self._outfile.write_line("+++ " + to_path)
+        else:
+            self._outfile.write_line(
+                "{\"from\": " + json.dumps(from_path) + ", \"to\": "
+                + json.dumps(to_path) + ", \"edits\": ["
+            )
+
+    def write_line(self, line, loaded_index):
+        """
+        Sequential arguments:
+        line -- Provide the rewritten line.
+        loaded_index -- Provide the index of the loaded line that line
+                        came from, or -1 if it was inserted.
+        """
+        if loaded_index < 0:
+            self._edit(["i", self._old_index, line])
+            self._start_change()
+            self._plus.append(line)
+            self._new_index += 1
+            return
+        while self._old_index < loaded_index:
+            # The lines in between were removed.
+            self._delete_next()
+        old_line = self._get_loaded_line(loaded_index)
+        if (old_line == line) and not self._is_newline_added(loaded_index):
+            self._equal(line)
+        else:
+            if old_line != line:
+                self._edit(["r", loaded_index + 1, line])
+            self._start_change()
+            self._add_minus(old_line, loaded_index)
+            self._plus.append(line)
+        self._old_index = loaded_index + 1
+        self._new_index += 1
+
+    def _delete_next(self):
+        self._edit(["d", self._old_index + 1])
+        self._start_change()
+        self._add_minus(self._get_loaded_line(self._old_index),
+                        self._old_index)
+        self._old_index += 1
+
+    def _is_newline_added(self, loaded_index):
+        """
+        Check whether the loaded line is the last one and the unified
+        diff has to add its missing newline.
+        """
+        return ((self.diff_format == "unified")
+                and (not self._from_final_newline_enable)
+                and (loaded_index == self._loaded_count - 1))
+
+    def _add_minus(self, old_line, loaded_index):
+        self._minus.append(old_line)
+        if self._is_newline_added(loaded_index):
+            self._is_end_in_minus = True
+
+    def _edit(self, edit):
+        self.edit_count += 1
+        if self.diff_format != "json":
+            return
+        prefix = ", "
+        if self._is_first_edit:
+            prefix = ""
+            self._is_first_edit = False
+        self._outfile.write_line(prefix + json.dumps(edit))
+
+    def _start_change(self):
+        """Open a hunk (if none) before a change is added."""
+        if self.diff_format != "unified":
+            return
+        if self._hunk is None:
+            self._hunk = list()
+            self._hunk_old_start = self._old_index - len(self._context)
+            self._hunk_new_start = self._new_index - len(self._context)
+            for context_line in self._context:
+                self._hunk.append(" " + context_line)
+            self._context.clear()
+        self._trailing_count = 0
+
+    def _flush_pending(self):
+        for old_line in self._minus:
+            self._hunk.append("-" + old_line)
+        if self._is_end_in_minus:
+            self._hunk.append(no_newline_marker)
+            self._is_end_in_minus = False
+        for new_line in self._plus:
+            self._hunk.append("+" + new_line)
+        self._minus = list()
+        self._plus = list()
+
+    def _equal(self, line):
+        if self.diff_format != "unified":
+            return
+        if self._hunk is None:
+            self._context.append(line)
+            return
+        self._flush_pending()
+        self._hunk.append(" " + line)
+        self._trailing_count += 1
+        if self._trailing_count > 2 * self.context_count:
+            # Keep context_count lines for this hunk and the rest as
+            # the leading context of the next one.
+            extra_count = self._trailing_count - self.context_count
+            extra = self._hunk[-extra_count:]
+            del self._hunk[-extra_count:]
+            self._write_hunk()
+            for context_line in extra:
+                self._context.append(context_line[1:])
+
+    def _write_hunk(self):
+        old_count = 0
+        new_count = 0
+        for hunk_line in self._hunk:
+            if hunk_line[:1] == no_newline_marker[:1]:
+                continue
+            if hunk_line[:1] != "+":
+                old_count += 1
+            if hunk_line[:1] != "-":
+                new_count += 1
+        self._outfile.write_line(
+            "@@ -" + _format_range_unified(self._hunk_old_start,
+                                           self._hunk_old_start
+                                           + old_count)
+            + " +" + _format_range_unified(self._hunk_new_start,
+                                           self._hunk_new_start
+                                           + new_count)
+            + " @@"
+        )
+        self._outfile.write_lines(self._hunk)
+        self._hunk = None
+        self._trailing_count = 0
+
+    def close(self):
+        while self._old_index < self._loaded_count:
+            self._delete_next()
+        if self.diff_format == "unified":
+            if self._hunk is not None:
+                self._flush_pending()
+                if self._trailing_count > self.context_count:
+                    del self._hunk[self.context_count
+                                   - self._trailing_count:]
+                self._write_hunk()
+        else:
+            self._outfile.write_line("]}")
+        self._outfile.close()
+
+    def abort(self):
+        """Stop without replacing the destination (if atomic)."""
+        self._outfile.abort()
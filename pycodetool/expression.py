@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Tokenize an expression in one pass and parse it by precedence climbing
+using the operator tables of PCTParser (operator_sets is in order of
+operation, so earlier sets bind tighter), so the right side of an
+assignment can be split into operands in O(n).
+"""
+import re
+
+expression_token_kinds = ["space", "string", "number", "op", "name",
+                          "open", "close", "comma", "comment", "other"]
+bracket_pairs = {"(": ")", "[": "]", "{": "}"}
+right_associative_operators = ["**", "=", "+=", "-=", "*=", "/=", "//=",
+                               "%=", "**="]
+
+
+class PCTExpression:
+    """
+    A node of a parsed expression.
+
+    members:
+    kind -- "operand" (an identifier, literal or call, including its
+            attributes and subscripts), "unary", "binary",
+            "conditional" (value, condition[, alternative]), "group" (in
+            parentheses), "tuple" (separated by commas), "lambda" (an
+            operand whose only child is the body) or "error" (a token
+            that could not be parsed, listed in errors). A generator
+            expression in parentheses is one operand, the same as a
+            list, set or dict display (including a comprehension).
+    operator -- the operator (for "unary" or "binary"), including the
+                keywords "await", "yield" and "yield from" (a "yield"
+                without a value has no children)
+    text -- the source code of an operand or lambda
+    children -- the sub-expressions
+    """
+    kind = None
+    operator = None
+    text = None
+    children = None
+
+    def __init__(self, kind, operator=None, text=None, children=None):
+        self.kind = kind
+        self.operator = operator
+        self.text = text
+        self.children = children
+        if children is None:
+            self.children = list()
+
+    def get_operands(self, results=None):
+        """Get the text of each operand, from left to right."""
+        if results is None:
+            results = list()
+        if self.kind in ["operand", "lambda"]:
+            results.append(self.text)
+            if self.kind == "lambda":
+                # The body uses the parameters, not outside names.
+                return results
+        for child in self.children:
+            child.get_operands(results)
+        return results
+
+    def __str__(self):
+        if self.kind in ["operand", "lambda", "error"]:
+            return self.text
+        if self.kind == "unary":
+            if len(self.children) < 1:
+                return "(" + self.operator + ")"
+            return "(" + self.operator + " " + str(self.children[0]) + ")"
+        if self.kind == "binary":
+            return ("(" + str(self.children[0]) + " " + self.operator
+                    + " " + str(self.children[1]) + ")")
+        return "(" + ", ".join([str(child) for child in self.children]) + ")"
+
+
+class PCTExpressionParser:
+    """
+    Parse expressions using operator tables.
+
+    members:
+    errors -- the problems found by the last call to parse, as a list
+              of (index, message)
+    """
+    binary_precedences = None  # operator to precedence (higher binds)
+    unary_precedences = None
+    errors = None
+    _token_rx = None
+    _text = None
+    _tokens = None  # (kind, text, start, end) without spaces
+    _closers = None  # token index of each opener to its closer's
+    _pos = None
+
+    def __init__(self, operator_sets, unary_operators,
+                 unary_logical_operators):
+        """
+        Sequential arguments:
+        operator_sets -- Provide lists of binary operators in order of
+                         operation (such as PCTParser.operator_sets).
+        unary_operators -- Provide the prefix operators (also found in
+                           operator_sets, such as "-").
+        unary_logical_operators -- Provide the prefix operators that
+                                   bind more loosely than comparisons
+                                   but tighter than the last two sets
+                                   (such as "not", with "and" then "or"
+                                   last).
+        """
+        self.binary_precedences = {}
+        self.unary_precedences = {}
+        set_count = len(operator_sets)
+        for set_i in range(set_count):
+            precedence = (set_count - set_i) * 2
+            for op in operator_sets[set_i]:
+                if operator_sets[set_i] is unary_operators:
+                    self.unary_precedences[op] = precedence
+                else:
+                    self.binary_precedences[op] = precedence
+        # Bind "not" tighter than the last two sets ("and", "or") only:
+        for op in unary_logical_operators:
+            self.unary_precedences[op] = 5
+        operators = (list(self.binary_precedences.keys())
+                     + list(self.unary_precedences.keys()))
+        word_ops = list()
+        symbol_ops = list()
+        for op in operators:
+            if op[:1].isalpha():
+                word_ops.append(r"\s+".join([re.escape(word)
+                                             for word in op.split()]))
+            else:
+                symbol_ops.append(re.escape(op))
+        word_ops.sort(key=len, reverse=True)
+        symbol_ops.sort(key=len, reverse=True)
+        op_patterns = list()
+        if len(word_ops) > 0:
+            op_patterns.append(r"(?:" + "|".join(word_ops) + r")(?!\w)")
+        op_patterns.extend(symbol_ops)
+        self._token_rx = re.compile(
+            r"(?P<space>\s+)"
+            r"|(?P<string>(?:[uUbBrR]|[bB][rR]|[rR][bB])?"
+            r"(?:\"(?:\\.|[^\"\\])*\"?|'(?:\\.|[^'\\])*'?))"
+            r"|(?P<number>(?:0[xX](?:_?[0-9a-fA-F])+|0[oO](?:_?[0-7])+"
+            r"|0[bB](?:_?[01])+"
+            r"|(?:\d(?:_?\d)*\.?(?:\d(?:_?\d)*)?|\.\d(?:_?\d)*)"
+            r"(?:[eE][-+]?\d(?:_?\d)*)?)[jJlL]?)"
+            r"|(?P<op>" + "|".join(op_patterns) + r")"
+            r"|(?P<name>[^\W\d]\w*)"
+            r"|(?P<open>[(\[{])"
+            r"|(?P<close>[)\]}])"
+            r"|(?P<comma>,)"
+            r"|(?P<comment>#.*)"
+            r"|(?P<other>.)",
+            re.DOTALL
+        )
+
+    def tokenize(self, text):
+        """
+        Get a list of (kind, text, start, end) tuples (see
+        expression_token_kinds) for text, in one pass and without
+        spaces or a comment at the end.
+        """
+        tokens = list()
+        for match in self._token_rx.finditer(text):
+            kind = match.lastgroup
+            if kind == "space":
+                continue
+            if kind == "comment":
+                break
+            tokens.append((kind, match.group(), match.start(),
+                           match.end()))
+        return tokens
+
+    def parse(self, text):
+        """
+        Get a PCTExpression for text (any problems are listed in
+        self.errors rather than raised).
+        """
+        self.errors = list()
+        self._text = text
+        self._tokens = self.tokenize(text)
+        self._closers = {}
+        stack = list()
+        for token_i in range(len(self._tokens)):
+            kind, token = self._tokens[token_i][:2]
+            if kind == "open":
+                stack.append(token_i)
+            elif kind == "close":
+                if ((len(stack) > 0)
+                        and (bracket_pairs[self._tokens[stack[-1]][1]]
+                             == token)):
+                    self._closers[stack.pop()] = token_i
+                else:
+                    self.errors.append((self._tokens[token_i][2],
+                                        "unexpected '" + token + "'"))
+        for token_i in stack:
+            self.errors.append((self._tokens[token_i][2],
+                                "expected '"
+                                + bracket_pairs[self._tokens[token_i][1]]
+                                + "'"))
+        self._pos = 0
+        result = self._parse_tuple(len(self._tokens))
+        return result
+
+    def get_operands(self, text):
+        """Get the text of each operand in text, from left to right."""
+        return self.parse(text).get_operands()
+
+    def _peek(self, end):
+        if self._pos < end:
+            return self._tokens[self._pos]
+        return None
+
+    def _parse_tuple(self, end):
+        token = self._peek(end)
+        if (token is not None) and (token[0] == "name") and (token[1]
+                                                            == "yield"):
+            return self._parse_yield(end)
+        items = list()
+        is_tuple = False
+        while self._pos < end:
+            start_pos = self._pos
+            items.append(self._parse_expression(0, end))
+            token = self._peek(end)
+            if token is None:
+                break
+            if token[0] == "comma":
+                is_tuple = True
+                self._pos += 1
+                continue
+            self.errors.append((token[2], "unexpected '" + token[1] + "'"))
+            if self._pos == start_pos:
+                self._pos += 1
+            is_tuple = True
+        if (len(items) == 1) and not is_tuple:
+            return items[0]
+        return PCTExpression("tuple", children=items)
+
+    def _parse_expression(self, min_precedence, end):
+        left = self._parse_unary(end)
+        while True:
+            token = self._peek(end)
+            if (token is None) or (token[0] != "op"):
+                break
+            op = " ".join(token[1].split())
+            precedence = self.binary_precedences.get(op)
+            if (precedence is None) or (precedence < min_precedence):
+                break
+            self._pos += 1
+            next_min = precedence + 1
+            if op in right_associative_operators:
+                next_min = precedence
+            right = self._parse_expression(next_min, end)
+            left = PCTExpression("binary", operator=op,
+                                 children=[left, right])
+        token = self._peek(end)
+        if ((min_precedence == 0) and (token is not None)
+                and (token[0] == "name") and (token[1] == "if")):
+            # value if condition else alternative
+            self._pos += 1
+            condition = self._parse_expression(1, end)
+            token = self._peek(end)
+            if (token is None) or (token[1] != "else"):
+                index = len(self._text)
+                if token is not None:
+                    index = token[2]
+                self.errors.append((index, "expected 'else'"))
+                return PCTExpression("conditional",
+                                     children=[left, condition])
+            self._pos += 1
+            alternative = self._parse_expression(0, end)
+            left = PCTExpression("conditional",
+                                 children=[left, condition, alternative])
+        return left
+
+    def _parse_unary(self, end):
+        token = self._peek(end)
+        if (token is not None) and (token[0] == "op"):
+            op = " ".join(token[1].split())
+            precedence = self.unary_precedences.get(op)
+            if precedence is not None:
+                self._pos += 1
+                operand = self._parse_expression(precedence, end)
+                return PCTExpression("unary", operator=op,
+                                     children=[operand])
+        if ((token is not None) and (token[0] == "name")
+                and (token[1] == "await") and (self._pos + 1 < end)
+                and (self._tokens[self._pos+1][0]
+                     in ["name", "number", "string", "open"])):
+            # "await" binds tighter than any operator (but an older
+            # program may use it as a name, so only when followed by an
+            # operand).
+            self._pos += 1
+            operand = self._parse_atom(end)
+            return PCTExpression("unary", operator="await",
+                                 children=[operand])
+        return self._parse_atom(end)
+
+    def _parse_yield(self, end):
+        """Parse "yield [from] value" (the value is the rest)."""
+        self._pos += 1
+        op = "yield"
+        token = self._peek(end)
+        if (token is not None) and (token[0] == "name") and (token[1]
+                                                            == "from"):
+            self._pos += 1
+            op = "yield from"
+        if self._pos >= end:
+            if op == "yield from":
+                self.errors.append((len(self._text),
+                                    "expected an operand"))
+            return PCTExpression("unary", operator=op)
+        return PCTExpression("unary", operator=op,
+                             children=[self._parse_tuple(end)])
+
+    def _is_comprehension(self, opener_i, end):
+        """
+        Check whether the brackets contain "for" (not counting nested
+        brackets) such as in a generator expression.
+        """
+        closer_i = min(self._closers.get(opener_i, end), end)
+        token_i = opener_i + 1
+        while token_i < closer_i:
+            token = self._tokens[token_i]
+            if token[0] == "open":
+                token_i = self._skip_brackets(token_i, closer_i)
+                continue
+            if (token[0] == "name") and (token[1] == "for"):
+                return True
+            token_i += 1
+        return False
+
+    def _skip_brackets(self, token_i, end):
+        """Get the token index after the closer of the opener."""
+        closer_i = self._closers.get(token_i)
+        if (closer_i is None) or (closer_i >= end):
+            return end
+        return closer_i + 1
+
+    def _parse_atom(self, end):
+        token = self._peek(end)
+        if token is None:
+            index = len(self._text)
+            if self._pos < len(self._tokens):
+                index = self._tokens[self._pos][2]
+            self.errors.append((index, "expected an operand"))
+            return PCTExpression("error", text="")
+        first_pos = self._pos
+        if (token[0] == "name") and (token[1] == "lambda"):
+            return self._parse_lambda(end)
+        if token[0] == "open":
+            after = self._skip_brackets(self._pos, end)
+            next_token = None
+            if after < end:
+                next_token = self._tokens[after]
+            if ((token[1] == "(")
+                    and not self._is_trailer(next_token)
+                    and not self._is_comprehension(self._pos, end)):
+                # Parse the inside as a group.
+                inner_end = self._closers.get(self._pos, end)
+                self._pos += 1
+                inner = self._parse_tuple(min(inner_end, end))
+                self._pos = after
+                return PCTExpression("group", children=[inner])
+            self._pos = after
+        elif token[0] in ["name", "number", "string"]:
+            self._pos += 1
+            while (token[0] == "string") and (self._pos < end):
+                # adjacent strings are concatenated
+                if self._tokens[self._pos][0] != "string":
+                    break
+                self._pos += 1
+        else:
+            self.errors.append((token[2], "expected an operand but got '"
+                                + token[1] + "'"))
+            self._pos += 1
+            return PCTExpression("error", text=token[1])
+        # attributes, calls and subscripts:
+        while self._pos < end:
+            next_token = self._tokens[self._pos]
+            if not self._is_trailer(next_token):
+                break
+            if next_token[0] == "open":
+                self._pos = self._skip_brackets(self._pos, end)
+            else:
+                self._pos += 1  # "."
+                if (self._pos < end) and (self._tokens[self._pos][0]
+                                          == "name"):
+                    self._pos += 1
+        last_token = self._tokens[self._pos-1]
+        return PCTExpression(
+            "operand",
+            text=self._text[self._tokens[first_pos][2]:last_token[3]]
+        )
+
+    def _parse_lambda(self, end):
+        """Parse "lambda parameters: body" (the body ends at a comma)."""
+        first_token = self._tokens[self._pos]
+        self._pos += 1
+        is_colon_found = False
+        while (self._pos < end) and not is_colon_found:
+            token = self._tokens[self._pos]
+            if token[0] == "open":
+                # such as a default value in parentheses
+                self._pos = self._skip_brackets(self._pos, end)
+                continue
+            self._pos += 1
+            is_colon_found = (token[0] == "other") and (token[1] == ":")
+        if not is_colon_found:
+            self.errors.append((len(self._text), "expected ':'"))
+            return PCTExpression("lambda",
+                                 text=self._text[first_token[2]:])
+        body = self._parse_expression(0, end)
+        last_token = self._tokens[self._pos-1]
+        return PCTExpression("lambda",
+                             text=self._text[first_token[2]:last_token[3]],
+                             children=[body])
+
+    def _is_trailer(self, token):
+        if token is None:
+            return False
+        if token[0] == "open":
+            return token[1] in "(["
+        return (token[0] == "other") and (token[1] == ".")
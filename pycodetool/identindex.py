@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+usage:
+  identindex.py <file> [<identifier> ...]
+
+List every use of each identifier (or, if none are given, every
+identifier in the file and how many times it is used) as
+<file>:<line>:<column> counting from 1. Like find_identifier in
+parsing.py, a use is a whole word (an attribute such as the x in
+self.x counts), and text in quotes or comments is skipped. Triple-
+quoted strings are skipped even if they span lines. The whole file is
+indexed in one scan, so looking up any number of identifiers
+afterward does not scan it again.
+"""
+import keyword
+import re
+import sys
+
+identifier_token_rx = re.compile(
+    r"(?P<triple>(?:[uUbBrR]|[bB][rR]|[rR][bB])?(?:\"\"\"|'''))"
+    r"|(?P<string>(?:[uUbBrR]|[bB][rR]|[rR][bB])?"
+    r"(?:\"(?:\\.|[^\"\\])*\"?|'(?:\\.|[^'\\])*'?))"
+    r"|(?P<comment>#.*)"
+    r"|(?P<number>\d[\w.]*)"
+    r"|(?P<name>[^\W\d]\w*)"
+)
+triple_ender_rxs = {
+    '"""': re.compile(r'(?:\\.|[^\\])*?"""'),
+    "'''": re.compile(r"(?:\\.|[^\\])*?'''"),
+}
+
+
+class PCTIdentifierIndex:
+    """
+    Map each identifier to where it is used.
+
+    members:
+    positions -- a dict of identifier to a list of (lineN, column)
+                 tuples in order, where lineN counts from 1 and column
+                 is the index in the line (the same as the result of
+                 find_identifier)
+    line_count -- how many lines were indexed
+    keywords_enable -- If True, also index Python keywords (such as
+                       "if" and "None").
+    """
+    positions = None
+    line_count = None
+    keywords_enable = None
+    _triple = None  # the delimiter of a string not ended yet
+
+    def __init__(self, keywords_enable=False):
+        self.positions = {}
+        self.line_count = 0
+        self.keywords_enable = keywords_enable
+
+    def add_lines(self, lines):
+        """
+        Index lines (an iterable of lines without newlines) as the
+        lines following any already indexed.
+        """
+        positions = self.positions
+        keywords_enable = self.keywords_enable
+        iskeyword = keyword.iskeyword
+        search = identifier_token_rx.search
+        for line in lines:
+            self.line_count += 1
+            lineN = self.line_count
+            index = 0
+            if self._triple is not None:
+                match = triple_ender_rxs[self._triple].match(line)
+                if match is None:
+                    continue
+                index = match.end()
+                self._triple = None
+            while True:
+                match = search(line, index)
+                if match is None:
+                    break
+                index = match.end()
+                kind = match.lastgroup
+                if kind == "name":
+                    name = match.group()
+                    if keywords_enable or not iskeyword(name):
+                        uses = positions.get(name)
+                        if uses is None:
+                            uses = list()
+                            positions[name] = uses
+                        uses.append((lineN, match.start()))
+                elif kind == "triple":
+                    delimiter = match.group()[-3:]
+                    match = triple_ender_rxs[delimiter].match(line, index)
+                    if match is None:
+                        self._triple = delimiter
+                        break
+                    index = match.end()
+                elif kind == "comment":
+                    break
+
+    def find(self, name):
+        """Get the (lineN, column) of each use of name, in order."""
+        return self.positions.get(name, list())
+
+    def find_names(self, prefix=""):
+        """Get the sorted identifiers that start with prefix."""
+        return sorted([name for name in self.positions
+                       if name.startswith(prefix)])
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def __len__(self):
+        return len(self.positions)
+
+
+def index_identifiers(lines, keywords_enable=False):
+    """Get a PCTIdentifierIndex of lines (without newlines)."""
+    result = PCTIdentifierIndex(keywords_enable=keywords_enable)
+    result.add_lines(lines)
+    return result
+
+
+def index_path(path, encoding="utf-8"):
+    """Get a PCTIdentifierIndex of the file at path."""
+    infile = open(path, 'rb')
+    data = infile.read().decode(encoding, "replace")
+    infile.close()
+    lines = data.split("\n")
+    if (len(lines) > 0) and (len(lines[-1]) < 1):
+        lines = lines[:-1]
+    return index_identifiers([line.rstrip("\r") for line in lines])
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    path = sys.argv[1]
+    index = index_path(path)
+    names = sys.argv[2:]
+    if len(names) < 1:
+        for name in index.find_names():
+            print(name + ": " + str(len(index.find(name))))
+        return 0
+    found_count = 0
+    for name in names:
+        for lineN, column in index.find(name):
+            print(path + ":" + str(lineN) + ":" + str(column+1) + ": "
+                  + name)
+            found_count += 1
+    if found_count < 1:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Map between the index of a line in PCTParser.lines (which changes as
+lines are inserted) and the number of the line in the loaded file, in
+O(log n) after any number of insertions.
+
+The loaded lines are numbered 0 to n-1 (slots), plus slot n for lines
+appended after the end. Each slot's block holds the lines inserted
+before that loaded line, followed by the loaded line itself. A Fenwick
+(binary indexed) tree holds the size of each block.
+"""
+from array import array
+
+
+class PCTLineMap:
+    loaded_count = None
+    _tree = None  # 1-based Fenwick tree over the block sizes
+    _size = None  # slot count (loaded_count + 1)
+    _total = None
+    _top_bit = None
+
+    def __init__(self, loaded_count):
+        self.loaded_count = loaded_count
+        self._size = loaded_count + 1
+        # Every block starts with only its loaded line (size 1) except
+        # the last slot, so each node covers lowbit(i) lines, less one
+        # if its range includes the last slot.
+        self._tree = array('l', [i & -i for i in range(self._size + 1)])
+        last = self._size
+        while last <= self._size:
+            self._tree[last] -= 1
+            last += last & -last
+        self._total = loaded_count
+        self._top_bit = 1
+        while self._top_bit * 2 <= self._size:
+            self._top_bit *= 2
+
+    def __len__(self):
+        """Get the number of lines, including inserted lines."""
+        return self._total
+
+    def _prefix(self, count):
+        """Get the number of lines in the first count blocks."""
+        result = 0
+        while count > 0:
+            result += self._tree[count]
+            count -= count & -count
+        return result
+
+    def _find_slot(self, line_index):
+        """Get the slot whose block contains line_index."""
+        if line_index >= self._total:
+            return self._size - 1
+        position = 0
+        remaining = line_index
+        bit = self._top_bit
+        while bit > 0:
+            next_position = position + bit
+            if ((next_position <= self._size)
+                    and (self._tree[next_position] <= remaining)):
+                position = next_position
+                remaining -= self._tree[next_position]
+            bit //= 2
+        return position
+
+    def insert(self, line_index, count=1):
+        """
+        Record that count lines were inserted before line_index (or
+        appended if line_index is len(self)).
+        """
+        position = self._find_slot(line_index) + 1
+        while position <= self._size:
+            self._tree[position] += count
+            position += position & -position
+        self._total += count
+
+    def get_loaded_index(self, line_index):
+        """
+        Get the index of the loaded line now at line_index, or -1 if
+        that line was inserted.
+        """
+        slot = self._find_slot(line_index)
+        if slot >= self.loaded_count:
+            return -1
+        if line_index != self._prefix(slot + 1) - 1:
+            return -1
+        return slot
+
+    def get_line_index(self, loaded_index):
+        """Get where the loaded line with this index is now."""
+        return self._prefix(loaded_index + 1) - 1
+
+    def get_lineN(self, line_index):
+        """
+        Get the line number (counting from 1) in the loaded file for
+        diagnostics. An inserted line gets the number of the loaded
+        line before it (or 1 if there is none).
+        """
+        slot = self._find_slot(line_index)
+        if ((slot < self.loaded_count)
+                and (line_index == self._prefix(slot + 1) - 1)):
+            return slot + 1
+        return max(slot, 1)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Classify a literal value (from code or a conf file) using one
+precompiled regex instead of trying conversions and catching the
+exceptions.
+
+Kinds:
+"null" -- None, null, NULL or ~ (the value is None)
+"bool" -- true or false in any case
+"int" -- decimal (such as -12 or 1_000), hex (0x1F), octal (0o17) or
+         binary (0b101), optionally signed and/or with a Python 2 L
+"float" -- such as 1.5, .5, 5., 1e-3, inf or nan, optionally signed
+"string" -- quoted, optionally with a u, b, r, br or rb prefix (the
+            value is the string, or None if it cannot be evaluated)
+None -- anything else (such as an expression or identifier)
+"""
+import ast
+import re
+
+literal_rx = re.compile(r"""
+    (?P<null>None|null|NULL|~)\Z
+    |(?P<bool>[Tt][Rr][Uu][Ee]|[Ff][Aa][Ll][Ss][Ee])\Z
+    |(?P<int>[-+]?(?:
+        0[xX](?:_?[0-9a-fA-F])+
+        |0[oO](?:_?[0-7])+
+        |0[bB](?:_?[01])+
+        |[0-9](?:_?[0-9])*
+    )[lL]?)\Z
+    |(?P<float>[-+]?(?:
+        (?:[0-9](?:_?[0-9])*)?\.[0-9](?:_?[0-9])*(?:[eE][-+]?[0-9]+)?
+        |[0-9](?:_?[0-9])*\.?(?:[eE][-+]?[0-9]+)?
+        |[Ii][Nn][Ff](?:[Ii][Nn][Ii][Tt][Yy])?|[Nn][Aa][Nn]
+    ))\Z
+    |(?P<string>(?:[uUbBrR]|[bB][rR]|[rR][bB])?
+        (?:'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"))\Z
+""", re.VERBOSE)
+decimal_int_rx = re.compile(r"[-+]?[0-9](?:_?[0-9])*\Z")
+# ^ the "int" literals that int() accepts (not hex, octal, binary nor
+#   with an L suffix)
+_int_bases = {"x": 16, "o": 8, "b": 2}
+literal_type_names = {
+    "bool": "bool",
+    "int": "int",
+    "float": "decimal",
+    "string": "string",
+}
+# ^ the PCTSymbol type_identifier for each kind
+
+
+def _parse_int(s):
+    sign = 1
+    if s[:1] in "-+":
+        if s[:1] == "-":
+            sign = -1
+        s = s[1:]
+    s = s.rstrip("lL").replace("_", "")
+    base = _int_bases.get(s[1:2].lower())
+    if (s[:1] == "0") and (base is not None):
+        return sign * int(s[2:], base)
+    return sign * int(s)
+
+
+def classify_literal(s):
+    """
+    Get a tuple (kind, value) for the string s (see the module
+    docstring for the kinds). Surrounding whitespace is ignored.
+    """
+    s = s.strip()
+    match = literal_rx.match(s)
+    if match is None:
+        return None, None
+    kind = match.lastgroup
+    if kind == "null":
+        return kind, None
+    if kind == "bool":
+        return kind, s.lower() == "true"
+    if kind == "int":
+        return kind, _parse_int(s)
+    if kind == "float":
+        return kind, float(s.replace("_", ""))
+    try:
+        return kind, ast.literal_eval(s)
+    except (ValueError, SyntaxError):
+        return kind, None
+
+
+def classify_literals(values):
+    """Get the classify_literal result for each of the values."""
+    classify = classify_literal
+    return [classify(s) for s in values]
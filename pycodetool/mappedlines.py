@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Provide the lines of a (possibly huge) file as a sequence without
+decoding them all up front. The file is memory-mapped, a compact
+line-offset index is built in one pass, and each line is decoded only
+when it is accessed. Changed and inserted lines are kept in an overlay,
+so the file itself is never modified.
+"""
+import mmap
+from array import array
+from bisect import bisect_right
+from prelex import prelex_data
+
+try:
+    array('Q')
+    offset_type_code = 'Q'
+except ValueError:
+    offset_type_code = 'L'  # Python 2 (64-bit except on Windows)
+
+
+def _get_piece_len(piece):
+    """Get the line count of a piece (see PCTMappedLines._pieces)."""
+    if isinstance(piece, tuple):
+        return piece[1] - piece[0]
+    return len(piece)
+
+
+class PCTMappedLines:
+    """
+    Act like a list of lines (without newlines) for PCTParser.
+
+    Only the operations that PCTParser uses are supported: len, getting
+    or setting one line, and inserting with an empty slice such as
+    lines[i:i] = new_lines.
+    """
+    _data = None
+    _mm = None
+    _infile = None
+    _starts = None
+    _pieces = None  # each is either a tuple (start, stop) of loaded
+    #               # line indices or a list of str (changed or inserted
+    #               # lines)
+    _piece_starts = None
+    _len = None
+    encoding = None
+    lex = None  # set by from_path if lex_enable
+
+    def __init__(self, data, encoding="utf-8", line_starts=None):
+        """
+        Sequential arguments:
+        data -- Provide bytes or a buffer such as an mmap.
+
+        Keyword arguments:
+        line_starts -- Provide the byte offset where each line starts
+                       (such as PCTLexInfo.line_starts) to avoid
+                       scanning data again.
+        """
+        self._data = data
+        self.encoding = encoding
+        size = len(data)
+        self._starts = array(offset_type_code)
+        if line_starts is not None:
+            if hasattr(line_starts, "astype"):
+                raw = line_starts.astype(
+                    'u' + str(self._starts.itemsize)
+                ).tobytes()
+                if hasattr(self._starts, "frombytes"):
+                    self._starts.frombytes(raw)
+                else:
+                    self._starts.fromstring(raw)  # Python 2
+            else:
+                self._starts.extend(line_starts)
+        else:
+            start = 0
+            while start < size:
+                self._starts.append(start)
+                newline_index = data.find(b"\n", start)
+                if newline_index < 0:
+                    break
+                start = newline_index + 1
+        # The sentinel is one past the newline that ends the last line
+        # (or one past the end if there is no newline there), so that
+        # a line always ends at the next start minus one.
+        if (size > 0) and (data[size-1:size] == b"\n"):
+            self._starts.append(size)
+        else:
+            self._starts.append(size + 1)
+        self._pieces = [(0, len(self._starts) - 1)]
+        self._update_piece_starts()
+
+    @classmethod
+    def from_path(cls, path, encoding="utf-8", lex_enable=False):
+        """
+        Memory-map the file (close it using close()).
+
+        Keyword arguments:
+        lex_enable -- Also pre-lex the mapped data (see prelex.py) and
+                      keep the PCTLexInfo in the lex member. The line
+                      index then comes from the lex result.
+        """
+        infile = open(path, 'rb')
+        try:
+            mm = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped.
+            infile.close()
+            mm = None
+            infile = None
+        data = mm
+        if data is None:
+            data = b""
+        lex = None
+        line_starts = None
+        if lex_enable:
+            lex = prelex_data(data)
+            line_starts = lex.line_starts
+        result = cls(data, encoding=encoding, line_starts=line_starts)
+        result.lex = lex
+        result._mm = mm
+        result._infile = infile
+        return result
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._infile is not None:
+            self._infile.close()
+            self._infile = None
+
+    def _update_piece_starts(self):
+        self._piece_starts = list()
+        total = 0
+        for piece in self._pieces:
+            self._piece_starts.append(total)
+            total += _get_piece_len(piece)
+        self._len = total
+
+    def _decode(self, loaded_index):
+        start = self._starts[loaded_index]
+        end = self._starts[loaded_index+1] - 1
+        if (end > start) and (self._data[end-1:end] == b"\r"):
+            end -= 1
+        return self._data[start:end].decode(self.encoding)
+
+    def get_loaded_line(self, loaded_index):
+        """Get a line as it is in the file, ignoring the overlay."""
+        return self._decode(loaded_index)
+
+    def get_loaded_count(self):
+        return len(self._starts) - 1
+
+    def get_loaded_data(self):
+        """Get the buffer (such as the mmap) the lines are loaded from."""
+        return self._data
+
+    def _locate(self, index):
+        piece_index = bisect_right(self._piece_starts, index) - 1
+        return piece_index, index - self._piece_starts[piece_index]
+
+    def _split(self, index):
+        """
+        Make sure a piece starts at index and return that piece's
+        index (or len(self._pieces) if index is the end).
+        """
+        if index >= self._len:
+            return len(self._pieces)
+        piece_index, offset = self._locate(index)
+        if offset == 0:
+            return piece_index
+        piece = self._pieces[piece_index]
+        if isinstance(piece, tuple):
+            self._pieces[piece_index:piece_index+1] = [
+                (piece[0], piece[0] + offset),
+                (piece[0] + offset, piece[1]),
+            ]
+        else:
+            self._pieces[piece_index:piece_index+1] = [piece[:offset],
+                                                       piece[offset:]]
+        self._update_piece_starts()
+        return piece_index + 1
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for piece in self._pieces:
+            if isinstance(piece, tuple):
+                loaded_index = piece[0]
+                while loaded_index < piece[1]:
+                    yield self._decode(loaded_index)
+                    loaded_index += 1
+            else:
+                for line in piece:
+                    yield line
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if (index < 0) or (index >= self._len):
+            raise IndexError("line index out of range")
+        piece_index, offset = self._locate(index)
+        piece = self._pieces[piece_index]
+        if isinstance(piece, tuple):
+            return self._decode(piece[0] + offset)
+        return piece[offset]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if (step != 1) or (stop > start):
+                raise ValueError("PCTMappedLines only supports inserting"
+                                 " using an empty slice")
+            piece_index = self._split(start)
+            self._pieces.insert(piece_index, list(value))
+        else:
+            if index < 0:
+                index += self._len
+            if (index < 0) or (index >= self._len):
+                raise IndexError("line index out of range")
+            piece_index, offset = self._locate(index)
+            piece = self._pieces[piece_index]
+            if not isinstance(piece, tuple):
+                piece[offset] = value
+                return
+            piece_index = self._split(index)
+            self._split(index + 1)
+            self._pieces[piece_index] = [value]
+        self._merge_overlay()
+        self._update_piece_starts()
+
+    def _merge_overlay(self):
+        """Join neighboring overlay pieces and drop empty pieces."""
+        pieces = list()
+        for piece in self._pieces:
+            if _get_piece_len(piece) < 1:
+                continue
+            if ((len(pieces) > 0) and (not isinstance(piece, tuple))
+                    and (not isinstance(pieces[-1], tuple))):
+                pieces[-1].extend(piece)
+            else:
+                pieces.append(piece)
+        self._pieces = pieces
+
+    def append(self, value):
+        self[self._len:self._len] = [value]
+
+    def insert(self, index, value):
+        if index < 0:
+            index = max(0, index + self._len)
+        index = min(index, self._len)
+        self[index:index] = [value]
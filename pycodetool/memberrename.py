@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Rename class members that the C# converter prefixed with "_" (see
+Known Issues in readme.md), such as self._name to self.name, including
+uses on other objects (such as obj._name). Every rename is applied to
+a line in one pass using one combined matcher (see multimatch.py)
+instead of one replace per name.
+"""
+import keyword
+import re
+from multimatch import PCTMultiMatcher
+from parsing import identifier_chars
+from parsing import quoted_or_comment_rx
+
+member_prefix = "_"
+leading_identifier_rx = re.compile(r"[ \t]*([^\W\d]\w*)")
+
+
+def _blank(match):
+    return " " * len(match.group())
+
+
+def _add_definitions(definitions, fqname, members, methods):
+    for name in members:
+        definitions.setdefault(name, list()).append((fqname, "member"))
+    for name in methods:
+        definitions.setdefault(name, list()).append((fqname, "method"))
+
+
+def get_member_renames(summaries, names=None, other_classes=None):
+    """
+    Get a tuple (renames, conflicts) for the class members that start
+    with one "_" (not "__") in the files that will be rewritten with
+    the same renames. renames is a dict of old to new name, and
+    conflicts is a dict of old name to the reason it can't be renamed.
+
+    Every attribute with an old name is renamed no matter what object
+    it is on (the type of the object is not known), so a member is not
+    renamed if that could change another class:
+    - a class in summaries has a method with the old name (its calls
+      would be renamed but not the method);
+    - a class in other_classes has a member or method with the old
+      name (its file is not rewritten, so its uses would break);
+    - any class already has a member or method with the new name.
+    A member with the same old name in several of the summaries is not
+    a conflict, since all of them are renamed.
+
+    Sequential arguments:
+    summaries -- Provide the symbol summary (see
+                 PCTParser.get_symbol_summary) of each file that will
+                 be rewritten with the renames.
+
+    Keyword arguments:
+    names -- Only rename these members (each with or without the "_").
+    other_classes -- Provide a dict of class fqname to its summary for
+                     the classes in files that will not be rewritten
+                     (such as PCTProjectIndex.classes without those in
+                     summaries).
+    """
+    renames = {}
+    conflicts = {}
+    selected = None
+    if names is not None:
+        selected = set()
+        for name in names:
+            if not name.startswith(member_prefix):
+                name = member_prefix + name
+            selected.add(name)
+    # name to a list of (class fqname, "member" or "method"):
+    definitions = {}
+    for summary in summaries:
+        for fqname, class_summary in summary["classes"].items():
+            _add_definitions(definitions, fqname,
+                             class_summary["members"],
+                             class_summary["methods"])
+    other_definitions = {}
+    if other_classes is not None:
+        for fqname, class_summary in other_classes.items():
+            _add_definitions(other_definitions, fqname,
+                             class_summary.get("members", {}),
+                             class_summary.get("methods", []))
+    for old_name in sorted(definitions.keys()):
+        if ((old_name[:1] != member_prefix)
+                or (old_name[:2] == member_prefix * 2)):
+            continue
+        if (selected is not None) and (old_name not in selected):
+            continue
+        kinds = [kind for fqname, kind in definitions[old_name]]
+        if "member" not in kinds:
+            continue
+        new_name = old_name[len(member_prefix):]
+        reasons = list()
+        if keyword.iskeyword(new_name):
+            reasons.append("'" + new_name + "' is a keyword")
+        for fqname, kind in definitions[old_name]:
+            if kind == "method":
+                reasons.append("'" + fqname + "." + old_name
+                               + "' is a method")
+        for fqname, kind in other_definitions.get(old_name, []):
+            reasons.append("'" + fqname + "." + old_name + "' is a "
+                           + kind + " in a file that is not rewritten")
+        for fqname, kind in (definitions.get(new_name, [])
+                             + other_definitions.get(new_name, [])):
+            reasons.append("'" + fqname + "." + new_name
+                           + "' is already a " + kind)
+        if len(reasons) > 0:
+            conflicts[old_name] = reasons[0]
+        else:
+            renames[old_name] = new_name
+    return renames, conflicts
+
+
+class PCTMemberRenamer:
+    """
+    Rename members in lines of code.
+
+    members:
+    renames -- a dict of old to new member names
+    """
+    renames = None
+    _matcher = None  # a PCTMultiMatcher of "." plus each old name
+
+    def __init__(self, renames):
+        self.renames = dict(renames)
+        self._matcher = PCTMultiMatcher(
+            ["." + old_name for old_name in sorted(self.renames)]
+        )
+
+    def rename_line(self, line, is_member_line=False):
+        """
+        Get a tuple (line, count) where each attribute (such as self._x
+        or obj._x) outside of quotes and comments is renamed.
+
+        Keyword arguments:
+        is_member_line -- Set to True if the line is in a class body
+                          (not in a method) so a member declared there
+                          (such as "_x = 0") is renamed too.
+        """
+        if len(self.renames) < 1:
+            return line, 0
+        code = line
+        if ('"' in line) or ("'" in line) or ("#" in line):
+            code = quoted_or_comment_rx.sub(_blank, line)
+        spans = list()
+        if is_member_line:
+            match = leading_identifier_rx.match(code)
+            if (match is not None) and (match.group(1) in self.renames):
+                spans.append((match.start(1), match.end(1),
+                              self.renames[match.group(1)]))
+        if "." + member_prefix in code:
+            for index, word in self._matcher.find_all(code):
+                end = index + len(word)
+                if (end < len(code)) and (code[end] in identifier_chars):
+                    # only part of a longer name
+                    continue
+                spans.append((index + 1, end, self.renames[word[1:]]))
+        if len(spans) < 1:
+            return line, 0
+        spans.sort()
+        parts = list()
+        previous_end = 0
+        for start, end, new_name in spans:
+            parts.append(line[previous_end:start])
+            parts.append(new_name)
+            previous_end = end
+        parts.append(line[previous_end:])
+        return "".join(parts), len(spans)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Find every occurrence of any of a set of words in one pass over a
+string (Aho-Corasick), so the cost per line does not grow with the
+number of words.
+"""
+from collections import deque
+
+
+class PCTMultiMatcher:
+    words = None
+    _goto = None  # a dict of character to next state for each state
+    _fail = None  # the state to continue from when no goto matches
+    _out = None  # indices of the words ending at each state
+
+    def __init__(self, words):
+        self.words = list(words)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [list()]
+        for word_i in range(len(self.words)):
+            state = 0
+            for c in self.words[word_i]:
+                next_state = self._goto[state].get(c)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][c] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(list())
+                state = next_state
+            self._out[state].append(word_i)
+        # Set the fail links breadth-first (so shorter prefixes first).
+        queue = deque(self._goto[0].values())
+        while len(queue) > 0:
+            state = queue.popleft()
+            for c, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while (fallback > 0) and (c not in self._goto[fallback]):
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(c, 0)
+                if target == next_state:
+                    target = 0
+                self._fail[next_state] = target
+                self._out[next_state] = (self._out[next_state]
+                                         + self._out[target])
+
+    def __len__(self):
+        return len(self.words)
+
+    def find_all(self, haystack):
+        """
+        Get a list of (index, word) for each occurrence (including
+        overlapping ones) in order of where each occurrence ends (the
+        longest first if several end at the same place).
+        """
+        results = list()
+        if len(self.words) < 1:
+            return results
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        for index in range(len(haystack)):
+            c = haystack[index]
+            while (state > 0) and (c not in goto[state]):
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for word_i in out[state]:
+                word = self.words[word_i]
+                results.append((index + 1 - len(word), word))
+        return results
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Write lines to a file in large batches instead of one write call per
+line, with a choice of encoding and newline, and (optionally) write
+to a temporary file that replaces the destination only once the
+output is complete.
+"""
+import os
+import io
+import codecs
+import shutil
+import tempfile
+from compression import get_compression
+from compression import open_compressed
+
+utf8_bom = u"\ufeff"
+bom_codec_names = ["utf-8-sig", "utf-16", "utf-32"]
+# ^ These codecs write their own BOM.
+
+
+class PCTOutputWriter:
+    """
+    Buffer lines then write them using one write call per batch.
+
+    members:
+    newline -- This is appended to each line. Unless translate_enable
+               is False, Python changes "\\n" to os.linesep (the same as
+               open(path, 'w') does).
+    """
+    path = None
+    encoding = None
+    newline = None
+    atomic_enable = None
+    buffer_line_count = None
+    line_count = None
+    _outfile = None
+    _tmp_path = None
+    _buffer = None
+    _is_first = None
+    _is_stream = None  # path is a binary file-like object
+
+    def __init__(self, path, encoding=None, newline="\n",
+                 translate_enable=True, atomic_enable=False,
+                 buffer_line_count=4096):
+        """
+        Sequential arguments:
+        path -- Set the destination file path (compressed if it ends
+                with a suffix in compression_suffixes, such as .gz; see
+                compression.py), or provide a binary file-like object
+                (such as io.BytesIO) to write the encoded lines to
+                instead (it is left open, and atomic_enable is
+                ignored).
+
+        Keyword arguments:
+        encoding -- Set the output encoding (None for the locale's
+                    preferred encoding like open). A leading BOM
+                    (u"\\ufeff") in the first line is written as-is for
+                    UTF-8 (preserving it), but dropped if the codec
+                    writes its own BOM or cannot encode one.
+        translate_enable -- Let Python change "\\n" to os.linesep.
+        atomic_enable -- Write to a temporary file in the same
+                         directory and rename it to path on close.
+        buffer_line_count -- Write after this many lines are buffered.
+        """
+        self.path = path
+        self.encoding = encoding
+        self.newline = newline
+        self.atomic_enable = atomic_enable
+        self.buffer_line_count = buffer_line_count
+        self.line_count = 0
+        self._buffer = list()
+        self._is_first = True
+        file_newline = None
+        if not translate_enable:
+            file_newline = ""
+        self._is_stream = hasattr(path, "write")
+        if self._is_stream:
+            self.atomic_enable = False
+            self._outfile = io.TextIOWrapper(path, encoding=encoding,
+                                             newline=file_newline)
+            return
+        open_path = path
+        if atomic_enable:
+            parent = os.path.dirname(os.path.abspath(path))
+            handle, self._tmp_path = tempfile.mkstemp(
+                dir=parent,
+                prefix="." + os.path.basename(path) + ".",
+                suffix=".tmp"
+            )
+            os.close(handle)
+            # mkstemp only allows the owner, so use normal permissions:
+            if os.path.isfile(path):
+                shutil.copymode(path, self._tmp_path)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(self._tmp_path, 0o666 & ~umask)
+            open_path = self._tmp_path
+        compression = get_compression(path)
+        if compression is not None:
+            self._outfile = io.TextIOWrapper(
+                open_compressed(open_path, 'wb', compression=compression),
+                encoding=encoding,
+                newline=file_newline
+            )
+        else:
+            self._outfile = io.open(open_path, 'w', encoding=encoding,
+                                    newline=file_newline)
+
+    def _prepare_first(self, line):
+        self._is_first = False
+        if line[:1] != utf8_bom:
+            return line
+        codec_name = codecs.lookup(self._outfile.encoding).name
+        if codec_name in bom_codec_names:
+            return line[1:]
+        try:
+            utf8_bom.encode(codec_name)
+        except UnicodeEncodeError:
+            return line[1:]
+        return line
+
+    def write_line(self, line):
+        if self._is_first:
+            line = self._prepare_first(line)
+        self._buffer.append(line)
+        if len(self._buffer) >= self.buffer_line_count:
+            self.flush()
+
+    def write_lines(self, lines):
+        """Write an iterable of lines (without newlines)."""
+        for line in lines:
+            self.write_line(line)
+
+    def flush(self):
+        if len(self._buffer) > 0:
+            self._outfile.write(self.newline.join(self._buffer)
+                                + self.newline)
+            self.line_count += len(self._buffer)
+            self._buffer = list()
+
+    def close(self):
+        """Write the rest of the buffer and finish the file."""
+        if self._outfile is None:
+            return
+        self.flush()
+        self._close_outfile()
+        if self._tmp_path is not None:
+            if hasattr(os, "replace"):
+                os.replace(self._tmp_path, self.path)
+            else:
+                if os.path.isfile(self.path):
+                    os.remove(self.path)
+                os.rename(self._tmp_path, self.path)
+            self._tmp_path = None
+
+    def _close_outfile(self):
+        if self._is_stream:
+            self._outfile.flush()
+            self._outfile.detach()  # leave the stream open
+        else:
+            self._outfile.close()
+        self._outfile = None
+
+    def abort(self):
+        """Stop without replacing the destination (if atomic)."""
+        if self._outfile is not None:
+            self._close_outfile()
+        if self._tmp_path is not None:
+            os.remove(self._tmp_path)
+            self._tmp_path = None
+        self._buffer = list()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Keep a few idle PCTParser objects so that a batch (such as each worker
+process in project.py or pipeline.py) sets up the rule tables once
+instead of once per file (see PCTParser.reset).
+"""
+from contextlib import contextmanager
+
+from pct import PCTParser
+
+
+class PCTParserPool:
+    """
+    Hand out parsers and take them back.
+
+    members:
+    max_idle -- how many idle parsers to keep (others are dropped when
+                released)
+    project_index -- the PCTProjectIndex (or None) that every parser
+                     from the pool uses
+    options -- a dict of PCTParser attribute names to values to set on
+               each new parser (such as {"show_notices": False})
+    created_count -- how many parsers the pool has constructed
+    """
+    max_idle = None
+    project_index = None
+    options = None
+    created_count = None
+    _idle = None
+
+    def __init__(self, max_idle=2, project_index=None, options=None):
+        self.max_idle = max_idle
+        self.project_index = project_index
+        self.options = {}
+        if options is not None:
+            self.options.update(options)
+        self.created_count = 0
+        self._idle = list()
+
+    def acquire(self):
+        """Get an idle parser, or a new one if none are idle."""
+        if len(self._idle) > 0:
+            return self._idle.pop()
+        parser = PCTParser(project_index=self.project_index)
+        for name, value in self.options.items():
+            setattr(parser, name, value)
+        self.created_count += 1
+        return parser
+
+    def release(self, parser):
+        """Reset a parser from acquire and keep it if there is room."""
+        parser.reset()
+        if len(self._idle) < self.max_idle:
+            self._idle.append(parser)
+
+    @contextmanager
+    def parser(self):
+        """
+        Acquire a parser for a with statement and release it afterward
+        (even if there was an exception).
+        """
+        parser = self.acquire()
+        try:
+            yield parser
+        finally:
+            self.release(parser)
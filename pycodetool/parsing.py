@@ -24,9 +24,12 @@ Parse data and manipulate variables.
 
 
 import os
+import re
 import sys
 import traceback
 import copy
+from literals import classify_literals
+from literals import decimal_int_rx
 try:
     input = raw_input
 except NameError:
@@ -309,7 +312,6 @@ def get_dict_modified_by_conf_file(this_dict, path,
                                    comment_delimiter="#",
                                    inline_comments_enable=False):
     global entries_modified_count
-    nulls = ["None", "null", "~", "NULL"]
     entries_modified_count = 0
     results = this_dict
     # print("Checking "+str(path)+" for settings...")
@@ -320,6 +322,8 @@ def get_dict_modified_by_conf_file(this_dict, path,
         ins = open(path, 'r')
         rawl = True
         line_n = 0
+        names = list()
+        values = list()
         while rawl:
             line_n += 1  # This must become 1 on the first line.
             rawl = ins.readline()
@@ -343,19 +347,22 @@ def get_dict_modified_by_conf_file(this_dict, path,
                 continue
             # skip yaml implicit nulls or
             # yaml objects
-            result_name = strp[:ao_index].strip()
-            result_val = strp[ao_index+1:].strip()
-            result_lower = result_val.lower()
-            if result_val in nulls:
-                result_val = None
-            elif result_lower == "true":
-                result_val = True
-            elif result_lower == "false":
-                result_val = False
-            elif RepresentsInt(result_val):
-                result_val = int(result_val)
-            elif RepresentsFloat(result_val):
-                result_val = float(result_val)
+            names.append(strp[:ao_index].strip())
+            values.append(strp[ao_index+1:].strip())
+        ins.close()
+        kinds_and_values = classify_literals(values)
+        for index in range(len(names)):
+            result_name = names[index]
+            result_val = values[index]
+            kind, value = kinds_and_values[index]
+            if kind == "int":
+                if decimal_int_rx.match(result_val):
+                    result_val = value
+                # else keep hex, octal, binary and 10L as strings as
+                #   before (int() does not accept them)
+            elif kind in ["null", "bool", "float"]:
+                result_val = value
+            # else keep strings (even if quoted) as-is
             # print("   CHECKING... " + result_name
             #       + ":"+result_val)
             if ((result_name not in results) or
@@ -363,7 +370,6 @@ def get_dict_modified_by_conf_file(this_dict, path,
                 entries_modified_count += 1
                 # print(str(entries_modified_count))
             results[result_name] = result_val
-        ins.close()
     return results
 
 
@@ -660,6 +666,13 @@ def explode_unquoted(haystack, delimiter):
     return elements
 
 
+quoted_or_comment_rx = re.compile(r'"(?:\\.|[^"\\])*"?'
+                                  r"|'(?:\\.|[^'\\])*'?"
+                                  r"|#.*")
+# ^ quoted text (even unterminated) or a comment, such as to blank them
+#   with sub before searching the code in a line
+
+
 # Finds needle in haystack where not quoted, taking into account escape
 #   sequence for single-quoted or double-quoted string inside haystack.
 def find_unquoted_even_commented(haystack, needle, start=0,
@@ -846,3 +859,42 @@ def find_unquoted_not_commented(haystack, needle, start=0, endbefore=-1,
             prev_char = this_char
             index += step
     return result
+
+
+# Finds needle in haystack where not quoted, not commented and not
+#   inside parentheses, brackets or braces (for example, finds the
+#   assignment operator in "x = f(a=b)" but not in "f(a=b)").
+def find_unquoted_not_commented_not_parenthetical(haystack, needle,
+                                                  start=0, endbefore=-1,
+                                                  comment_delimiter="#"):
+    result = -1
+    prev_char = None
+    if ((haystack is not None) and
+            (needle is not None) and
+            (len(needle) > 0)):
+        in_quote = None
+        depth = 0
+        if (endbefore < 0) or (endbefore > len(haystack)):
+            endbefore = len(haystack)
+        index = 0
+        while index <= (endbefore-len(needle)):
+            this_char = haystack[index:index+1]
+            if in_quote is None:
+                if (this_char == comment_delimiter) or \
+                        (haystack[index:index+3] == "\"\"\""):
+                    break
+                elif (this_char == '"') or (this_char == "'"):
+                    in_quote = this_char
+                elif ((depth == 0) and (index >= start) and
+                        (haystack[index:index+len(needle)] == needle)):
+                    result = index
+                    break
+                elif this_char in "([{":
+                    depth += 1
+                elif (this_char in ")]}") and (depth > 0):
+                    depth -= 1
+            elif (this_char == in_quote) and (prev_char != "\\"):
+                in_quote = None
+            prev_char = this_char
+            index += 1
+    return result
@@ -9,19 +9,212 @@ Python))
 License: GPL 2 or later
 """
 import os
+import json
 # import datetime
 import time
+import locale
+import io
+import codecs
 from parsing import find_unquoted_not_commented
-from parsing import find_unquoted_MAY_BE_COMMENTED
+from parsing import find_unquoted_even_commented
 from parsing import find_any_not
 from parsing import find_identifier
+from parsing import explode_unquoted
+from parsing import get_indent_string
+from parsing import get_operation_chunk_len
+from parsing import identifier_chars
+from parsing import identifier_and_dot_chars
+from parsing import is_identifier_valid
 from parsing import find_unquoted_not_commented_not_parenthetical
+from prelex import prelex_data
+from prelex import can_prelex
+from prelex import find_in_plain
+from prelex import find_present_tokens
+from prelex import LEX_BLANK
+from prelex import LEX_HASH
+from prelex import LEX_SPECIAL
+from mappedlines import PCTMappedLines
+from outputwriter import PCTOutputWriter
+from compression import get_compression
+from compression import read_compressed
+from diffwriter import PCTDiffWriter
+from diffwriter import diff_formats
+from sourcemap import PCTSourceMap
+from sourcemap import inserted_marker
+from linemap import PCTLineMap
+from slicerewrite import substrings_to_slices
+from multimatch import PCTMultiMatcher
+from typeindex import PCTTypeIndex
+from literals import classify_literal
+from literals import literal_type_names
+from typeinfer import PCTTypeInference
+from typeinfer import get_type_name
+from expression import PCTExpressionParser
+from scopetree import PCTScope
+from identindex import PCTIdentifierIndex
+from memberrename import PCTMemberRenamer
+from memberrename import get_member_renames
+from callgraph import PCTCallGraph
 # import re  # re.escape
 # ^ why doesn't it work (printing result shows backslash then actually
 # ends the line)
 
 convert_note = ("# Processed by pycodetool"
                 " https://github.com/poikilos/pycodetool")
+preprocess_facets = ["symbols", "duplicates", "exceptions", "header"]
+# ^ the parts of preprocessing, in order (see PCTParser.preprocess)
+line_sink_names = ["code"] + diff_formats
+sink_names = line_sink_names + ["source_map", "identifiers", "report"]
+# ^ what one rewrite can write (see framework_to_standard_python)
+
+rule_family_tokens = {
+    "stream_reader": ["StreamReader"],
+    "stream_writer": ["StreamWriter"],
+    "exception": ["except", "finally"],
+    "convert_tostring": ["Convert.ToString"],
+    "tostring": ["ToString"],
+    "substring": ["Substring"],
+    "console": ["Console."],
+    "enumerator": ["enumerator"],
+}
+# ^ process_python_lines skips the checks for a family if none of its
+# tokens occur anywhere in the loaded file (see get_rule_families).
+console_replacements = [
+    # TODO: should use print("", file=sys.stderr):
+    ("Console.Error.WriteLine()", "sys.stderr.write(\"\\n\")",
+     ["sys.stderr.flush()"]),
+    # TODO: should use print(x, file=sys.stderr):
+    ("Console.Error.WriteLine", "sys.stderr.write",
+     ["sys.stderr.write(\"\\n\")", "sys.stderr.flush()"]),
+    # TODO: should sys.stderr.write(str(x)):
+    ("Console.Error.Write", "sys.stderr.write", []),
+    ("Console.Error.Flush", "sys.stderr.flush", []),
+    ("Console.WriteLine()", "print(\"\")", []),
+    ("Console.WriteLine", "print", []),
+    # TODO: should sys.stdout.write(str(x)):
+    ("Console.Write", "sys.stdout.write", []),
+    ("Console.Out.Flush", "sys.stdout.flush", []),
+]
+# ^ (old, new, lines to insert after the line) for each Console call,
+#   replaced in order (see also analyze.py)
+sw_writeline_suffix = ".WriteLine("
+string_type_prefixes = ["\"", "u'", "u\"", "b'", "b\""]
+# ^ the start of an expression that begins with a string literal (see
+#   get_python_first_explicit_type_id)
+
+
+def get_param_names(params_string):
+    """
+    Get the names from the parameter list of a def (the part between
+    the parentheses), without defaults nor leading asterisks.
+    """
+    results = list()
+    for param in explode_unquoted(params_string, ","):
+        name = param.split("=")[0].split(":")[0].strip().lstrip("*")
+        if len(name) > 0:
+            results.append(name)
+    return results
+
+
+def tostring_to_str(line, fUNC=find_unquoted_not_commented):
+    """
+    Change each framework call such as x.ToString() to str(x). The
+    parameters of a call that has any (such as a format) are moved to a
+    comment at the end of the line.
+
+    Keyword arguments:
+    fUNC -- Provide the find function to use for the line (such as
+            find_in_plain if it has no quotes nor comment; see
+            prelex.py).
+
+    Returns a tuple (line, changes, errors) where changes lists
+    (operand, params) for each call that was changed (params is "()"
+    if there were none) and errors is a list of (index, message) for
+    each one that could not be (and so was left as-is).
+    """
+    fwts = "ToString"
+    changes = list()
+    errors = list()
+    start_index = 0
+    while True:
+        fwts_index = fUNC(line, fwts, start=start_index)
+        if fwts_index < 0:
+            break
+        previous_start_index = start_index
+        start_index = fwts_index + len(fwts)  # unless it is changed
+        dot_index = fwts_index - 1
+        if not ((dot_index == 0) or (line[dot_index:dot_index+1] == ".")):
+            continue
+        fwts_ender_index = fwts_index + len(fwts)
+        if ((len(line) != fwts_ender_index)
+                and (line[fwts_ender_index] in identifier_chars)):
+            continue
+        operand_lastchar_index = find_any_not(line, " \t",
+                                              start=dot_index-1, step=-1)
+        if operand_lastchar_index < 0:
+            continue
+        operand_ender_index = operand_lastchar_index + 1
+        operand_len = get_operation_chunk_len(
+            line,
+            start=operand_lastchar_index,
+            step=-1
+        )
+        operand_index = operand_ender_index - operand_len
+        operand = line[operand_index:operand_ender_index]
+        open_paren_index = fUNC(line, "(", start=fwts_index+len(fwts))
+        if open_paren_index < 0:
+            errors.append((fwts_index, "expected open parenthesis after"
+                                       " ToString("))
+            continue
+        fwts_params_len = get_operation_chunk_len(line,
+                                                  start=open_paren_index)
+        if fwts_params_len < 1:
+            errors.append((fwts_index, "expected close parenthesis after"
+                                       " ToString("))
+            continue
+        fwts_params = line[open_paren_index:open_paren_index
+                           + fwts_params_len]
+        line = (line[:operand_index] + "str(" + operand + ")"
+                + line[open_paren_index+fwts_params_len:])
+        start_index = previous_start_index
+        if fwts_params != "()":
+            line += "  # " + fwts_params
+            fUNC = find_unquoted_not_commented
+        changes.append((operand, fwts_params))
+    return line, changes, errors
+
+
+def get_nesting_depth(var, fqname):
+    """
+    Get how many names come before the last one in fqname (the fully
+    qualified name of var, such as a PCTSymbol), from the scope tree
+    if var has a scope instead of counting the dots.
+    """
+    if var.scope is None:
+        return fqname.count(".")
+    if isinstance(var, PCTSymbol):
+        # var.scope is where it is declared.
+        return var.scope.depth + var.name.count(".")
+    # var.scope is the class or method itself.
+    return var.scope.depth - 1
+
+
+def get_rule_families(data, encoding="utf-8"):
+    """
+    Get the set of rule families (see rule_family_tokens) that could
+    apply to data (the whole file as bytes, an mmap or text).
+    """
+    tokens = set()
+    for family_tokens in rule_family_tokens.values():
+        tokens.update(family_tokens)
+    present = find_present_tokens(data, tokens, encoding=encoding)
+    results = set()
+    for name, family_tokens in rule_family_tokens.items():
+        for token in family_tokens:
+            if token in present:
+                results.add(name)
+                break
+    return results
 
 
 class PCTLanguageKeyword:
@@ -59,12 +252,15 @@ class PCTMethod:
     name = None
     lineN = None
     class_name = None
+    scope = None  # the PCTScope of the method itself
 
     def __init__(self, name, lineN=None):
         self.name = name
         self.lineN = lineN
 
     def get_fully_qualified_name(self):
+        if self.scope is not None:
+            return self.scope.get_fully_qualified_name()
         result = self.name
         if self.class_name is not None:
             result = self.class_name + "." + result
@@ -75,12 +271,15 @@ class PCTType:
 
     name = None
     constructor_params = None
+    scope = None  # the PCTScope of the class (None if builtin)
 
     def __init__(self, name, constructor_params=["value"]):
         self.name = name
         self.constructor_params = list()
 
     def get_fully_qualified_name(self):
+        if self.scope is not None:
+            return self.scope.get_fully_qualified_name()
         return self.name
 
 
@@ -91,6 +290,8 @@ class PCTSymbol:
     members:
     method_name -- It is not None only if the variable was declared in
                    the scope of a method (or function) definition.
+    scope -- the PCTScope where the symbol was declared (set by
+             PCTScope.add_symbol)
     """
     name = None
     lineN = None
@@ -99,6 +300,7 @@ class PCTSymbol:
     class_name = None
     method_name = None
     default_value = None
+    scope = None
 
     def __init__(self, name, lineN, type_identifier=None, itlN=None):
         """
@@ -115,6 +317,8 @@ class PCTSymbol:
         self.itlN = itlN
 
     def get_fully_qualified_name(self):
+        if self.scope is not None:
+            return self.scope.get_fully_qualified_name(self.name)
         result = self.name
         if self.method_name is not None:
             result = self.method_name + "." + result
@@ -136,7 +340,7 @@ class PCTParser:
     operator_sets = None  # in order of operation
     arithmetic_pre_operators = None  # **
     unary_operators = None  # ! + - (compliment,positive,negative)
-    pre_arithmetic_operators = None  # // / * %  #in order of finding
+    pre_arithmetic_operators = None  # // / * % @  #in order of finding
     arithmetic_operators = None  # + -
     bitwise_shift_operators = None  # >> <<
     bitwise_pre_operators = None  # &
@@ -148,26 +352,64 @@ class PCTParser:
     identity_operators = None  # s, is not
     membership_operators = None  # in, not in
     unary_logical_operators = None  # not
+    logical_and_operators = None  # and
+    logical_or_operators = None  # or
     logical_operators = None  # or, and
     file_path = None
     outfile_path = None
+    encoding = None  # of the loaded file
+    outfile_encoding = None  # None to use the same as the loaded file
+    atomic_enable = None
     newline = None
     show_notices = None
     sw_object_strings = None
-    extra_lines_cumulative = None
+    type_index = None  # PCTTypeIndex of custom_types and builtin_types
+    expression_parser = None  # PCTExpressionParser using operator_sets
+    scope_tree = None  # the module PCTScope (see scopetree.py)
+    identifier_index = None  # PCTIdentifierIndex of the loaded lines
+    project_index = None  # a PCTProjectIndex of other files (project.py)
+    member_renames = None  # None, or old to new names of members to
+    #                      # rename when rewriting (see memberrename.py)
+    sw_object_scopes = None  # (class_name, method_name) to object names
+    _sw_matchers = None  # PCTMultiMatcher for each scope (see above)
+    prelex_enable = None  # pre-lex files (but not mapped ones; see
+    #                     # mmap_min_size) using prelex.py
+    prefilter_enable = None
+    rule_families = None  # None (all) or the set from get_rule_families
+    mmap_min_size = None  # load files at least this big using mmap
+    lex = None  # PCTLexInfo for the lines as loaded
+    line_map = None  # PCTLineMap from line index to loaded index
+    loaded_changed = None  # 1 for each loaded line changed by set_line
+    loaded_lines = None  # unless mapped (see get_loaded_line)
+    loaded_final_newline_enable = None  # False if the last loaded line
+    #                                   # has no newline
+    output_format = None  # "code" or one of diff_formats
+    source_map = None  # PCTSourceMap from the last rewrite
+    source_map_enable = None  # write it to outfile_path+source_map_suffix
+    source_map_suffix = None
+    preprocessed = None  # the set of preprocess_facets done (this file)
+    _sinks = None  # sink name to path for the rewrite in progress
+    _messages = None  # [kind, message] for each diagnostic, if a report
+    #                 # is being made
     parser_op_preprocess = "preprocess"
     parser_op_remove_net_framework = "remove_net_framework"
 
     def pperr(self, msg):
         """print_parsing_error"""
+        if self._messages is not None:
+            self._messages.append(["parsing", msg.strip()])
         print("  (PARSING) "+msg)
 
     def pserr(self, msg):
         """print_source_error"""
+        if self._messages is not None:
+            self._messages.append(["source", msg.strip()])
         print("  (SOURCE) "+msg)
 
     def pinfo(self, msg):
         """print_notice"""
+        if self._messages is not None:
+            self._messages.append(["change", msg.strip()])
         if self.show_notices:
             print("  (CHANGE) "+msg)
 
@@ -199,27 +441,61 @@ class PCTParser:
     #             break
     #     return result
 
-    def save_identifier_lists(self, outfile_path):
+    def get_outfile_encoding(self, encoding=None):
+        if encoding is not None:
+            return encoding
+        if self.outfile_encoding is not None:
+            return self.outfile_encoding
+        return self.encoding
+
+    def save_identifier_lists(self, outfile_path, encoding=None,
+                              atomic_enable=None):
+        """
+        Keyword arguments:
+        encoding -- Set the output encoding (default: outfile_encoding
+                    or else the encoding of the loaded file).
+        atomic_enable -- Only replace outfile_path once the whole list
+                         is written (default: self.atomic_enable).
+        """
+        self.preprocess(["symbols"])
         self.pstat("save_identifier_lists...")
         self.outfile_path = outfile_path
-        outfile = open(self.outfile_path, 'w')
+        if atomic_enable is None:
+            atomic_enable = self.atomic_enable
         if self.newline is None:
             self.newline = "\n"  # NOTE: python automatically changes instances of \n to os.sep, so would change os.sep to \r\r\n so don't use os.sep
             # self.newline = os.sep
             # self.pperr("WARNING: no file loaded, so newline '"+re_escape_visible(self.newline)+"' will be used for creating '"+outfile_path+"'.")
+        outfile = PCTOutputWriter(
+            self.outfile_path,
+            encoding=self.get_outfile_encoding(encoding),
+            newline=self.newline,
+            atomic_enable=atomic_enable
+        )
+        outfile.write_lines(self.get_identifier_lines())
+        outfile.close()
+        self.pstat("OK (save_identifier_lists to '"+outfile_path+"')")
+
+    def get_identifier_lines(self):
+        """
+        Get each line of the identifier lists (see
+        save_identifier_lists), from the symbols collected during
+        preprocessing.
+        """
+        self.preprocess(["symbols"])
         indent = ""
         if self.file_path is not None:
-            outfile.write(self.file_path+self.newline)
+            yield self.file_path
             indent += "  "
-        outfile.write(indent+"custom_types:" + self.newline)
+        yield indent+"custom_types:"
         for var in self.custom_types:
             fqname = var.get_fully_qualified_name()
-            outfile.write(indent+"  " + ("  "*fqname.count(".")) + fqname + self.newline)
-        outfile.write(indent+"symbols:" + self.newline)
+            yield indent+"  " + ("  "*get_nesting_depth(var, fqname)) + fqname
+        yield indent+"symbols:"
         for var in self.symbols:
             type_prefix = ""
             if var.type_identifier is not None:
-                type_prefix = var.type_identifier + " "
+                type_prefix = get_type_name(var.type_identifier) + " "
             fqname = var.get_fully_qualified_name()
             assignment_right_string = "  # = (no value specified)"
             if var.default_value is not None:
@@ -232,20 +508,40 @@ class PCTParser:
             elif var.itlN is not None:
                 line_counting_number_comment += "#(missing starting line number) to line " + str(var.itlN)
 
-            outfile.write(indent+"  " + ("  "*fqname.count(".")) + type_prefix + fqname + assignment_right_string + line_counting_number_comment + self.newline)
-        outfile.write(indent+"functions:" + self.newline)
+            yield indent+"  " + ("  "*get_nesting_depth(var, fqname)) + type_prefix + fqname + assignment_right_string + line_counting_number_comment
+        yield indent+"functions:"
         for var in self.functions:
             fqname = var.get_fully_qualified_name()
-            outfile.write(indent+"  " + ("  "*fqname.count(".")) + fqname + self.newline)
-        outfile.close()
-        self.pstat("OK (save_identifier_lists to '"+outfile_path+"')")
+            yield indent+"  " + ("  "*get_nesting_depth(var, fqname)) + fqname
+
+    def __init__(self, file_path=None, project_index=None, data=None):
+        """
+        Set up the rule tables, then load the file if file_path is not
+        None (see parse_path). The same parser can be used for any
+        number of files (see reset and parserpool.py).
 
-    def __init__(self, file_path):
+        Keyword arguments:
+        project_index -- Provide a PCTProjectIndex (see project.py) so
+                         classes and members declared in other files of
+                         the project can be resolved (see
+                         set_project_index).
+        data -- Provide the bytes of the file if they were already read
+                (see load_file).
+        """
         self.file_path = file_path
         # self.data = None
         self.show_notices = True
+        self.prelex_enable = True
+        self.prefilter_enable = True
+        self.atomic_enable = False
+        self.output_format = "code"
+        self.source_map_enable = False
+        self.source_map_suffix = ".map.json"
+        self.mmap_min_size = 64 * 1024 * 1024
         self.sw_object_strings = list()
-        self.extra_lines_cumulative = 0
+        self.sw_object_scopes = {}
+        self._sw_matchers = {}
+        self.type_index = PCTTypeIndex()
         builtin_type_strings = list()
         builtin_type_strings.append("int")
         builtin_type_strings.append("long")
@@ -282,9 +578,11 @@ class PCTParser:
         self.command_keywords.append("try")
         # TODO process lambda
         self.custom_types = list()
-        self.builtin_types = list()
+        self.preprocessed = set()
+        self._standard_types = list()
         for builtin_type_string in builtin_type_strings:
-            self.builtin_types.append(PCTType(builtin_type_string))
+            self._standard_types.append(PCTType(builtin_type_string))
+        self.set_project_index(project_index)
         self.operator_sets = list()  # in order of operation
         self.arithmetic_pre_operators = list()
         self.arithmetic_pre_operators.append("**")
@@ -295,12 +593,13 @@ class PCTParser:
         self.unary_operators.append("+")
         self.unary_operators.append("-")
         self.operator_sets.append(self.unary_operators)
-        self.pre_arithmetic_operators = list()  # // / * %  #in order of
+        self.pre_arithmetic_operators = list()  # // / * % @  #in order of
         #                                       # finding
         self.pre_arithmetic_operators.append("//")
         self.pre_arithmetic_operators.append("/")
         self.pre_arithmetic_operators.append("*")
         self.pre_arithmetic_operators.append("%")
+        self.pre_arithmetic_operators.append("@")  # matrix product
         self.operator_sets.append(self.pre_arithmetic_operators)
         self.arithmetic_operators = list()  # + -
         self.arithmetic_operators.append("+")
@@ -328,8 +627,9 @@ class PCTParser:
         self.equality_operators.append("==")
         self.equality_operators.append("!=")
         self.operator_sets.append(self.equality_operators)
-        self.assignment_operators = list()  # %= //= /= -= += **= *= =
+        self.assignment_operators = list()  # @= %= //= /= -= += **= *= =
         #                                   # in order of finding
+        self.assignment_operators.append("@=")
         self.assignment_operators.append("%=")
         self.assignment_operators.append("//=")
         self.assignment_operators.append("/=")
@@ -349,30 +649,182 @@ class PCTParser:
         self.operator_sets.append(self.membership_operators)
         self.unary_logical_operators = list()
         self.unary_logical_operators.append("not")
-        self.logical_operators = list()  # not, or, and
-        self.logical_operators.append("or")
-        self.logical_operators.append("and")
-        self.operator_sets.append(self.logical_operators)
-
-        self.load_file(file_path)
+        self.logical_and_operators = list()  # and
+        self.logical_and_operators.append("and")
+        self.operator_sets.append(self.logical_and_operators)
+        self.logical_or_operators = list()  # or
+        self.logical_or_operators.append("or")
+        self.operator_sets.append(self.logical_or_operators)
+        # ^ separate sets, since "and" binds tighter than "or"
+        self.logical_operators = (self.logical_or_operators
+                                  + self.logical_and_operators)
+        self.expression_parser = PCTExpressionParser(
+            self.operator_sets,
+            self.unary_operators,
+            self.unary_logical_operators
+        )
+
+        if file_path is not None:
+            self.parse_path(file_path, data=data)
+
+    def set_project_index(self, project_index):
+        """
+        Use a PCTProjectIndex (see project.py), or None, for the files
+        parsed from now on.
+        """
+        self.project_index = project_index
+        # A new list makes type_index start over (see PCTTypeIndex.sync).
+        self.builtin_types = list(self._standard_types)
+        if project_index is not None:
+            # Classes in other files can be constructed too (classes in
+            # this file still take priority; see PCTTypeIndex).
+            for project_class_name in project_index.get_class_names():
+                self.builtin_types.append(PCTType(project_class_name))
+
+    def reset(self):
+        """
+        Release everything from the last file (including a memory map)
+        but keep the rule tables and settings, so the parser can be
+        used for another file.
+        """
+        self.close_file()
+        self.file_path = None
+        self.outfile_path = None
+        self.encoding = None
+        self.newline = None
+        self.lines = None
+        self.lex = None
+        self.loaded_lines = None
+        self.loaded_final_newline_enable = None
+        self.rule_families = None
+        self.line_map = None
+        self.loaded_changed = None
+        self.classes = None
+        self.symbols = None
+        self.functions = None
+        self.custom_types = list()
+        self.sw_object_strings = list()
+        self.sw_object_scopes = {}
+        self._sw_matchers = {}
+        self.scope_tree = None
+        self.identifier_index = None
+        self.member_renames = None
+        self.source_map = None
+        self.preprocessed = set()
+
+    def parse_path(self, path, encoding=None, data=None):
+        """
+        Reset the parser, then load the file (see load_file for the
+        keyword arguments). It is preprocessed later, only as far as
+        each operation needs (see preprocess).
+        """
+        self.reset()
+        self.load_file(path, encoding=encoding, data=data)
 
-        self.process_python_lines(self.parser_op_preprocess)
+    def parse_text(self, text, name="<text>"):
+        """
+        Reset the parser, then load text (unicode, or bytes in the same
+        encoding a file would have) as if it were the file named name.
+        """
+        encoding = None
+        if not isinstance(text, bytes):
+            encoding = "utf-8"
+            text = text.encode(encoding)
+        self.parse_path(name, encoding=encoding, data=text)
 
-    def load_file(self, infile_path):
+    def load_file(self, infile_path, encoding=None, data=None):
+        """
+        Keyword arguments:
+        encoding -- Set the encoding of the file (default: "utf-8" if
+                    the file starts with a UTF-8 BOM, otherwise the
+                    locale's preferred encoding like open). The BOM
+                    stays at the start of the first line so it is
+                    written back out (see outputwriter.py).
+        data -- Provide the bytes of the file if they were already read
+                (such as by the reader thread in pipeline.py) so the
+                file is not opened. infile_path is still used as the
+                name of the file in messages and output.
+        If infile_path ends with a suffix in compression_suffixes (such
+        as .gz; see compression.py), it is decompressed while read.
+        """
+        self.close_file()
         self.lines = list()
         # self.data = None
         self.file_path = infile_path
+        self.lex = None
+        self.loaded_lines = None
+        self.loaded_final_newline_enable = True
+        if (data is None) and (get_compression(infile_path) is not None):
+            data = read_compressed(infile_path)
+        is_read = data is not None
         # pre-process file (get symbol names)
-        infile = open(infile_path, 'r')
-        while True:
-            line_original = infile.readline()
-            if line_original:
-                line_original = line_original.strip("\n").strip("\r")
-                self.lines.append(line_original)
+        if encoding is None:
+            encoding = locale.getpreferredencoding(False)
+            if is_read:
+                bom = data[:len(codecs.BOM_UTF8)]
             else:
-                # no more lines in file
-                break
-        infile.close()
+                infile = open(infile_path, 'rb')
+                bom = infile.read(len(codecs.BOM_UTF8))
+                infile.close()
+            if bom == codecs.BOM_UTF8:
+                encoding = "utf-8"
+        self.encoding = encoding
+        if ((not is_read) and (self.mmap_min_size is not None)
+                and (os.path.getsize(infile_path) >= self.mmap_min_size)):
+            # Decode lines only as they are used (see mappedlines.py).
+            # The file is not pre-lexed even if prelex_enable is True,
+            # since prelex_data needs work arrays several times the
+            # size of the file, so lines are scanned the slow way.
+            mapped_lines = PCTMappedLines.from_path(infile_path,
+                                                    encoding=encoding)
+            if can_prelex(mapped_lines.get_loaded_data(), encoding):
+                self.lines = mapped_lines
+                data = mapped_lines.get_loaded_data()
+            else:
+                # Lines can't be found by byte (see can_prelex).
+                mapped_lines.close()
+        elif self.prelex_enable:
+            if not is_read:
+                infile = open(infile_path, 'rb')
+                data = infile.read()
+                infile.close()
+                is_read = True
+            if can_prelex(data, encoding):
+                self.lex = prelex_data(data)
+                self.lines = self.lex.get_lines(data, encoding=encoding)
+        if (self.lex is None) and not isinstance(self.lines,
+                                                 PCTMappedLines):
+            # Use readline (which also splits at "\r" alone).
+            if is_read:
+                infile = io.StringIO(data.decode(encoding), newline=None)
+                data = None
+            else:
+                infile = io.open(infile_path, 'r', encoding=encoding)
+            while True:
+                line_original = infile.readline()
+                if line_original:
+                    self.loaded_final_newline_enable = \
+                        line_original.endswith("\n")
+                    line_original = line_original.strip("\n").strip("\r")
+                    self.lines.append(line_original)
+                else:
+                    # no more lines in file
+                    break
+            infile.close()
+        if (data is not None) and (len(data) > 0):
+            self.loaded_final_newline_enable = \
+                data[len(data)-1:] in [b"\n", b"\r"]
+        if not isinstance(self.lines, PCTMappedLines):
+            self.loaded_lines = tuple(self.lines)
+        self.rule_families = None
+        if self.prefilter_enable:
+            if data is None:
+                data = u"\n".join(self.lines)
+            self.rule_families = get_rule_families(data, encoding=encoding)
+        self.line_map = PCTLineMap(len(self.lines))
+        self.loaded_changed = bytearray(len(self.lines))
+        self.identifier_index = None
+        self.preprocessed = set()
         self.pstat(str(len(self.lines)) + " line(s) detected")
         # with open (infile_path, "r") as myfile:
         #     self.data=myfile.read()
@@ -396,29 +848,390 @@ class PCTParser:
         #                + self.file_path + "').")
     # end load_file
 
+    def close_file(self):
+        """Release the memory map (if the file was mapped)."""
+        if isinstance(self.lines, PCTMappedLines):
+            self.lines.close()
+
+    def insert_lines(self, line_index, new_lines):
+        """
+        Insert new_lines before line_index (or append if line_index is
+        len(self.lines)).
+        """
+        self.lines[line_index:line_index] = new_lines
+        self.line_map.insert(line_index, len(new_lines))
+
+    def set_line(self, line_index, line):
+        self.lines[line_index] = line
+        loaded_index = self.line_map.get_loaded_index(line_index)
+        if loaded_index > -1:
+            self.loaded_changed[loaded_index] = 1
+
+    def get_loaded_line(self, loaded_index):
+        """Get a line as it was before any changes were made."""
+        if self.loaded_lines is None:
+            return self.lines.get_loaded_line(loaded_index)
+        return self.loaded_lines[loaded_index]
+
+    def get_loaded_count(self):
+        if self.loaded_lines is None:
+            return self.lines.get_loaded_count()
+        return len(self.loaded_lines)
+
+    def add_sw_object(self, name, class_name, method_name):
+        """
+        Track a StreamWriter object in the scope where it is assigned
+        (or in the class if it is a "self." member).
+        """
+        self.sw_object_strings.append(name)
+        if name.startswith("self."):
+            method_name = None
+        key = (class_name, method_name)
+        names = self.sw_object_scopes.get(key)
+        if names is None:
+            names = list()
+            self.sw_object_scopes[key] = names
+        if name not in names:
+            names.append(name)
+            self._sw_matchers = {}  # the set changed
+
+    def get_sw_matcher(self, class_name, method_name, param_names=None):
+        """
+        Get a PCTMultiMatcher for the WriteLine calls of the StreamWriter
+        objects visible in the scope (global, class and method).
+
+        Keyword arguments:
+        param_names -- Provide the method's parameters. Any with the
+                       same name as a tracked StreamWriter object are
+                       assumed to be one (passed by the caller).
+        """
+        key = (class_name, method_name)
+        matcher = self._sw_matchers.get(key)
+        if matcher is None:
+            keys = [(None, None)]
+            if class_name is not None:
+                keys.append((class_name, None))
+            if method_name is not None:
+                keys.append(key)
+            words = list()
+            for scope_key in keys:
+                for name in self.sw_object_scopes.get(scope_key, []):
+                    word = name + sw_writeline_suffix
+                    if word not in words:
+                        words.append(word)
+            if param_names is not None:
+                for name in param_names:
+                    word = name + sw_writeline_suffix
+                    if (name in self.sw_object_strings) and (word not in words):
+                        words.append(word)
+            matcher = PCTMultiMatcher(words)
+            self._sw_matchers[key] = matcher
+        return matcher
+
+    def find_identifier_uses(self, name):
+        """
+        Get the (lineN, column) of each use of the identifier name in
+        the loaded file (not in quotes nor comments), in order (see
+        get_identifier_index).
+        """
+        return self.get_identifier_index().find(name)
+
+    def get_member_renames(self, names=None, other_classes=None):
+        """
+        Get a tuple (renames, conflicts) for the members (declared in
+        the loaded file) that the converter prefixed with "_" (see
+        get_member_renames in memberrename.py). Set member_renames to
+        renames to rename them when only this file is rewritten (see
+        rename_members_in_files to rename members of several files).
+
+        Keyword arguments:
+        other_classes -- Provide a dict of class fqname to summary for
+                         the classes in other files, which are not
+                         rewritten, so their names are checked for
+                         conflicts too (default: those in
+                         project_index, if any).
+        """
+        if (other_classes is None) and (self.project_index is not None):
+            other_classes = {}
+            for fqname, class_summary in self.project_index.classes.items():
+                if class_summary.get("path") != self.file_path:
+                    other_classes[fqname] = class_summary
+        return get_member_renames([self.get_symbol_summary()],
+                                  names=names,
+                                  other_classes=other_classes)
+
+    def get_symbol_summary(self):
+        """
+        Get a compact summary of the symbols declared in the file, made
+        of only dicts, lists and strings so it can be sent between
+        processes (see merge_summaries in project.py):
+        {"path": file_path,
+         "classes": {class fqname: {"bases": [names],
+                                    "members": {name: type name},
+                                    "methods": [names]}},
+         "functions": [module-level function names],
+         "globals": {name: type name}}
+        """
+        self.preprocess(["symbols"])
+        classes = {}
+        for scope in self.scope_tree.walk():
+            if scope.kind != "class":
+                continue
+            members = {}
+            for name, symbol in scope.symbols.items():
+                members[name] = get_type_name(symbol.type_identifier)
+            classes[scope.get_fully_qualified_name()] = {
+                "bases": list(scope.base_names),
+                "members": members,
+                "methods": sorted([name for name, child
+                                   in scope.children.items()
+                                   if child.kind == "method"]),
+            }
+        global_symbols = {}
+        for name, symbol in self.scope_tree.symbols.items():
+            global_symbols[name] = get_type_name(symbol.type_identifier)
+        return {
+            "path": self.file_path,
+            "classes": classes,
+            "functions": sorted([name for name, child
+                                 in self.scope_tree.children.items()
+                                 if child.kind == "method"]),
+            "globals": global_symbols,
+        }
+
+    def find_inherited_member(self, class_scope, name):
+        """
+        Get the name of the member (name, or else _name) that the class
+        inherits from a base class declared in this file or else (if
+        project_index is set) in another file of the project, or None.
+        """
+        checked = set()
+        pending = list(class_scope.base_names)
+        while len(pending) > 0:
+            base_name = pending.pop(0)
+            if base_name in checked:
+                continue
+            checked.add(base_name)
+            base_scope = class_scope.find_visible_scope(base_name)
+            if (base_scope is not None) and (base_scope.kind == "class"):
+                symbol = base_scope.find_member(name)
+                if symbol is not None:
+                    return symbol.name
+                pending.extend(base_scope.base_names)
+            elif self.project_index is not None:
+                found = self.project_index.find_member(base_name, name)
+                if found is not None:
+                    return found[1]
+        return None
+
+    def get_call_graph(self):
+        """
+        Get a PCTCallGraph of the loaded file (see callgraph.py), such
+        as to find methods that are never called using
+        get_call_graph().get_unreachable(entry_points).
+        """
+        self.preprocess(["symbols"])
+        return PCTCallGraph(self.scope_tree, self.get_identifier_index(),
+                            self.get_loaded_line)
+
+    def is_rule_family_enabled(self, name):
+        """
+        Check whether the rewrite rules in the family (see
+        rule_family_tokens) can apply to the loaded file.
+        """
+        return (self.rule_families is None) or (name in self.rule_families)
+
+    def get_lex_index(self, line_index):
+        """
+        Get the index of the line in self.lex, or -1 if the line was
+        inserted or changed since it was loaded (or nothing was lexed).
+        """
+        if self.lex is None:
+            return -1
+        loaded_index = self.line_map.get_loaded_index(line_index)
+        if (loaded_index < 0) or self.loaded_changed[loaded_index]:
+            return -1
+        return loaded_index
+
+    def get_lex_flags(self, line_index, lex_index=None):
+        """
+        Get the LEX_* flags for the line, or None if the line was
+        inserted or changed since it was loaded.
+
+        Keyword arguments:
+        lex_index -- Provide the result of get_lex_index if known.
+        """
+        if lex_index is None:
+            lex_index = self.get_lex_index(line_index)
+        if lex_index < 0:
+            return None
+        return int(self.lex.flags[lex_index])
+
+    def get_comment_index(self, line_index):
+        """
+        Get the index of the first unquoted '#' in the line (using the
+        pre-lexed result if the line is known to be plain).
+        """
+        lex_index = self.get_lex_index(line_index)
+        line_flags = self.get_lex_flags(line_index, lex_index=lex_index)
+        if line_flags is not None:
+            if not (line_flags & LEX_HASH):
+                return -1
+            if not (line_flags & LEX_SPECIAL & ~LEX_HASH):
+                return int(self.lex.comment_indices[lex_index])
+        return find_unquoted_even_commented(self.lines[line_index],
+                                              "#")
+
+    def preprocess(self, facets=None):
+        """
+        Do the parts of preprocessing that are not done yet for the
+        loaded file, in one pass over the lines:
+        "symbols" -- Collect the classes, methods and symbols (and the
+                     scope tree), then infer types.
+        "duplicates" -- Comment out each method defined again with the
+                        same name in the same scope.
+        "exceptions" -- Change "except , :" to "except:" and add "pass"
+                        after an except or finally that has no body.
+        "header" -- Insert "import sys" and the dated convert_note
+                    (unless present).
+        Each operation calls this with what it needs (for example,
+        save_identifier_lists only needs "symbols").
+
+        Keyword arguments:
+        facets -- Choose from preprocess_facets (default: all).
+        """
+        if facets is None:
+            facets = preprocess_facets
+        for facet in facets:
+            if facet not in preprocess_facets:
+                raise ValueError("facet must be one of "
+                                 + str(preprocess_facets))
+        missing = [facet for facet in preprocess_facets
+                   if (facet in facets) and (facet not in self.preprocessed)]
+        if len(missing) < 1:
+            return
+        self.process_python_lines(self.parser_op_preprocess,
+                                  facets=missing)
+        self.preprocessed.update(missing)
+
+    def get_identifier_index(self):
+        """
+        Get the PCTIdentifierIndex of the lines as loaded (see
+        identindex.py), indexing them the first time.
+        """
+        if self.identifier_index is None:
+            # Index the lines as loaded (before any are changed or
+            # inserted) so positions are in the source file:
+            self.identifier_index = PCTIdentifierIndex()
+            self.identifier_index.add_lines(
+                self.get_loaded_line(loaded_index)
+                for loaded_index in range(self.get_loaded_count())
+            )
+        return self.identifier_index
+
     # formerly preprocess_python_framework_lines(self, infile_path)
-    def process_python_lines(self, parser_op):
+    def process_python_lines(self, parser_op, facets=None):
+        """
+        Keyword arguments:
+        facets -- Choose the parts of preprocessing to do (see
+                  preprocess; default: all) if parser_op is
+                  parser_op_preprocess.
+        """
+        outfiles = list()  # line sinks (see line_sink_names)
+        try:
+            self._process_python_lines(parser_op, facets, outfiles)
+        except BaseException:
+            # Don't leave a partial output (or its temporary file):
+            for outfile in outfiles:
+                outfile.abort()
+            raise
+
+    def _process_python_lines(self, parser_op, facets, outfiles):
+        """
+        Do process_python_lines, adding each line sink to outfiles as
+        it is opened.
+        """
         fUNC = find_unquoted_not_commented
         participle = None
         arraylist_name = None
         alNameN = None  # arraylist_name_line_counting_number
         enumerator_loop_indent = None
-        outfile = None
+        rewrite_enable = False
+        report = None  # counts for the "report" sink, if any
         print("")
         exn_indent = None
         exn_object_name = None
         exn_string = "traceback.format_exc()"
         exn_line_index = None
+        scope_tree = self.scope_tree
+        symbols_enable = False
+        duplicates_enable = False
+        exceptions_enable = False
+        header_enable = False
         if parser_op == self.parser_op_preprocess:
             participle = "preprocessing"
-            self.classes = list()
-            self.symbols = list()
-            self.functions = list()
-            self.custom_types = list()  # erase the custom types in
-            #                           # case this is not the first run
+            if facets is None:
+                facets = preprocess_facets
+            symbols_enable = "symbols" in facets
+            duplicates_enable = "duplicates" in facets
+            exceptions_enable = "exceptions" in facets
+            header_enable = "header" in facets
+            # Track scopes in a new tree even if not keeping it, so an
+            # earlier pass doesn't make every method look redefined:
+            scope_tree = PCTScope("module")
+            if symbols_enable:
+                self.classes = list()
+                self.symbols = list()
+                self.functions = list()
+                self.custom_types = list()  # erase the custom types in
+                #                           # case this is not the first
+                #                           # run
+                self.sw_object_strings = list()
+                self.sw_object_scopes = {}
+                self._sw_matchers = {}
+                self.scope_tree = scope_tree
         elif parser_op == self.parser_op_remove_net_framework:
             participle = "removing net framework"
-            outfile = open(self.outfile_path, 'w')
+            rewrite_enable = True
+            sinks = self._sinks
+            if sinks is None:
+                sinks = self.get_sinks()
+            self.source_map = PCTSourceMap(source_path=self.file_path,
+                                           output_path=self.outfile_path)
+            # Every line sink gets each line as it is rewritten:
+            for sink_name in line_sink_names:
+                sink_path = sinks.get(sink_name)
+                if sink_path is None:
+                    continue
+                if sink_name in diff_formats:
+                    outfiles.append(PCTDiffWriter(
+                        sink_path,
+                        self.get_loaded_line,
+                        self.get_loaded_count(),
+                        from_path=self.file_path,
+                        to_path=self.file_path,
+                        diff_format=sink_name,
+                        encoding=self.get_outfile_encoding(),
+                        atomic_enable=self.atomic_enable,
+                        from_final_newline_enable=(
+                            self.loaded_final_newline_enable
+                        )
+                    ))
+                else:
+                    outfiles.append(PCTOutputWriter(
+                        sink_path,
+                        encoding=self.get_outfile_encoding(),
+                        newline=self.newline,
+                        atomic_enable=self.atomic_enable
+                    ))
+            if sinks.get("report") is not None:
+                report = {
+                    "source": self.file_path,
+                    "loaded_line_count": self.get_loaded_count(),
+                    "line_count": 0,
+                    "inserted_count": 0,
+                    "changed_count": 0,
+                }
         else:
             participle = "during unknown parsing operation"
             self.pperr("  ERROR in process_python_lines:"
@@ -428,25 +1241,22 @@ class PCTParser:
         if participle is not None:
             self.pstat(""+participle+"...")
             line_index = 0
-            lineN = 1
-            class_indent_count = None
-            class_indent = None
-            class_members_indent = None
+            lineN = None
             def_string = "def "
-            class_name = None
+            if scope_tree is None:
+                scope_tree = PCTScope("module")
+                self.scope_tree = scope_tree
+            scope = scope_tree  # the innermost class or method
+            class_name = None  # the dotted name of the nearest class
             is_multiline_string = False
             mlD = "\"\"\""  # multiline_delimiter
             mlsName = None
             mlsN = None  # multiline_string_line_counting_number
             mlao = None  # multiline_assignment_operator
             method_name = None
+            method_param_names = list()
             is_method_bad = False
-            method_indent = None
-            extra_lines = 0
-
-            extra_lines_passed = 0
-            if parser_op == self.parser_op_preprocess:
-                self.extra_lines_cumulative = 0
+            if header_enable:
                 is_sys_imported = False
                 is_convert_note_prepended = False
                 convert_note_dated = (
@@ -455,9 +1265,8 @@ class PCTParser:
                 while line_index < len(self.lines):
                     line = self.lines[line_index]
                     line_strip = line.strip()
-                    line_comment_index = find_unquoted_MAY_BE_COMMENTED(
-                        line,
-                        "#"
+                    line_comment_index = self.get_comment_index(
+                        line_index
                     )
                     line_nocomment = line
                     if line_comment_index > -1:
@@ -475,34 +1284,47 @@ class PCTParser:
                 line_index = 0
                 if not is_sys_imported:
                     # put on SECOND line to avoid messing up the BOM:
-                    if len(self.lines) > 1:
-                        self.lines = ([self.lines[0]] + ["import sys"]
-                                      + self.lines[1:])
-                        extra_lines += 1
-                    else:
-                        self.lines = [self.lines[0]] + ["import sys"]
-                        extra_lines += 1
+                    self.insert_lines(1, ["import sys"])
                 if not is_convert_note_prepended:
                     # put on SECOND line to avoid messing up the BOM:
-                    if (len(self.lines) > 1):
-                        self.lines = ([self.lines[0]]
-                                      + [convert_note_dated]
-                                      + self.lines[1:])
-                        extra_lines += 1
-                    else:
-                        self.lines = ([self.lines[0]]
-                                      + [convert_note_dated])
-                        extra_lines += 1
+                    self.insert_lines(1, [convert_note_dated])
             sr_object = None
             sr_linevar_tmp = None
             sr_linevar = None
             sw_object = None
             one_indent = "    "
+            sr_enable = self.is_rule_family_enabled("stream_reader")
+            sw_enable = self.is_rule_family_enabled("stream_writer")
+            exn_enable = self.is_rule_family_enabled("exception")
+            cts_enable = self.is_rule_family_enabled("convert_tostring")
+            fwts_enable = self.is_rule_family_enabled("tostring")
+            fwss_enable = self.is_rule_family_enabled("substring")
+            console_enable = self.is_rule_family_enabled("console")
+            enumerator_enable = self.is_rule_family_enabled("enumerator")
+            member_renamer = None
+            member_lineNs = None  # loaded lines that use any old name
+            if ((parser_op == self.parser_op_remove_net_framework)
+                    and (self.member_renames is not None)
+                    and (len(self.member_renames) > 0)):
+                member_renamer = PCTMemberRenamer(self.member_renames)
+                member_lineNs = set()
+                for old_name in self.member_renames:
+                    for use_lineN, column in self.find_identifier_uses(old_name):
+                        member_lineNs.add(use_lineN)
             while line_index < len(self.lines):
                 # self.pstat(""+participle+" line "+str(lineN)+"...")
                 line_original = self.lines[line_index]
                 line = line_original
                 line_strip = line.strip()
+                previous_lineN = lineN
+                lineN = self.line_map.get_lineN(line_index)
+                lex_index = self.get_lex_index(line_index)
+                line_flags = self.get_lex_flags(line_index,
+                                                lex_index=lex_index)
+                fUNC = find_unquoted_not_commented
+                if (line_flags is not None) and not (line_flags & LEX_SPECIAL):
+                    # No quotes nor comments, so plain str.find is right.
+                    fUNC = find_in_plain
                 if not is_multiline_string:
                     if line_strip[:1] != "#":
                         mloi = line.find(mlD)
@@ -534,7 +1356,10 @@ class PCTParser:
                                 else:
                                     mlsName = None
                     class_opener = "class "
-                    indent_count = find_any_not(line, " \t")
+                    if line_flags is not None:
+                        indent_count = int(self.lex.indents[lex_index])
+                    else:
+                        indent_count = find_any_not(line, " \t")
                     indent = None
                     if (not is_multiline_string) and (line_strip[:1] != "#"):
                         if indent_count < 0:
@@ -542,35 +1367,35 @@ class PCTParser:
                             indent = ""
                         else:
                             indent = line[0:indent_count]
-                        if method_indent is not None:
-                            if (len(line.strip()) > 0) and (len(indent) <= len(method_indent)):
-                                method_name = None
-                                method_indent = None
+                        if len(line_strip) > 0:
+                            # End each class and method (or function)
+                            # that the line is not indented under.
+                            while (scope.indent is not None) and (len(indent) <= len(scope.indent)):  # if equal, then is a sibling (such as a variable, class, or method)
+                                if scope.kind == "class":
+                                    self.pstat("line "+str(lineN)+": -->ended class "+scope.get_fully_qualified_name()+" (near '"+line+"')")
+                                scope.last_lineN = previous_lineN
+                                scope = scope.parent
+                                class_name = scope.get_class_name()
+                                method_name = scope.get_method_name()
+                                method_param_names = scope.param_names
                                 is_method_bad = False
-                            # else:
-                            #     if method_member_indent is None:
-                            #         method_member_indent = indent
                         if is_method_bad:
+                            # Skip the line like a comment (and comment
+                            # it out if fixing duplicates).
                             line = "#" + line
-                            self.lines[line_index] = line
+                            if duplicates_enable:
+                                self.set_line(line_index, line)
                             line_strip = line.strip()
                     if (not is_multiline_string) and (line_strip[:1] != "#"):
                         # NOTE: This is not yet the command parsing--see
                         # below class and def identification for
                         # 'actual lines'.
-                        if class_indent is not None:
-                            if (len(line.strip()) > 0) and (len(indent) <= len(class_indent)):  # if equal, then is a global (such as variable, class, or global function)
-                                self.pstat("line "+str(lineN)+": -->ended class "+class_name+" (near '"+line+"')")
-                                class_indent = None
-                                class_members_indent = None
-                                class_name = None
-                                class_number = None
-                        if class_indent is not None:
-                            if class_members_indent is None:
+                        if scope.kind == "class":
+                            if scope.members_indent is None:
                                 if len(line_strip) > 0:
-                                    class_members_indent = indent
-                            if indent == class_members_indent:
-                                if line_strip[0:len(def_string)] != def_string:
+                                    scope.members_indent = indent
+                            if indent == scope.members_indent:
+                                if (line_strip[0:len(def_string)] != def_string) and (line_strip[0:len(class_opener)] != class_opener):
                                     ao = "="  # assignment_operator
                                     aoi = fUNC(line, ao)
                                     # ^ aoi: assignment_operator_index
@@ -581,13 +1406,14 @@ class PCTParser:
                                         rparm = line[aoi+len(ao):]
                                     if (lparm is not None) and (len(lparm) > 0) and (rparm is not None) and (len(rparm) > 0):
                                         type_string = self.get_python_first_explicit_type_id(rparm, lineN=lineN)
-                                        if parser_op == self.parser_op_preprocess:
+                                        if symbols_enable:
                                             # Even if type_string is
                                             # None (undeterminate), add
                                             # it.
                                             symbol = PCTSymbol(lparm, lineN, type_identifier=type_string)
                                             symbol.class_name = class_name
                                             symbol.default_value = rparm
+                                            scope.add_symbol(symbol)
                                             self.symbols.append(symbol)
                                     else:
 
@@ -605,31 +1431,33 @@ class PCTParser:
                                 if method_name_ender_index > (method_name_opener_index+len(def_string)):
                                     # if method_name_ender_index>):
                                     method_name = line[method_name_opener_index+len(def_string):method_name_ender_index]
-                                    method_indent = indent
+                                    method_fqname = scope.get_fully_qualified_name(method_name)
+                                    previous_scope = scope.children.get(method_name)
+                                    scope = scope.add_child("method", method_name, indent=indent, lineN=lineN)
+                                    method_params_ender_index = fUNC(line, ")", start=method_name_ender_index)
+                                    method_param_names = get_param_names(line[method_name_ender_index+1:method_params_ender_index])
+                                    scope.param_names = method_param_names
                                     method_number = -1
                                     if parser_op == self.parser_op_preprocess:
-                                        if class_name is not None:
-                                            method_number = self.get_function_number_using_dot_notation(class_name+"."+method_name)
-                                        else:
-                                            method_number = self.get_function_number_using_dot_notation(method_name)
-                                        if method_number < 0:
-                                            this_method = PCTMethod(method_name, lineN=lineN)
-                                            if class_name is not None:
-                                                this_method.class_name = class_name
-                                            self.functions.append(this_method)
-                                            method_number = len(self.functions) - 1
+                                        if (previous_scope is None) or (previous_scope.kind != "method"):
+                                            if symbols_enable:
+                                                this_method = PCTMethod(method_name, lineN=lineN)
+                                                if class_name is not None:
+                                                    this_method.class_name = class_name
+                                                this_method.scope = scope
+                                                self.functions.append(this_method)
+                                                method_number = len(self.functions) - 1
                                         else:
                                             is_method_bad = True
                                             line = "#" + line
-                                            self.lines[line_index] = line
-                                            self.pserr("line "+str(lineN)+": source WARNING: (automatically corrected) duplicate '"+method_name+"' method starting on line--commenting since redundant (you may need to fix this by hand if this overload has code you needed).")
-                                    else:
-                                        method_fqname = method_name
-                                        if (class_name is not None):
-                                            fqname = class_name+"."+method_name
-                                        method_number = self.get_function_number_using_dot_notation(fqname)
-                                        if method_number < 0:
-                                            self.pperr("line "+str(lineN)+": (parsing error "+participle+") no method number found for method named '"+fqname+"' (was not preprocessed correctly)")
+                                            if duplicates_enable:
+                                                self.set_line(line_index, line)
+                                                self.pserr("line "+str(lineN)+": source WARNING: (automatically corrected) duplicate '"+method_name+"' method starting on line--commenting since redundant (you may need to fix this by hand if this overload has code you needed).")
+                                    elif (previous_scope is None) or (previous_scope.kind != "method"):
+                                        # The rewrite reuses the scope
+                                        # tree from preprocessing, so
+                                        # every def is already in it.
+                                        self.pperr("line "+str(lineN)+": (parsing error "+participle+") no method scope found for method named '"+method_fqname+"' (was not preprocessed correctly)")
                                         # TODO: add functions to
                                         # self.custom_types[class_number
                                         # ].children instead?
@@ -657,10 +1485,9 @@ class PCTParser:
                                 class_name_index = find_any_not(line, " \t", start=class_opener_index+len(class_opener))
                             else:
                                 self.pperr("line "+str(lineN)+": (parsing error "+participle+") no  class_opener for class")
-                            if method_indent is not None:
+                            if scope.kind == "method":
                                 self.pserr("line "+str(lineN)+": (source ERROR "+participle+") unexpected classname in method (or function) def")
 
-                            class_indent = indent
                             class_ender = ":"
                             class_name_ender = "("
                             class_name_ender_index = fUNC(line, class_name_ender, start=class_name_index)
@@ -668,16 +1495,24 @@ class PCTParser:
                             if class_name_ender_index < 0:
                                 class_name_ender = ":"
                                 class_name_ender_index = fUNC(line, class_name_ender, start=class_name_index)
-                            class_name = None
                             if class_name_ender_index >= 0:
-                                class_name = line[class_name_index:class_name_ender_index].strip()
-                                if len(class_name) > 0:
-                                    if parser_op == self.parser_op_preprocess:
-                                        pctclass = PCTType(class_name)
+                                new_class_name = line[class_name_index:class_name_ender_index].strip()
+                                if len(new_class_name) > 0:
+                                    scope = scope.add_child("class", new_class_name, indent=indent, lineN=lineN)
+                                    if (class_name_ender == "(") and (class_ender_index > class_name_ender_index):
+                                        bases_ender_index = line.rfind(")", class_name_ender_index, class_ender_index)
+                                        if bases_ender_index > -1:
+                                            scope.base_names = get_param_names(line[class_name_ender_index+1:bases_ender_index])
+                                    class_name = scope.get_fully_qualified_name()
+                                    method_name = None
+                                    method_param_names = scope.param_names
+                                    if symbols_enable:
+                                        pctclass = PCTType(new_class_name)
+                                        pctclass.scope = scope
                                         self.custom_types.append(pctclass)
                                         class_number = len(self.custom_types) - 1
                                     else:
-                                        class_number = self.get_class_number(class_name)
+                                        class_number = self.get_class_number(new_class_name)
                                     if parser_op == self.parser_op_remove_net_framework:
                                         netobject_subclass_marker = "(object)"
                                         if (class_name_ender == "(") and (len(line) >= (class_name_ender_index+len(netobject_subclass_marker))) and (line[class_name_ender_index:class_name_ender_index+len(netobject_subclass_marker)] == netobject_subclass_marker):
@@ -691,13 +1526,16 @@ class PCTParser:
                                 self.pserr("line "+str(lineN)+": (source ERROR "+participle+") expected  '"+class_ender+"' after '"+class_opener+"' and classname")
                         else:
                             # region actual processing of lines that are neither def nor class nor comment (put framework removal in parser_op_remove_net_framework case further down)
-                            ici = find_unquoted_MAY_BE_COMMENTED(line, "#")
+                            if fUNC is find_in_plain:
+                                ici = -1
+                            else:
+                                ici = find_unquoted_even_commented(line, "#")
                             nonspace_index = find_any_not(line, " \t")
                             if parser_op == self.parser_op_preprocess:
-                                if (line_strip == "except , :"):
+                                if exceptions_enable and (line_strip == "except , :"):
                                     line = indent + "except:"
-                                    self.lines[line_index] = line
-                                if (fUNC(line, "except ") > -1) or (fUNC(line, "except:") > -1) or (fUNC(line, "finally:") > -1):
+                                    self.set_line(line_index, line)
+                                if exceptions_enable and exn_enable and ((fUNC(line, "except ") > -1) or (fUNC(line, "except:") > -1) or (fUNC(line, "finally:") > -1)):
                                     next_line_indent = None
                                     except_string = "except"
                                     if (fUNC(line, "finally:") > -1):
@@ -707,18 +1545,17 @@ class PCTParser:
                                         next_line_indent = get_indent_string(self.lines[next_line_number])
                                     # self.pinfo("line "+str(lineN)+": CHECKING FOR DANGLING EXCEPTION OPENER...")
                                     if (next_line_number < 0) or (len(next_line_indent) <= len(indent)):
-                                        if line_index+1 < len(self.lines):
-                                            self.lines.insert(line_index+1, indent+one_indent+"pass")
-                                            extra_lines += 1
-                                        elif line_index+1 == len(self.lines):
-                                            self.lines.append(indent+one_indent+"pass")
-                                            extra_lines += 1
+                                        if line_index+1 <= len(self.lines):
+                                            self.insert_lines(line_index+1, [indent+one_indent+"pass"])
                                         self.pserr("line "+str(lineN)+": (WARNING: source error automatically corrected) expected indent after '"+except_string+"' so adding 'pass'")
                                 # if method_name is not None:
                                 # class_name_thendot = ""
                                 # if class_name is not None:
                                 #     class_name_thendot = class_name + "."
-                                local_assn_op_index = fUNC(line, "=")
+                                local_assn_op_index = -1
+                                if symbols_enable and sw_enable:
+                                    # (only used to find StreamWriters)
+                                    local_assn_op_index = fUNC(line, "=")
                                 if local_assn_op_index > -1:
                                     identifier_last_index = find_any_not(line, " \t", start=local_assn_op_index-1, step=-1)
                                     # print("    local_assn_op_index-1:"+str(local_assn_op_index-1))
@@ -735,14 +1572,14 @@ class PCTParser:
                                                 # this_symbol.method_name = method_name
                                                 # this_symbol.class_name = class_name
                                                 if try_constructor == "StreamWriter":
-                                                    self.sw_object_strings.append(local_assn_op_left)
+                                                    self.add_sw_object(local_assn_op_left, class_name, method_name)
                                                     # input("line "+str(lineN)+": got NEW "+try_constructor+" '"+local_assn_op_left+"'--press enter")
                                             # else:
                                             #     input("line "+str(lineN)+": got new "+local_assn_op_right[:len(try_constructor_opener)]+" '"+local_assn_op_left+"'--press enter")
                                     # else:
                                     #    self.pserr("line "+str(lineN)+": (source ERROR) expected variable before '='")
                                     #    input("press enter...")
-                                if method_name == "__init__":
+                                if symbols_enable and (method_name == "__init__"):
                                     if class_name is not None:
                                         member_opener = "self."
                                         member_opener_index = fUNC(line, member_opener)
@@ -758,12 +1595,13 @@ class PCTParser:
                                                 this_member_variable = PCTSymbol(lparm[len(member_opener):], lineN, type_identifier=type_id)
                                                 this_member_variable.class_name = class_name
                                                 this_member_variable.value = rparm
+                                                scope.get_class_scope().add_symbol(this_member_variable)
                                                 self.symbols.append(this_member_variable)
                                             else:
                                                 self.pserr("line "+str(lineN)+": (source ERROR) expected '"+ao+"' then value after member '"+member_opener+"'")
                                     else:
                                         self.pinfo("line "+str(lineN)+": (source WARNING) __init__ outside of class, so not adding any constructor-specified members")
-                                elif (method_name is None) and (class_name is None):
+                                elif symbols_enable and (method_name is None) and (class_name is None):
                                     # global line
                                     # check for global variable
                                     ao = "="
@@ -777,6 +1615,7 @@ class PCTParser:
                                                 type_id = self.get_python_first_explicit_type_id(rparm, lineN)
                                                 this_member_variable = PCTSymbol(lparm[len(member_opener):], lineN, type_identifier=type_id)
                                                 this_member_variable.default_value = rparm
+                                                scope.add_symbol(this_member_variable)
                                                 self.symbols.append(this_member_variable)
                                         # else:
                                         #     changing value of a member of some object
@@ -835,8 +1674,7 @@ class PCTParser:
                                                 next_line_number = self.find_line_nonblank_noncomment(line_index+1)
                                                 if next_line_number > -1:
                                                     next_line_indent = get_indent_string(self.lines[next_line_number])
-                                                self.lines.insert(line_index+1, next_line_indent+sr_linevar+" = "+sr_linevar_tmp+".rstrip()")
-                                                extra_lines += 1
+                                                self.insert_lines(line_index+1, [next_line_indent+sr_linevar+" = "+sr_linevar_tmp+".rstrip()"])
                                             else:
                                                 line = line[0:sr_readline_index]+sr_object+".readline()"+line[sr_readline_index+len(sr_readline)]
 
@@ -853,12 +1691,12 @@ class PCTParser:
 
                                     sr_class = "StreamReader"
                                     sr_start = 0
-                                    while True:
+                                    while sr_enable:
                                         sr_class_index = find_identifier(line, sr_class)
                                         if sr_class_index > -1:
                                             nonspace_index = find_any_not(line, " \t", start=sr_class_index+len(sr_class))
                                             if (nonspace_index > -1) and (line[nonspace_index] == "("):
-                                                parenthetical_len = get_operation_chunk_len(line, start=nonspace_index, lineN=lineN)
+                                                parenthetical_len = get_operation_chunk_len(line, start=nonspace_index, line_n=lineN)
                                                 if parenthetical_len > 0:
                                                     line = line[:sr_class_index]+"open"+line[nonspace_index:nonspace_index+parenthetical_len-1]+", 'r')"
                                                     # input("found 'StreamReader and changed line to "+line+": press enter to continue")
@@ -883,13 +1721,20 @@ class PCTParser:
                                             break
 
                                     # if sw_object is not None:
-                                    for theoretical_sw_object in self.sw_object_strings:
-                                        sw_writeline = theoretical_sw_object+".WriteLine("
+                                    sw_matched_objects = list()
+                                    if line.find(sw_writeline_suffix) > -1:
+                                        sw_matcher = self.get_sw_matcher(class_name, method_name, method_param_names)
+                                        for sw_match_index, sw_writeline in sw_matcher.find_all(line):
+                                            theoretical_sw_object = sw_writeline[:-len(sw_writeline_suffix)]
+                                            if theoretical_sw_object not in sw_matched_objects:
+                                                sw_matched_objects.append(theoretical_sw_object)
+                                    for theoretical_sw_object in sw_matched_objects:
+                                        sw_writeline = theoretical_sw_object+sw_writeline_suffix
                                         sw_writeline_index = fUNC(line, sw_writeline)
                                         if sw_writeline_index > -1:
                                             # input("    DETECTED '"+sw_writeline+"' at "+str(sw_writeline_index)+" in '"+line+"'")
                                             sw_writeline_oparen_index = sw_writeline_index+len(sw_writeline)-1
-                                            sw_writeline_parenthetical_len = get_operation_chunk_len(line, start=sw_writeline_oparen_index, lineN=lineN)
+                                            sw_writeline_parenthetical_len = get_operation_chunk_len(line, start=sw_writeline_oparen_index, line_n=lineN)
                                             if (sw_writeline_parenthetical_len > 0) and (line[sw_writeline_oparen_index+sw_writeline_parenthetical_len-1] == ")"):
                                                 sw_params_index = sw_writeline_index+len(sw_writeline)
                                                 sw_params_ender_index = sw_writeline_oparen_index+sw_writeline_parenthetical_len-1
@@ -912,12 +1757,12 @@ class PCTParser:
 
                                     sw_class = "StreamWriter"
                                     sw_start = 0
-                                    while True:
+                                    while sw_enable:
                                         sw_class_index = find_identifier(line, sw_class)
                                         if sw_class_index > -1:
                                             nonspace_index = find_any_not(line, " \t", start=sw_class_index+len(sw_class))
                                             if (nonspace_index > -1) and (line[nonspace_index] == "("):
-                                                parenthetical_len = get_operation_chunk_len(line, start=nonspace_index, lineN=lineN)
+                                                parenthetical_len = get_operation_chunk_len(line, start=nonspace_index, line_n=lineN)
                                                 if parenthetical_len > 0:
                                                     line = line[:sw_class_index]+"open"+line[nonspace_index:nonspace_index+parenthetical_len-1]+", 'r')"
                                                     # input("found 'StreamReader and changed line to "+line+": press enter to continue")
@@ -977,7 +1822,7 @@ class PCTParser:
                                             line = line[:exn_string_call_index] + exn_string + line[exn_string_call_index+len(exn_string_call):]
                                             if fw_line != line:
                                                 self.pinfo("line "+str(lineN)+": (changing) using '"+exn_string+"' instead of '"+bad_string+"'")
-                                    else:
+                                    elif exn_enable:
                                         exn_opener_noname = "except:"
                                         exn_opener_noname_index = fUNC(line, exn_opener_noname)
                                         exn_opener = "except "
@@ -1014,7 +1859,7 @@ class PCTParser:
                                             exn_object_name = None
 
                                     start_index = 0
-                                    while True:
+                                    while cts_enable:
                                         cts = "Convert.ToString"
                                         # print("  line "+str(lineN)+","+str(start_index)+": looking for "+cts)
                                         cts_new = "str"
@@ -1029,140 +1874,33 @@ class PCTParser:
                                                 start_index = cts_index + len(cts)
                                         else:
                                             break
-                                    start_index = 0
-                                    while True:
-                                        fwts = "ToString"
-                                        fwts_index = fUNC(line, fwts, start=start_index)
-                                        if fwts_index > -1:
-                                            # print("  line "+str(lineN)+","+str(start_index)+": processing "+fwts+" at column "+str(fwts_index+1))  # +" in '"+line+"'")
-                                            dot_index = fwts_index - 1
-                                            if (dot_index == 0) or (line[dot_index:dot_index+1] == "."):
-                                                fwts_ender_index = fwts_index + len(fwts)
-                                                if (len(line) == fwts_ender_index) or (line[fwts_ender_index] not in identifier_chars):
-                                                    operand_lastchar_index = find_any_not(line, " \t", start=dot_index-1, step=-1)
-                                                    if operand_lastchar_index > -1:
-                                                        operand_ender_index = operand_lastchar_index + 1
-                                                        operand_len = get_operation_chunk_len(line, start=operand_lastchar_index, step=-1)
-                                                        operand_index = operand_ender_index-operand_len
-                                                        operand = line[operand_index:operand_ender_index]
-                                                        open_paren_index = fUNC(line, "(", start=fwts_index+len(fwts))
-                                                        if open_paren_index > -1:
-                                                            fwts_params_len = get_operation_chunk_len(line, start=open_paren_index)
-                                                            if fwts_params_len > 0:
-                                                                fwts_params = line[open_paren_index:open_paren_index+fwts_params_len]
-                                                                fw_line = line
-                                                                line = line[:operand_index]+"str("+operand+")"+line[open_paren_index+fwts_params_len:]
-                                                                if fwts_params != "()":
-                                                                    self.pinfo("")
-                                                                    self.pinfo("line "+str(lineN)+": (parser WARNING) changing conversion to str("+operand+") but pushing off '.ToString' params ('"+fwts_params+"'; length "+str(fwts_params_len)+") to comment.")
-                                                                    line += "  # "+fwts_params
-                                                                elif fw_line != line:
-                                                                    self.pinfo("line "+str(lineN)+": (changing) using 'str' function instead of '.ToString'")
-                                                            else:
-                                                                self.pserr("line "+str(lineN)+": (source ERROR) expected close parenthesis after ToString( at ["+str(fwts_index)+"]")
-                                                                start_index = ftws_index + len(fwts)
-                                                        else:
-                                                            self.pserr("line "+str(lineN)+": (source ERROR) expected open parenthesis after ToString( at ["+str(fwts_index)+"]")
-                                                            start_index = ftws_index + len(fwts)
-                                                    else:
-                                                        start_index = fwts_index + len(fwts)
-                                                else:
-                                                    start_index = fwts_index + len(fwts)
+                                    if fwts_enable:
+                                        line, fwts_changes, fwts_errors = tostring_to_str(line, fUNC=fUNC)
+                                        for operand, fwts_params in fwts_changes:
+                                            if fwts_params != "()":
+                                                self.pinfo("")
+                                                self.pinfo("line "+str(lineN)+": (parser WARNING) changing conversion to str("+operand+") but pushing off '.ToString' params ('"+fwts_params+"'; length "+str(len(fwts_params))+") to comment.")
+                                                fUNC = find_unquoted_not_commented
                                             else:
-                                                start_index = fwts_index + len(fwts)
-                                        else:
-                                            break
-                                    start_index = 0
-                                    while True:
+                                                self.pinfo("line "+str(lineN)+": (changing) using 'str' function instead of '.ToString'")
+                                        for fwts_index, fwts_error in fwts_errors:
+                                            self.pserr("line "+str(lineN)+": (source ERROR) "+fwts_error+" at ["+str(fwts_index)+"]")
+                                    if fwss_enable:
                                         fwss = "Substring"
-                                        # print("  line "+str(lineN)+","+str(start_index)+": looking for "+fwss)
-                                        fwss_index = fUNC(line, fwss, start_index)
-                                        if fwss_index >= 0:
-                                            dot_index = fwss_index - 1
-                                            if line[dot_index:dot_index+1] == ".":
-                                                oparen_index = fUNC(line, "(", fwss_index+len(fwss))
-                                                if oparen_index >= 0:
-                                                    cparen_index = fUNC(line, ")", oparen_index+1)
-                                                    if cparen_index >= 0:
-                                                        params = explode_unquoted(line[oparen_index+1:cparen_index], ",")
-                                                        parent_start_after_index = find_any_not(line[0:dot_index], identifier_chars, step=-1)
-                                                        if parent_start_after_index >= -1:
-                                                            parent_index = parent_start_after_index + 1
-                                                            parent_string = line[parent_index:dot_index]
-                                                            fwss_after_method = line[cparen_index+1:]
-                                                            print("    parent_index:"+str(parent_index))
-                                                            print("    parent_string:"+parent_string)
-                                                            print("    fwss_after_method:"+fwss_after_method)
-
-                                                            if len(params) > 1:
-                                                                line = line[0:parent_index]+parent_string+"["+params[0]+":"+params[0]+"+"+params[1]+"]"+fwss_after_method
-                                                            else:
-                                                                line = line[0:parent_index]+parent_string+"["+params[0]+":]"+fwss_after_method
-                                                            self.pinfo("line "+str(lineN)+","+str(fwss_index)+": (changing) using slices ('"+line+"') instead of Substring")
-                                                        else:
-
-                                                            self.pserr("line "+str(lineN)+": (source ERROR) expected classname before "+fwss+" at ["+str(fwss_index)+"]")
-                                                            break
-                                                    else:
-
-                                                        self.pserr("line "+str(lineN)+": (source ERROR) expected unquoted ')' after "+fwss+" at ["+str(fwss_index)+"]")
-                                                        break
-                                                else:
-
-                                                    self.pserr("line "+str(lineN)+": (source ERROR) expected '(' after "+fwss+" at ["+str(fwss_index)+"]")
-                                                    is_mega_debug = True
-                                                    oparen_index = fUNC(line, "(", fwss_index+len(fwss))
-                                                    is_mega_debug = False
-                                                    break
-                                            else:
-
-                                                self.pserr("line "+str(lineN)+": (source ERROR) expected '.' before "+fwss+" at ["+str(fwss_index)+"]")
-                                                break
-                                        else:
-                                            break
-                                    # end while has Substring subscripts
-
-                                    # TODO: should use print("", file=sys.stderr):
-                                    fw_line = line
-                                    line = line.replace("Console.Error.WriteLine()", "sys.stderr.write(\"\\n\")")
-                                    if fw_line != line:
-                                        self.pinfo("line "+str(lineN)+": (changing) using python sys.stderr.write \\n, flush instead of Console.Error.WriteLine()")
-                                        self.lines = self.lines[:line_index+1] + [indent+"sys.stderr.flush()"] + self.lines[line_index+1:]
-                                        extra_lines += 1
-
-                                    # TODO: should use print(x, file=sys.stderr):
-                                    fw_line = line
-                                    line = line.replace("Console.Error.WriteLine", "sys.stderr.write")
-                                    if fw_line != line:
-                                        self.pinfo("line "+str(lineN)+": (changing) using python sys.stderr.write, write \\n, flush instead of Console.Error.WriteLine")
-                                        self.lines = self.lines[:line_index+1] + [indent+"sys.stderr.write(\"\\n\")", indent+"sys.stderr.flush()"] + self.lines[line_index+1:]
-                                        extra_lines += 2
-
-                                    # TODO: should sys.stderr.write(str(x)):
-                                    fw_line = line
-                                    line = line.replace("Console.Error.Write", "sys.stderr.write")
-                                    if fw_line != line:
-                                        self.pinfo("line "+str(lineN)+": (changing) using python sys.stderr.write instead of Console.Error.Write")
-                                    fw_line = line
-                                    line = line.replace("Console.Error.Flush", "sys.stderr.flush")
-                                    if fw_line != line:
-                                        self.pinfo("line "+str(lineN)+": (changing) using python sys.stderr.flush instead of Console.Error.Flush")
-                                    fw_line = line
-                                    line = line.replace("Console.WriteLine()", "print(\"\")")
-                                    if fw_line != line:
-                                        self.pinfo("line "+str(lineN)+": (changing) using python print instead of Console.WriteLine")
-                                    line = line.replace("Console.WriteLine", "print")
-                                    if fw_line != line:
-                                        self.pinfo("line "+str(lineN)+": (changing) using python print instead of Console.WriteLine")
-                                    # TODO: should sys.stdout.write(str(x)):
-                                    fw_line = line
-                                    line = line.replace("Console.Write", "sys.stdout.write")
-                                    if fw_line != line:
-                                        self.pinfo("line "+str(lineN)+": (changing) using python sys.stdout.write instead of Console.Write")
-                                    fw_line = line
-                                    line = line.replace("Console.Out.Flush", "sys.stdout.flush")
-                                    if fw_line != line:
-                                        self.pinfo("line "+str(lineN)+": (changing) using python sys.stdout.flush instead of Console.Out.Flush")
+                                        line, fwss_indices, fwss_errors = substrings_to_slices(line)
+                                        for fwss_index in fwss_indices:
+                                            self.pinfo("line "+str(lineN)+","+str(fwss_index)+": (changing) using slices ('"+line+"') instead of "+fwss)
+                                        for fwss_index, fwss_error in fwss_errors:
+                                            self.pserr("line "+str(lineN)+": (source ERROR) "+fwss_error+" at ["+str(fwss_index)+"]")
+
+                                    if console_enable:
+                                        for console_call, console_new, console_after in console_replacements:
+                                            fw_line = line
+                                            line = line.replace(console_call, console_new)
+                                            if fw_line != line:
+                                                self.pinfo("line "+str(lineN)+": (changing) using python "+console_new+" instead of "+console_call)
+                                                if len(console_after) > 0:
+                                                    self.insert_lines(line_index+1, [indent+after_line for after_line in console_after])
                                     fw_line = line
                                     line = line.replace(" == None", " is None")
                                     if fw_line != line:
@@ -1189,72 +1927,81 @@ class PCTParser:
                                     # must be detected in reverse order,
                                     # to preserve None value when
                                     # previous line is not present
-                                    enumerable_name_prefix = "enumerator = "
-                                    enumerable_name_suffix = ".GetEnumerator()"
-                                    enumerator_loop = "while enumerator.MoveNext():"
-                                    enumerator_current = " = enumerator.Current"
-
-                                    enumerator_current_index = fUNC(line, enumerator_current)
-                                    if enumerator_current_index >= 0:
-                                        if enumerator_loop_indent is not None:
-                                            fqname = arraylist_name
-                                            self_identifier_then_dot = "self."
-                                            if (class_name is not None) and (fqname[:len(self_identifier_then_dot)] == self_identifier_then_dot):
-                                                fqname = class_name + "." + fqname[len(self_identifier_then_dot):]
-                                            # should already by fully qualified, else show error intentionally:
-                                            symbol_number = self.get_symbol_number_using_dot_notation(fqname)
-                                            if symbol_number < 0:
-                                                theoretical_name = fqname
-                                                if (class_name is not None) and (not (fqname.find(".") > -1)):
-                                                    theoretical_name = class_name+"._"+arraylist_name
-                                                symbol_number = self.get_symbol_number_using_dot_notation(theoretical_name)
-                                                if symbol_number < 0:
-
-                                                    self.pserr("line "+str(alNameN)+": (source ERROR) used '"+fqname+"' before declaration (tried to fix as [self a.k.a.]'"+theoretical_name+"').")
+                                    if enumerator_enable:
+                                        enumerable_name_prefix = "enumerator = "
+                                        enumerable_name_suffix = ".GetEnumerator()"
+                                        enumerator_loop = "while enumerator.MoveNext():"
+                                        enumerator_current = " = enumerator.Current"
+
+                                        enumerator_current_index = fUNC(line, enumerator_current)
+                                        if enumerator_current_index >= 0:
+                                            if enumerator_loop_indent is not None:
+                                                self_identifier_then_dot = "self."
+                                                class_scope = scope.get_class_scope()
+                                                member_name = None
+                                                if arraylist_name[:len(self_identifier_then_dot)] == self_identifier_then_dot:
+                                                    member_name = arraylist_name[len(self_identifier_then_dot):]
+                                                # self.x falls back to the member _x:
+                                                symbol = scope.resolve(arraylist_name)
+                                                if (symbol is None) and (class_scope is not None) and (not (arraylist_name.find(".") > -1)):
+                                                    # not a local nor global, so try it as a member
+                                                    member_name = arraylist_name
+                                                    symbol = class_scope.find_member(member_name)
+                                                found_name = None
+                                                if symbol is not None:
+                                                    found_name = symbol.name
+                                                elif (class_scope is not None) and (member_name is not None):
+                                                    # declared in a base class (maybe in another file)
+                                                    found_name = self.find_inherited_member(class_scope, member_name)
+                                                if found_name is None:
+                                                    theoretical_name = arraylist_name
+                                                    if (class_scope is not None) and (member_name is not None):
+                                                        theoretical_name = class_scope.get_fully_qualified_name("_"+member_name)
+                                                    self.pserr("line "+str(alNameN)+": (source ERROR) used '"+arraylist_name+"' before declaration (tried to fix as [self a.k.a.]'"+theoretical_name+"').")
                                                     if class_name is not None:
                                                         print("    class:"+class_name)
                                                     if method_name is not None:
                                                         print("    method:"+method_name)
-                                                else:
-                                                    self.pserr("line "+str(lineN)+": (WARNING, source error automatically corrected) used '"+arraylist_name+"' before declaration so automatically changed to existing '"+"self._"+fqname+"'.")
-                                                    arraylist_name = "self._"+fqname
-                                            line = enumerator_loop_indent + "for " + line[0:enumerator_current_index].strip() + " in " + arraylist_name + ":"
-                                            arraylist_name = None
-                                            enumerator_loop_indent = None
-                                        else:
-
-                                            self.pserr("line "+str(lineN)+": (source ERROR) unexpected '"+enumerator_current+"' (since previous line is missing '"+enumerator_loop+"' or line before that is missing arraylist name which would have been preceded by '"+enumerable_name_prefix+"' notation) {line:"+line+"}.")
-                                    else:
-                                        if enumerator_loop_indent is not None:
-                                            self.pserr("line "+str(lineN)+": (source ERROR) expected '"+enumerator_current+"' since '"+enumerator_loop+"' was on previous line and arraylist ("+arraylist_name+") was on line before that.")
-
-                                        enumerator_loop_index = fUNC(line, enumerator_loop)
-                                        if enumerator_loop_index >= 0:
-                                            if arraylist_name is not None:
-                                                enumerator_loop_indent = line[0:enumerator_loop_index]
-                                                line = "#" + line
-                                                self.pinfo("line "+str(lineN)+": (changing) removing useless line '"+enumerator_loop+"' (using list iteration instead)")
-                                            else:
+                                                elif (member_name is not None) and (found_name != member_name):
+                                                    self.pserr("line "+str(lineN)+": (WARNING, source error automatically corrected) used '"+arraylist_name+"' before declaration so automatically changed to existing '"+self_identifier_then_dot+found_name+"'.")
+                                                    arraylist_name = self_identifier_then_dot + found_name
+                                                line = enumerator_loop_indent + "for " + line[0:enumerator_current_index].strip() + " in " + arraylist_name + ":"
+                                                arraylist_name = None
                                                 enumerator_loop_indent = None
-                                                self.pserr("line "+str(lineN)+": (source ERROR) unexpected '"+enumerator_loop+"' (since previous line is missing arraylist name which would have been preceded by '"+enumerable_name_prefix+"' notation).")
+                                            else:
+
+                                                self.pserr("line "+str(lineN)+": (source ERROR) unexpected '"+enumerator_current+"' (since previous line is missing '"+enumerator_loop+"' or line before that is missing arraylist name which would have been preceded by '"+enumerable_name_prefix+"' notation) {line:"+line+"}.")
                                         else:
-                                            enumerator_loop_indent = None
-                                            if arraylist_name is not None:
-                                                self.pserr("line "+str(lineN)+": (source ERROR) expected '"+enumerator_loop+"' since arraylist ("+arraylist_name+") was on previous line.")
-
-                                            enumerable_name_prefix_index = fUNC(line, enumerable_name_prefix)
-                                            if enumerable_name_prefix_index >= 0:
-                                                enumerable_name_suffix_index = fUNC(line, enumerable_name_suffix, start=enumerable_name_prefix_index+len(enumerable_name_prefix))
-                                                if enumerable_name_suffix_index >= 0:
-                                                    arraylist_name = line[enumerable_name_prefix_index+len(enumerable_name_prefix):enumerable_name_suffix_index]
-                                                    alNameN = lineN
-                                                    self.pstat("line "+str(lineN)+": detected arraylist--saved name as '"+arraylist_name+"'")
+                                            if enumerator_loop_indent is not None:
+                                                self.pserr("line "+str(lineN)+": (source ERROR) expected '"+enumerator_current+"' since '"+enumerator_loop+"' was on previous line and arraylist ("+arraylist_name+") was on line before that.")
+
+                                            enumerator_loop_index = fUNC(line, enumerator_loop)
+                                            if enumerator_loop_index >= 0:
+                                                if arraylist_name is not None:
+                                                    enumerator_loop_indent = line[0:enumerator_loop_index]
+                                                    line = "#" + line
+                                                    self.pinfo("line "+str(lineN)+": (changing) removing useless line '"+enumerator_loop+"' (using list iteration instead)")
                                                 else:
-                                                    self.pserr("line "+str(lineN)+": (source ERROR) expected '"+enumerable_name_suffix+"' after '"+enumerable_name_prefix+"'")
-                                                line = "#"+line
+                                                    enumerator_loop_indent = None
+                                                    self.pserr("line "+str(lineN)+": (source ERROR) unexpected '"+enumerator_loop+"' (since previous line is missing arraylist name which would have been preceded by '"+enumerable_name_prefix+"' notation).")
                                             else:
-                                                arraylist_name = None
-                                                alNameN = None
+                                                enumerator_loop_indent = None
+                                                if arraylist_name is not None:
+                                                    self.pserr("line "+str(lineN)+": (source ERROR) expected '"+enumerator_loop+"' since arraylist ("+arraylist_name+") was on previous line.")
+
+                                                enumerable_name_prefix_index = fUNC(line, enumerable_name_prefix)
+                                                if enumerable_name_prefix_index >= 0:
+                                                    enumerable_name_suffix_index = fUNC(line, enumerable_name_suffix, start=enumerable_name_prefix_index+len(enumerable_name_prefix))
+                                                    if enumerable_name_suffix_index >= 0:
+                                                        arraylist_name = line[enumerable_name_prefix_index+len(enumerable_name_prefix):enumerable_name_suffix_index]
+                                                        alNameN = lineN
+                                                        self.pstat("line "+str(lineN)+": detected arraylist--saved name as '"+arraylist_name+"'")
+                                                    else:
+                                                        self.pserr("line "+str(lineN)+": (source ERROR) expected '"+enumerable_name_suffix+"' after '"+enumerable_name_prefix+"'")
+                                                    line = "#"+line
+                                                else:
+                                                    arraylist_name = None
+                                                    alNameN = None
                                     # end framework_to_standard_python
                                     # (pasted from
                                     # framework_to_standard_python
@@ -1264,6 +2011,16 @@ class PCTParser:
                             # endregion actual processing of lines that
                             # are not def or class
                         # end else neither def nor class
+                        if member_renamer is not None:
+                            loaded_index = self.line_map.get_loaded_index(line_index)
+                            # Only lines that used an old name in the
+                            # loaded file, or were changed or inserted
+                            # (such as by the ArrayList fix), can need it.
+                            if (loaded_index < 0) or (line != line_original) or self.loaded_changed[loaded_index] or ((loaded_index + 1) in member_lineNs):
+                                is_member_line = (scope.kind == "class") and (indent == scope.members_indent)
+                                line, rename_count = member_renamer.rename_line(line, is_member_line=is_member_line)
+                                if rename_count > 0:
+                                    self.pinfo("line "+str(lineN)+": (changing) renaming "+str(rename_count)+" member(s) the converter prefixed with '_'")
                     # end if not comment (nor multiline string)
                 else:
                     # continue or end multiline string
@@ -1271,7 +2028,7 @@ class PCTParser:
                     if multiline_ender_index > -1:
                         is_multiline_string = False
                         if mlsName is not None:
-                            if parser_op == self.parser_op_preprocess:
+                            if symbols_enable:
                                 mlsv += line[:multiline_ender_index]
                                 symbol = PCTSymbol(
                                     mlsName,
@@ -1285,6 +2042,7 @@ class PCTParser:
                                     symbol.method_name = method_name
                                     if method_name == "__init__":
                                         symbol.default_value = mlsv
+                                scope.add_symbol(symbol)
                                 self.symbols.append(symbol)
                             # else: #TODO: track mlsv
                             # here if not preprocessing (get
@@ -1302,18 +2060,31 @@ class PCTParser:
                                            " multiline comment")
                     else:
                         mlsv += line
-                if outfile is not None:
-                    outfile.write(line+self.newline)
+                if rewrite_enable:
+                    loaded_index = self.line_map.get_loaded_index(
+                        line_index
+                    )
+                    if loaded_index < 0:
+                        self.source_map.append(inserted_marker)
+                    else:
+                        self.source_map.append(loaded_index + 1)
+                    for outfile in outfiles:
+                        if isinstance(outfile, PCTDiffWriter):
+                            outfile.write_line(line, loaded_index)
+                        else:
+                            outfile.write_line(line)
+                    if report is not None:
+                        report["line_count"] += 1
+                        if loaded_index < 0:
+                            report["inserted_count"] += 1
+                        elif line != self.get_loaded_line(loaded_index):
+                            report["changed_count"] += 1
                 line_index += 1
-                lineN = line_index + 1 - self.extra_lines_cumulative
-                if extra_lines > 0:
-                    self.extra_lines_cumulative += 1
-                    extra_lines_passed += 1
-                if extra_lines_passed >= extra_lines:
-                    extra_lines = 0
-                    extra_lines_passed = 0
 
             # end while lines
+            while scope.parent is not None:
+                scope.last_lineN = lineN
+                scope = scope.parent
             if sw_object is not None:
                 self.pserr(participle + ": source ended"
                                         " before '" + sw_object
@@ -1325,15 +2096,132 @@ class PCTParser:
                     msg += " starting on line " + str(mlsN)
                 msg += " ended"
                 self.pserr(msg)
-            if outfile is not None:
-                outfile.close()
+            if symbols_enable:
+                self.infer_symbol_types()
+            if rewrite_enable:
+                for outfile in outfiles:
+                    outfile.close()
+                self.save_other_sinks(sinks, report=report)
         # end if participle is not None (no valid operation detected)
     # end process_python_lines
 
-    def framework_to_standard_python(self, outfile_path):
+    def get_sinks(self, sinks=None):
+        """
+        Get the dict of sink name to path (see sink_names) that a
+        rewrite writes: outfile_path as output_format, outfile_path plus
+        source_map_suffix as "source_map" (if source_map_enable), then
+        any in sinks.
+        """
+        results = {}
+        if self.outfile_path is not None:
+            results[self.output_format] = self.outfile_path
+            if self.source_map_enable:
+                results["source_map"] = (self.outfile_path
+                                         + self.source_map_suffix)
+        if sinks is not None:
+            for sink_name, sink_path in sinks.items():
+                if sink_name not in sink_names:
+                    raise ValueError("sink name must be one of "
+                                     + str(sink_names))
+                results[sink_name] = sink_path
+        return results
+
+    def save_other_sinks(self, sinks, report=None):
+        """
+        Write the sinks that are not line sinks (see line_sink_names)
+        once the lines are rewritten, from what the rewrite collected
+        (no lines are traversed again).
+
+        Keyword arguments:
+        report -- Provide the counts made while rewriting (required if
+                  sinks has "report").
+        """
+        encoding = self.get_outfile_encoding()
+        sink_path = sinks.get("source_map")
+        if sink_path is not None:
+            self.source_map.save(sink_path, encoding=encoding)
+        sink_path = sinks.get("identifiers")
+        if sink_path is not None:
+            with PCTOutputWriter(sink_path, encoding=encoding,
+                                 newline=self.newline,
+                                 atomic_enable=self.atomic_enable) as outfile:
+                outfile.write_lines(self.get_identifier_lines())
+        sink_path = sinks.get("report")
+        if sink_path is not None:
+            report = dict(report)
+            report["deleted_count"] = (report["loaded_line_count"]
+                                       - report["line_count"]
+                                       + report["inserted_count"])
+            report["outputs"] = {}
+            for sink_name, other_path in sinks.items():
+                if hasattr(other_path, "write"):
+                    other_path = None  # a stream has no path
+                report["outputs"][sink_name] = other_path
+            report["messages"] = list()
+            if self._messages is not None:
+                report["messages"] = list(self._messages)
+            outfile = PCTOutputWriter(sink_path, encoding=encoding,
+                                      atomic_enable=self.atomic_enable)
+            outfile.write_line(json.dumps(report, sort_keys=True))
+            outfile.close()
+
+    def framework_to_standard_python(self, outfile_path, encoding=None,
+                                     atomic_enable=None,
+                                     output_format=None,
+                                     source_map_enable=None,
+                                     sinks=None):
+        """
+        Keyword arguments:
+        encoding -- Set the output encoding (default: outfile_encoding
+                    or else the encoding of the loaded file).
+        atomic_enable -- Only replace outfile_path once the whole file
+                         is written (default: self.atomic_enable).
+        output_format -- Write "code" (the whole rewritten file), or
+                         only the changes as "unified" (a unified diff)
+                         or "json" (an edit list; see diffwriter.py).
+                         The default is self.output_format.
+        source_map_enable -- Also write the source map (see
+                             sourcemap.py) to outfile_path plus
+                             self.source_map_suffix (default:
+                             self.source_map_enable). Either way,
+                             self.source_map is set.
+        sinks -- Provide a dict of sink name (see sink_names) to path
+                 (or binary stream; see PCTOutputWriter) to write more
+                 outputs from the same pass over the lines: "code",
+                 "unified" and "json" (see output_format),
+                 "source_map", "identifiers" (see
+                 save_identifier_lists) and "report" (JSON with the
+                 line counts, edits counted by kind, and each
+                 diagnostic printed during this call). outfile_path
+                 can be None if sinks has any.
+        """
         global is_mega_debug
         self.outfile_path = outfile_path
-        self.process_python_lines(self.parser_op_remove_net_framework)
+        previous_encoding = self.outfile_encoding
+        previous_atomic_enable = self.atomic_enable
+        previous_output_format = self.output_format
+        previous_source_map_enable = self.source_map_enable
+        if encoding is not None:
+            self.outfile_encoding = encoding
+        if atomic_enable is not None:
+            self.atomic_enable = atomic_enable
+        if output_format is not None:
+            self.output_format = output_format
+        if source_map_enable is not None:
+            self.source_map_enable = source_map_enable
+        self._sinks = self.get_sinks(sinks)
+        if "report" in self._sinks:
+            self._messages = list()
+        try:
+            self.preprocess()  # the rewrite rules depend on every facet
+            self.process_python_lines(self.parser_op_remove_net_framework)
+        finally:
+            self._sinks = None
+            self._messages = None
+            self.outfile_encoding = previous_encoding
+            self.atomic_enable = previous_atomic_enable
+            self.output_format = previous_output_format
+            self.source_map_enable = previous_source_map_enable
 
     def collect_python_identifiers(self, index,
                                    assignment_operator_list):
@@ -1342,12 +2230,17 @@ class PCTParser:
         (only works for triple-double quote syntax so far) and
         formerly called:
         'def split_assignment_line(index, assignment_operator_list):'
+
+        The rest of the result is each operand on the right side of the
+        assignment operator (see expression.py), or the result is None
+        if the line at index is not an assignment.
         """
         fUNC = find_unquoted_not_commented
         fUNCNP = find_unquoted_not_commented_not_parenthetical
         result = None
-        if index < len(lines):
-            line = lines[index]
+        if index < len(self.lines):
+            lineN = self.line_map.get_lineN(index)
+            line = self.lines[index]
             # assign_op = " = "
             # aoi = self.fUNC(assign_op)
             assign_op = None
@@ -1371,48 +2264,28 @@ class PCTParser:
                 if strip_assign_op_index > 0:
                     assign_left = line[0:aoi].strip()
                     assign_right = line[aoi+len(assign_op):].strip()
-                    tmpRParm = assign_right
-                    rparmParts = list()
-                    any_delimiter = True
-                    while any_delimiter:
-                        any_delimiter = False
-                        delimiter_index = -1
-                        arithmetic_operator = None
-                        for oSetI in range(0, len(self.operator_sets)):
-                            oList = self.operator_sets[oSetI]
-                            for operator_number in range(0, len(oList)):
-                                op = oList[operator_number]
-                                oi = fUNC(tmpRParm, op)
-                                if delimiter_index >= 0:
-                                    operand = tmpRParm[0:oi].strip()
-                                    tmpRParm = tmpRParm[oi+len(op):]
-                                    if len(operand) > 0:
-                                        rparmParts.append(
-                                            operand
-                                        )
-                                        self.pstat(
-                                            "  found operand: "
-                                            + operand
-                                        )
-                                    break
-                                else:
-                                    arithmetic_operator = None
-                        if delimiter_index >= 0:
-                            any_delimiter = True
-                    # append last part of it (after last
-                    # non-parenthetical op or if no
-                    # non-parenthetical op)
-                    rparmParts.append(tmpRParm.strip())
+                    assign_right_index = line.find(assign_right,
+                                                   aoi+len(assign_op))
+                    expression = self.expression_parser.parse(assign_right)
+                    for error_index, error in self.expression_parser.errors:
+                        self.pserr("line " + str(lineN) + ","
+                                   + str(assign_right_index+error_index)
+                                   + ": (source ERROR) " + error)
+                    rparmParts = expression.get_operands()
+                    for operand in rparmParts:
+                        self.pstat("  found operand: " + operand)
+                    result.append(1)
+                    result.extend(rparmParts)
                 elif strip_assign_op_index == 0:
 
                     self.pserr(
-                        "line " + str(line_index+1) + ": (source ERROR)"
+                        "line " + str(lineN) + ": (source ERROR)"
                         " unexpected assignment operator (expected"
                         " identifier first) at [" + str(aoi)
                         + "] (before identifier)"
                     )
                 else:
-                    self.pperr("line " + str(line_index+1)
+                    self.pperr("line " + str(lineN)
                                + ": (parsing error)"
                                " expected assignment"
                                " operator")
@@ -1440,85 +2313,63 @@ class PCTParser:
         """
         result = None
         rparm = rparm.strip()
-        sign = None
         staticmethod_opener = "staticmethod("
         if rparm[:len(staticmethod_opener)] == staticmethod_opener:
             result = "staticmethod"
 
         if result is None:
-            number_string = rparm
-            if rparm[0:1] == "-":
-                number_string = rparm[1:]
-                sign = "-"
-            other_index = find_any_not(number_string, digit_chars)
-            delimiter = None
-            whole_number_string = number_string
-            decimal_string = None
-            if other_index >= 0:
-                other = number_string[other_index:other_index+1]
-                if other == ".":
-                    whole_number_string = number_string[0:other_index]
-                    decimal_string = number_string[other_index+1:]
-                    junk_index = find_any_not(decimal_string,
-                                              digit_chars)
-                    if junk_index < 0:
-                        result = "decimal"
-                    # TODO: make this recursive here (process operator
-                    # at junk_index and all others)
-                else:
-
-                    line_display_string = "near '" + rparm + "'"
-                    if lineN > 0:
-                        line_display_string = "on line "+str(lineN)
-                    if sign == "-":
-                        self.pserr("line " + str(lineN)
-                                   + ": (source ERROR)"
-                                   " expected only numbers"
-                                   " or '.' after '" + sign
-                                   + "'")
-                    # elif other_index > 0:
-                    #     # this error should only displayed if
-                    #     # recursion was done (such as to process
-                    #     # operators):
-                    #     self.pserr("  source error "
-                    #                + str(lineN)
-                    #                + ": only numbers or"
-                    #                " '.' should be after"
-                    #                " a numeric literal")
-                    # else not enough information
-                if (result is None) and (sign is None):
-                    string_type_prefixes = ["\"", "u'", "u\"", "b'",
-                                            "b\""]
-                    for stp in string_type_prefixes:
-                        if rparm[0:len(stp)] == stp:
-                            result = "string"
-                            break
+            kind = classify_literal(rparm)[0]
+            if kind is not None:
+                result = literal_type_names.get(kind)
+            elif rparm[:1] == "-":
+                self.pserr("line " + str(lineN)
+                           + ": (source ERROR)"
+                           " expected only numbers"
+                           " or '.' after '-'")
             else:
-                result = "int"
+                # Type an expression such as "a" + x or "x".format(y)
+                #   by the literal it starts with.
+                for stp in string_type_prefixes:
+                    if rparm[0:len(stp)] == stp:
+                        result = "string"
+                        break
 
         if result is None:
-            these_types = self.custom_types + self.builtin_types
-            for this_type in these_types:
-                this_type_name = this_type.name
-                type_index = fUNC(rparm, this_type_name+"(")
-                if type_index >= 0:
-                    result = this_type
-                    break
+            # Only the types added since the last call are indexed.
+            self.type_index.sync(self.custom_types, self.builtin_types)
+            result = self.type_index.find_constructed_type(rparm)
         return result
     # end get_python_first_explicit_type_id
 
+    def infer_symbol_types(self):
+        """
+        Set the type_identifier of symbols assigned from other symbols
+        or expressions where possible (see typeinfer.py).
+        """
+        self.type_index.sync(self.custom_types, self.builtin_types)
+        inference = PCTTypeInference(
+            self.symbols,
+            self.expression_parser,
+            self.type_index,
+            (self.comparison_operators + self.equality_operators
+             + self.identity_operators + self.membership_operators)
+        )
+        count = inference.run()
+        self.pstat("inferred the type of " + str(count) + " symbol(s)")
+        return count
+
     def get_function_number_using_dot_notation(self,
                                                fully_qualified_name):
         result = -1
         class_name = None
         method_name = fully_qualified_name
         dot_index = fully_qualified_name.find(".")
-        fqn = this_object.get_fully_qualified_name()
         if dot_index > 0:
             class_name = fully_qualified_name[0:dot_index]
             method_name = fully_qualified_name[dot_index+1:]
         for index in range(0, len(self.functions)):
             this_object = self.functions[index]
+            fqn = this_object.get_fully_qualified_name()
             if fully_qualified_name == this_object.name:
                 if this_object.name.find(".") >= 0:
                     self.pperr("  ERROR: function '"
@@ -1537,9 +2388,9 @@ class PCTParser:
     def get_symbol_number_using_dot_notation(self,
                                              fully_qualified_name):
         result = -1
-        fqn = this_object.get_fully_qualified_name()
         for index in range(0, len(self.symbols)):
             this_object = self.symbols[index]
+            fqn = this_object.get_fully_qualified_name()
             if fully_qualified_name == this_object.name:
                 if this_object.name.find(".") >= 0:
                     self.pperr("  ERROR: symbol '"
@@ -1564,8 +2415,11 @@ class PCTParser:
             line_original = self.lines[line_index]
             line = line_original
             line_strip = line.strip()
-            line_comment_index = find_unquoted_MAY_BE_COMMENTED(line,
-                                                                "#")
+            line_flags = self.get_lex_flags(line_index)
+            if (line_flags is not None) and (line_flags & LEX_BLANK):
+                line_index += 1
+                continue
+            line_comment_index = self.get_comment_index(line_index)
             line_nocomment = line
             if line_comment_index > -1:
                 line_nocomment = line[:line_comment_index]
@@ -1602,3 +2456,49 @@ class PCTParser:
     #                                  + self.equality_operators
     #                                  + self.assignment_operators)
     #     return split_assignment_line(index, assignment_operator_list)
+
+
+def rename_members_in_files(path_pairs, names=None, project_index=None):
+    """
+    Translate several files (see framework_to_standard_python) as one
+    batch, renaming the members that the converter prefixed with "_"
+    (see memberrename.py) in every file, including uses in files other
+    than the one that declares them. A member is not renamed anywhere
+    if renaming it would conflict with another name (see
+    get_member_renames in memberrename.py). Only the symbol summary of
+    each file is kept between the passes (each file is loaded again
+    to be rewritten), so the memory used does not grow with the size
+    of the batch.
+
+    Sequential arguments:
+    path_pairs -- Provide a list of (infile_path, outfile_path).
+
+    Keyword arguments:
+    names -- Only rename these members (each with or without the "_").
+    project_index -- Provide a PCTProjectIndex (see project.py) to
+                     check the names of classes in files outside of
+                     the batch (which are not renamed) too.
+
+    Returns a tuple (renames, conflicts) of what was used for every
+    file.
+    """
+    parser = PCTParser(project_index=project_index)
+    summaries = list()
+    infile_paths = set()
+    for infile_path, outfile_path in path_pairs:
+        parser.parse_path(infile_path)
+        summaries.append(parser.get_symbol_summary())
+        infile_paths.add(infile_path)
+    other_classes = None
+    if project_index is not None:
+        other_classes = {}
+        for fqname, class_summary in project_index.classes.items():
+            if class_summary.get("path") not in infile_paths:
+                other_classes[fqname] = class_summary
+    renames, conflicts = get_member_renames(summaries, names=names,
+                                            other_classes=other_classes)
+    for infile_path, outfile_path in path_pairs:
+        parser.parse_path(infile_path)
+        parser.member_renames = renames
+        parser.framework_to_standard_python(outfile_path)
+    return renames, conflicts
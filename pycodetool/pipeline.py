@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+usage:
+  pipeline.py <source folder> <destination folder>
+
+Translate many files (see framework_to_standard_python) so that disk
+I/O and conversion overlap instead of each file being read, converted
+and written before the next one is read (which leaves the CPU idle
+while waiting on slow storage such as a network share). There are
+three stages:
+- A reader thread reads the bytes of upcoming files (decompressing
+  them if compressed; see compression.py).
+- Worker processes load (decode) and convert the bytes using
+  PCTParser, then return the output as bytes.
+- A writer thread writes each output to its destination (compressed
+  if the destination has a suffix in compression_suffixes).
+The stages are connected by bounded queues, so a stage that gets ahead
+waits (backpressure) and at most about queue_size files per stage are
+in memory no matter how many files there are. Outputs are written in
+the order they finish, not in the order of the files.
+"""
+import io
+import os
+import sys
+import traceback
+from multiprocessing import Pool
+from threading import BoundedSemaphore
+from threading import Thread
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+from compression import get_compression
+from compression import open_compressed
+from parserpool import PCTParserPool
+from project import get_path_pairs
+
+_parser_pool = PCTParserPool()
+# ^ reused for each file in a worker, with the snapshot of the project
+#   index (see _init_worker)
+
+
+def _init_worker(project_index, quiet):
+    global _parser_pool
+    _parser_pool = PCTParserPool(project_index=project_index)
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+
+def _translate_data(path_pair, data):
+    """
+    Get (path_pair, output bytes, None) or, if the file could not be
+    converted, (path_pair, None, error).
+    """
+    try:
+        with _parser_pool.parser() as parser:
+            parser.parse_path(path_pair[0], data=data)
+            outfile = io.BytesIO()
+            parser.framework_to_standard_python(outfile,
+                                                source_map_enable=False)
+        return path_pair, outfile.getvalue(), None
+    except Exception:
+        return path_pair, None, traceback.format_exc()
+
+
+def _get_error_callback(path_pair, write_queue):
+    """
+    Get a function that puts (path_pair, None, error) for an exception
+    raised by a task outside of _translate_data (such as when its
+    result can't be pickled), so the task's slot is still released.
+    """
+    def error_callback(ex):
+        error = "".join(traceback.format_exception_only(type(ex), ex))
+        write_queue.put((path_pair, None, error))
+    return error_callback
+
+
+def _read_files(path_pairs, read_queue):
+    """Put (path_pair, bytes, error) for each file then None."""
+    try:
+        for path_pair in path_pairs:
+            data = None
+            error = None
+            try:
+                if get_compression(path_pair[0]) is not None:
+                    infile = open_compressed(path_pair[0], 'rb')
+                else:
+                    infile = open(path_pair[0], 'rb')
+                try:
+                    data = infile.read()
+                finally:
+                    infile.close()
+            except EnvironmentError as ex:
+                error = str(ex)
+            read_queue.put((path_pair, data, error))
+    finally:
+        read_queue.put(None)
+
+
+def _write_files(write_queue, slots, failures):
+    """
+    Write each (path_pair, bytes, error) until None, and add
+    (path_pair, error) to failures for each that has an error or could
+    not be written.
+    """
+    while True:
+        item = write_queue.get()
+        if item is None:
+            break
+        path_pair, data, error = item
+        if error is None:
+            try:
+                parent = os.path.dirname(path_pair[1])
+                if (len(parent) > 0) and not os.path.isdir(parent):
+                    os.makedirs(parent)
+                if get_compression(path_pair[1]) is not None:
+                    outfile = open_compressed(path_pair[1], 'wb')
+                else:
+                    outfile = open(path_pair[1], 'wb')
+                try:
+                    outfile.write(data)
+                finally:
+                    outfile.close()
+            except EnvironmentError as ex:
+                error = str(ex)
+        if error is not None:
+            failures.append((path_pair, error))
+        slots.release()
+
+
+def translate_pipelined(path_pairs, processes=None, queue_size=8,
+                        quiet=True, project_index=None):
+    """
+    Translate several files using the pipeline (see the module
+    docstring).
+
+    Sequential arguments:
+    path_pairs -- Provide a list of (infile_path, outfile_path) (see
+                  get_path_pairs in project.py).
+
+    Keyword arguments:
+    processes -- Set the number of worker processes (default: one per
+                 CPU). If 1, convert in this process (reading and
+                 writing still overlap with it).
+    queue_size -- Set how many files each queue holds before the stage
+                  that fills it waits, and how many files can be
+                  converting or waiting to be written at once.
+    quiet -- Discard the messages PCTParser prints for each file
+             (otherwise the output of workers is interleaved).
+    project_index -- Provide a PCTProjectIndex (see project.py) for the
+                     workers to use.
+
+    Returns a list of (path_pair, error) for each file that could not be
+    read, converted or written (the other files are still written).
+    """
+    global _parser_pool
+    if queue_size < 1:
+        raise ValueError("queue_size must be at least 1.")
+    path_pairs = list(path_pairs)
+    failures = list()
+    read_queue = Queue(maxsize=queue_size)
+    write_queue = Queue(maxsize=queue_size)
+    slots = BoundedSemaphore(queue_size)
+    # ^ held from when a file is sent to be converted until written, so
+    #   a worker result never waits on write_queue
+    reader = Thread(target=_read_files, args=(path_pairs, read_queue))
+    writer = Thread(target=_write_files,
+                    args=(write_queue, slots, failures))
+    reader.daemon = True
+    writer.daemon = True
+    reader.start()
+    writer.start()
+    pool = None
+    previous_pool = _parser_pool
+    previous_stdout = sys.stdout
+    if (processes == 1) or (len(path_pairs) < 2):
+        _init_worker(project_index, quiet)
+    else:
+        pool = Pool(processes=processes, initializer=_init_worker,
+                    initargs=(project_index, quiet))
+    try:
+        while True:
+            item = read_queue.get()
+            if item is None:
+                break
+            path_pair, data, error = item
+            slots.acquire()
+            if error is not None:
+                write_queue.put(item)
+            elif pool is None:
+                write_queue.put(_translate_data(path_pair, data))
+            else:
+                options = {"callback": write_queue.put}
+                if sys.version_info[0] >= 3:
+                    # ^ Python 2 has no error_callback (_translate_data
+                    #   still catches errors raised while converting).
+                    options["error_callback"] = _get_error_callback(
+                        path_pair,
+                        write_queue
+                    )
+                pool.apply_async(_translate_data, (path_pair, data),
+                                 **options)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        else:
+            if sys.stdout is not previous_stdout:
+                sys.stdout.close()
+                sys.stdout = previous_stdout
+            _parser_pool = previous_pool
+        write_queue.put(None)
+        writer.join()
+    reader.join()
+    return failures
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        return 1
+    path_pairs = get_path_pairs(sys.argv[1], sys.argv[2])
+    failures = translate_pipelined(path_pairs)
+    print("translated " + str(len(path_pairs) - len(failures))
+          + " of " + str(len(path_pairs)) + " file(s)")
+    for path_pair, error in failures:
+        print("  ERROR: '" + path_pair[0] + "' was not translated: "
+              + error.rstrip(), file=sys.stderr)
+    if len(failures) > 0:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
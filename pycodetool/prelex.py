@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Pre-lex a whole file at once: find the newline, quote, comment mark,
+backslash and bracket positions in bulk so that PCTParser can skip the
+character-by-character scanning (see parsing.py) for lines that
+contain none of them.
+
+NumPy is used if it is installed. Otherwise the pure-Python version
+produces the same PCTLexInfo.
+
+Lines are found by byte, so only use it if can_prelex is True (such as
+not for UTF-16, where byte 10 is not always a newline).
+"""
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LEX_BLANK = 1  # only spaces and/or tabs
+LEX_QUOTE = 2  # ' or "
+LEX_HASH = 4  # '#' (comment mark, unless it is quoted)
+LEX_BACKSLASH = 8
+LEX_BRACKET = 16  # ( ) [ ] { }
+LEX_NONASCII = 32  # byte offsets are not character offsets
+LEX_SPECIAL = LEX_QUOTE | LEX_HASH | LEX_BACKSLASH | LEX_NONASCII
+# ^ If any of these are set, the line must be scanned the slow way.
+
+lex_bracket_bytes = b"()[]{}"
+lone_cr_rx = re.compile(b"\r(?!\n)")
+
+
+class PCTLexInfo:
+    """
+    Hold per-line arrays (NumPy arrays or lists) for a loaded file.
+
+    members:
+    line_starts -- the byte offset where each line starts
+    line_ends -- the byte offset where each line ends, excluding the
+                 newline and a "\r" before it
+    indents -- the number of leading spaces and tabs (-1 if blank,
+               the same as find_any_not(line, " \t"))
+    comment_indices -- the offset of the first '#' in the line or -1
+                       (only a candidate if the line has LEX_QUOTE)
+    flags -- a combination of the LEX_* bits for each line
+    """
+    line_starts = None
+    line_ends = None
+    indents = None
+    comment_indices = None
+    flags = None
+    vectorized = None
+
+    def __init__(self, line_starts, line_ends, indents,
+                 comment_indices, flags, vectorized=False):
+        self.line_starts = line_starts
+        self.line_ends = line_ends
+        self.indents = indents
+        self.comment_indices = comment_indices
+        self.flags = flags
+        self.vectorized = vectorized
+
+    def __len__(self):
+        return len(self.flags)
+
+    def get_lines(self, data, encoding="utf-8"):
+        """
+        Decode every line (without the newline) from the same data
+        that was pre-lexed.
+        """
+        if not is_ascii_compatible(encoding):
+            raise ValueError("Lines can't be split by byte in "
+                             + encoding + " (see can_prelex).")
+        starts = self.line_starts
+        ends = self.line_ends
+        if self.vectorized:
+            starts = starts.tolist()
+            ends = ends.tolist()
+        return [data[starts[i]:ends[i]].decode(encoding)
+                for i in range(len(starts))]
+
+
+def is_ascii_compatible(encoding):
+    """
+    Check whether ASCII characters (such as the newline and "#") are
+    the same single bytes in the encoding (not so in UTF-16 or UTF-32).
+    """
+    return u"\n#".encode(encoding) == b"\n#"
+
+
+def can_prelex(data, encoding="utf-8"):
+    """
+    Check whether lines can be found in data by byte the same way
+    readline finds them in the decoded text: The encoding must be
+    ASCII-compatible and there must be no "\r" without "\n" after it
+    (a newline in old Mac files, which readline also splits at).
+
+    Sequential arguments:
+    data -- Provide bytes or any buffer such as an mmap.
+    """
+    if not is_ascii_compatible(encoding):
+        return False
+    return lone_cr_rx.search(data) is None
+
+
+def prelex_data(data, numpy_enable=True):
+    """
+    Sequential arguments:
+    data -- Provide the whole file as bytes (or any buffer such as an
+            mmap).
+
+    Keyword arguments:
+    numpy_enable -- Use NumPy if it is installed.
+    """
+    if numpy_enable and (np is not None):
+        return _prelex_data_numpy(data)
+    return _prelex_data_python(data)
+
+
+def _prelex_data_numpy(data):
+    buf = np.frombuffer(data, dtype=np.uint8)
+    size = len(buf)
+    newline_indices = np.flatnonzero(buf == 10)
+    starts = np.concatenate((np.zeros(1, dtype=np.int64),
+                             newline_indices + 1))
+    ends = np.concatenate((newline_indices,
+                           np.array([size], dtype=np.int64)))
+    if starts[-1] == size:
+        # Like readline, there is no line after the last newline.
+        starts = starts[:-1]
+        ends = ends[:-1]
+    line_count = len(starts)
+    if line_count > 0:
+        has_cr = ends > starts
+        has_cr[has_cr] = buf[ends[has_cr] - 1] == 13
+        ends = ends - has_cr
+    flags = np.zeros(line_count, dtype=np.uint8)
+    comment_indices = np.full(line_count, -1, dtype=np.int64)
+    indents = np.full(line_count, -1, dtype=np.int64)
+    if line_count < 1:
+        return PCTLexInfo(starts, ends, indents, comment_indices, flags,
+                          vectorized=True)
+
+    def lines_of(indices):
+        return np.searchsorted(starts, indices, side='right') - 1
+
+    def flag_lines(mask, flag):
+        indices = np.flatnonzero(mask)
+        if len(indices) > 0:
+            # Also catches a "\r" left before the newline, which is
+            # not part of the line but cannot be any of these anyway.
+            flags[lines_of(indices)] |= flag
+        return indices
+
+    flag_lines((buf == 34) | (buf == 39), LEX_QUOTE)
+    flag_lines(buf == 92, LEX_BACKSLASH)
+    flag_lines(np.isin(buf, np.frombuffer(lex_bracket_bytes,
+                                          dtype=np.uint8)),
+               LEX_BRACKET)
+    flag_lines(buf > 127, LEX_NONASCII)
+    hash_indices = flag_lines(buf == 35, LEX_HASH)
+    if len(hash_indices) > 0:
+        hash_lines = lines_of(hash_indices)
+        first_lines, first_positions = np.unique(hash_lines,
+                                                 return_index=True)
+        comment_indices[first_lines] = (hash_indices[first_positions]
+                                        - starts[first_lines])
+
+    nonspace_indices = np.flatnonzero((buf != 32) & (buf != 9))
+    candidates = np.searchsorted(nonspace_indices, starts)
+    in_range = candidates < len(nonspace_indices)
+    first_nonspace = np.full(line_count, size, dtype=np.int64)
+    first_nonspace[in_range] = nonspace_indices[candidates[in_range]]
+    is_blank = first_nonspace >= ends
+    indents[~is_blank] = (first_nonspace - starts)[~is_blank]
+    flags[is_blank] |= LEX_BLANK
+    return PCTLexInfo(starts, ends, indents, comment_indices, flags,
+                      vectorized=True)
+
+
+def _prelex_data_python(data):
+    data = bytes(data)
+    line_starts = list()
+    line_ends = list()
+    indents = list()
+    comment_indices = list()
+    flags = list()
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = size
+        next_start = end + 1
+        if (end > start) and (data[end-1:end] == b"\r"):
+            end -= 1
+        line = data[start:end]
+        line_flags = 0
+        if (b'"' in line) or (b"'" in line):
+            line_flags |= LEX_QUOTE
+        if b"\\" in line:
+            line_flags |= LEX_BACKSLASH
+        for bracket in lex_bracket_bytes:
+            if bracket in line:
+                line_flags |= LEX_BRACKET
+                break
+        try:
+            line.decode("ascii")
+        except UnicodeDecodeError:
+            line_flags |= LEX_NONASCII
+        comment_index = line.find(b"#")
+        if comment_index > -1:
+            line_flags |= LEX_HASH
+        indent_count = len(line) - len(line.lstrip(b" \t"))
+        if indent_count == len(line):
+            indent_count = -1
+            line_flags |= LEX_BLANK
+        line_starts.append(start)
+        line_ends.append(end)
+        indents.append(indent_count)
+        comment_indices.append(comment_index)
+        flags.append(line_flags)
+        start = next_start
+    return PCTLexInfo(line_starts, line_ends, indents, comment_indices,
+                      flags)
+
+
+def find_in_plain(haystack, needle, start=0, endbefore=-1, step=1,
+                  comment_delimiter="#"):
+    """
+    Do the same thing as find_unquoted_not_commented, but only for a
+    haystack already known to have no quotes, comment marks nor
+    backslashes (no LEX_SPECIAL flags), so str.find is enough.
+    """
+    if (haystack is None) or (needle is None) or (len(needle) < 1):
+        return -1
+    if start < 0:
+        start = 0
+    if (endbefore < 0) or (endbefore > len(haystack)):
+        endbefore = len(haystack)
+    if step < 0:
+        return haystack.rfind(needle, 0, endbefore)
+    return haystack.find(needle, start, endbefore)
+
+
+def find_present_tokens(data, tokens, encoding="utf-8"):
+    """
+    Get the set of tokens that occur anywhere in data, using one
+    whole-file search (at C speed) per token.
+
+    Sequential arguments:
+    data -- Provide the file as bytes, a buffer such as an mmap, or
+            text.
+    tokens -- Provide the strings to look for.
+
+    Keyword arguments:
+    encoding -- Set the encoding of data if it is not text. If the
+                encoding is not ASCII-compatible (such as UTF-16),
+                data is decoded before searching.
+    """
+    results = set()
+    if not isinstance(data, type(u"")):
+        if not is_ascii_compatible(encoding):
+            data = bytes(data).decode(encoding)
+    is_text = isinstance(data, type(u""))
+    for token in tokens:
+        needle = token
+        if not is_text:
+            needle = token.encode(encoding)
+        if data.find(needle) > -1:
+            results.add(token)
+    return results
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+usage:
+  project.py <source folder> <destination folder>
+
+Translate every .py file in a project (see framework_to_standard_python)
+so that classes and members declared in other files can be resolved
+(such as an ArrayList member inherited from a base class in another
+file, or the type of a member constructed from a class in another
+file). It works in two phases using a pool of processes:
+- map: Preprocess the files in parallel and get a compact summary of
+  the symbols in each (see PCTParser.get_symbol_summary).
+- reduce: Merge the summaries into one PCTProjectIndex.
+Then each file is rewritten in parallel by workers that each receive
+a read-only copy of the index once (not once per file). A file that
+can't be preprocessed or rewritten (such as one that can't be decoded)
+is reported as a failure and left out, and the other files are still
+translated.
+"""
+import os
+import sys
+import traceback
+from multiprocessing import Pool
+
+from analyze import find_python_files
+from parserpool import PCTParserPool
+
+_parser_pool = PCTParserPool()
+# ^ reused for each file in a worker, with the snapshot of the project
+#   index (see _init_worker)
+member_prefix = "_"
+
+
+class PCTProjectIndex:
+    """
+    Index the symbol summaries of every file in a project.
+
+    members:
+    classes -- a dict of class fqname to its summary (see
+               PCTParser.get_symbol_summary) plus "path"
+    class_names -- a dict of each class name (without the outer
+                   classes) to the list of fqnames that end with it
+    functions -- a dict of module-level function name to the list of
+                 paths that declare it
+    conflicts -- a list of (fqname, path) for each class that was
+                 declared again in another file (the first is kept)
+    """
+    classes = None
+    class_names = None
+    functions = None
+    conflicts = None
+
+    def __init__(self):
+        self.classes = {}
+        self.class_names = {}
+        self.functions = {}
+        self.conflicts = list()
+
+    def add_summary(self, summary):
+        path = summary["path"]
+        for fqname, class_summary in summary["classes"].items():
+            if fqname in self.classes:
+                self.conflicts.append((fqname, path))
+                continue
+            class_summary = dict(class_summary)
+            class_summary["path"] = path
+            self.classes[fqname] = class_summary
+            name = fqname.split(".")[-1]
+            self.class_names.setdefault(name, list()).append(fqname)
+        for name in summary["functions"]:
+            self.functions.setdefault(name, list()).append(path)
+
+    def get_class_names(self):
+        """Get the names of every class (without the outer classes)."""
+        return sorted(self.class_names.keys())
+
+    def find_class(self, name):
+        """
+        Get the fqname of the class that name (an fqname, or a name
+        that only one class has, optionally after a module name such as
+        in module.Class) refers to, or None.
+        """
+        if name in self.classes:
+            return name
+        fqnames = self.class_names.get(name.split(".")[-1])
+        if (fqnames is not None) and (len(fqnames) == 1):
+            return fqnames[0]
+        return None
+
+    def find_member(self, class_name, name):
+        """
+        Get (class fqname, member name) for the member name (or else
+        _name) of the class or the nearest base class that has it, or
+        None.
+        """
+        checked = set()
+        pending = [class_name]
+        while len(pending) > 0:
+            fqname = self.find_class(pending.pop(0))
+            if (fqname is None) or (fqname in checked):
+                continue
+            checked.add(fqname)
+            class_summary = self.classes[fqname]
+            members = class_summary["members"]
+            if name in members:
+                return fqname, name
+            if ((name[:1] != member_prefix)
+                    and ((member_prefix + name) in members)):
+                return fqname, member_prefix + name
+            pending.extend(class_summary["bases"])
+        return None
+
+
+def merge_summaries(summaries):
+    """Get a PCTProjectIndex of the summaries (the reduce phase)."""
+    result = PCTProjectIndex()
+    for summary in summaries:
+        result.add_summary(summary)
+    return result
+
+
+def summarize_path(path):
+    """Preprocess one file and get its summary (the map phase)."""
+    with _parser_pool.parser() as parser:
+        parser.parse_path(path)
+        return parser.get_symbol_summary()
+
+
+def _summarize(path):
+    """
+    Get (path, summary, None) or, if the file could not be
+    preprocessed, (path, None, error).
+    """
+    try:
+        return path, summarize_path(path), None
+    except Exception:
+        return path, None, traceback.format_exc()
+
+
+def _init_worker(project_index, quiet):
+    global _parser_pool
+    _parser_pool = PCTParserPool(project_index=project_index)
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+
+def _translate_pair(path_pair):
+    """
+    Get (path_pair, None) or, if the file could not be converted,
+    (path_pair, error).
+    """
+    try:
+        with _parser_pool.parser() as parser:
+            parser.parse_path(path_pair[0])
+            parser.framework_to_standard_python(path_pair[1])
+    except Exception:
+        return path_pair, traceback.format_exc()
+    return path_pair, None
+
+
+def get_path_pairs(source, destination):
+    """
+    Get (infile_path, outfile_path) for each .py file (or compressed
+    .py file; see find_python_files in analyze.py) under source,
+    keeping the same relative path under destination.
+    """
+    results = list()
+    for path in find_python_files(source):
+        relative_path = os.path.relpath(path, source)
+        if relative_path == ".":
+            relative_path = os.path.basename(path)
+        results.append((path, os.path.join(destination, relative_path)))
+    return results
+
+
+def _run(function, items, processes, chunksize, initargs):
+    """Yield function(item) for each item, in any order."""
+    global _parser_pool
+    if (processes == 1) or (len(items) < 2):
+        previous_pool = _parser_pool
+        previous_stdout = sys.stdout
+        _init_worker(*initargs)
+        try:
+            for item in items:
+                yield function(item)
+        finally:
+            if sys.stdout is not previous_stdout:
+                sys.stdout.close()
+                sys.stdout = previous_stdout
+            _parser_pool = previous_pool
+        return
+    pool = Pool(processes=processes, initializer=_init_worker,
+                initargs=initargs)
+    try:
+        for result in pool.imap_unordered(function, items, chunksize):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def translate_project(path_pairs, processes=None, chunksize=4,
+                      quiet=True):
+    """
+    Translate several files as one project (see the module docstring).
+
+    Sequential arguments:
+    path_pairs -- Provide a list of (infile_path, outfile_path) (see
+                  get_path_pairs).
+
+    Keyword arguments:
+    processes -- Set the number of worker processes (default: one per
+                 CPU). If 1, do not start any.
+    chunksize -- Set how many files to send to a worker at once.
+    quiet -- Discard the messages PCTParser prints for each file
+             (otherwise the output of workers is interleaved).
+
+    Returns (project_index, failures) where project_index is the
+    PCTProjectIndex that was used and failures is a list of
+    (path_pair, error) for each file that could not be preprocessed or
+    converted (a file that could not be preprocessed is not in the
+    index and is not converted).
+    """
+    path_pairs = list(path_pairs)
+    paths = [path_pair[0] for path_pair in path_pairs]
+    failures = list()
+    summaries = {}
+    errors = {}
+    for path, summary, error in _run(_summarize, paths, processes,
+                                     chunksize, (None, quiet)):
+        if error is not None:
+            errors[path] = error
+        else:
+            summaries[path] = summary
+    # Merge in the order of path_pairs so the same class wins each run.
+    project_index = merge_summaries([summaries[path] for path in paths
+                                     if path in summaries])
+    summarized_pairs = list()
+    for path_pair in path_pairs:
+        if path_pair[0] in errors:
+            failures.append((path_pair, errors[path_pair[0]]))
+            continue
+        summarized_pairs.append(path_pair)
+        parent = os.path.dirname(path_pair[1])
+        if (len(parent) > 0) and not os.path.isdir(parent):
+            os.makedirs(parent)
+    for path_pair, error in _run(_translate_pair, summarized_pairs,
+                                 processes, chunksize,
+                                 (project_index, quiet)):
+        if error is not None:
+            failures.append((path_pair, error))
+    return project_index, failures
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        return 1
+    path_pairs = get_path_pairs(sys.argv[1], sys.argv[2])
+    project_index, failures = translate_project(path_pairs)
+    print("translated " + str(len(path_pairs) - len(failures)) + " of "
+          + str(len(path_pairs)) + " file(s) declaring "
+          + str(len(project_index.classes)) + " class(es)")
+    for fqname, path in project_index.conflicts:
+        print("  WARNING: '" + fqname + "' in '" + path + "' was already"
+              " declared in '" + project_index.classes[fqname]["path"]
+              + "'")
+    for path_pair, error in failures:
+        print("  ERROR: '" + path_pair[0] + "' was not translated: "
+              + error.rstrip(), file=sys.stderr)
+    if len(failures) > 0:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
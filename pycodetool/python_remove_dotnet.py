@@ -26,9 +26,11 @@ if len(args) >= 2:
     if len(args) >= 3:
         print("  identifier list output file: "+arg[2])
     parser = pct.PCTParser(args[0])
-    parser.framework_to_standard_python(args[1])
+    sinks = None
     if len(args) >= 3:
-        parser.save_identifier_lists(args[2])
+        # Write the list from the same pass as the code:
+        sinks = {"identifiers": args[2]}
+    parser.framework_to_standard_python(args[1], sinks=sinks)
 else:
     print("")
     print("")
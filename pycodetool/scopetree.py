@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Represent the module, class and method (or function) scopes of a file
+as a tree, so that a name can be resolved by walking from a scope up
+through its parents (O(depth)) instead of searching every symbol.
+"""
+
+scope_kinds = ["module", "class", "method"]
+self_prefix = "self."
+
+
+class PCTScope:
+    """
+    A node of the scope tree.
+
+    members:
+    kind -- "module", "class" or "method" (including functions)
+    name -- the class or method name (None for the module)
+    parent -- the enclosing PCTScope (None for the module)
+    indent -- the indent of the class or def line (None for the
+              module)
+    members_indent -- the indent of the first line of the body
+    lineN -- the line counting number of the class or def line
+    last_lineN -- the line counting number of the last line in the
+                  body (set once the scope ends)
+    param_names -- for a method, the names of its parameters
+    base_names -- for a class, the names of its base classes as
+                  written (such as "object" or "module.Base")
+    children -- a dict of name to PCTScope for each class or method
+                defined directly in this scope
+    symbols -- a dict of name to the first PCTSymbol declared directly
+               in this scope (for a class, including self members
+               from __init__)
+    """
+    kind = None
+    name = None
+    parent = None
+    indent = None
+    members_indent = None
+    lineN = None
+    last_lineN = None
+    param_names = None
+    base_names = None
+    children = None
+    symbols = None
+    depth = None
+    _fqname = None  # such as Outer.Inner.method (None for the module)
+
+    def __init__(self, kind, name=None, parent=None, indent=None,
+                 lineN=None):
+        if kind not in scope_kinds:
+            raise ValueError("kind must be one of " + str(scope_kinds))
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.indent = indent
+        self.lineN = lineN
+        self.param_names = list()
+        self.base_names = list()
+        self.children = {}
+        self.symbols = {}
+        self.depth = 0
+        if parent is not None:
+            self.depth = parent.depth + 1
+            if parent._fqname is not None:
+                self._fqname = parent._fqname + "." + name
+            else:
+                self._fqname = name
+
+    def get_fully_qualified_name(self, name=None):
+        """
+        Get the dotted name of this scope, or of name in this scope if
+        name is not None (the prefix is built once, not per call).
+        """
+        if name is None:
+            return self._fqname
+        if self._fqname is None:
+            return name
+        return self._fqname + "." + name
+
+    def add_child(self, kind, name, indent=None, lineN=None):
+        """
+        Get the child scope with the name, adding it if it is not
+        present (so a second pass over the same lines reuses the tree)
+        or is a different kind.
+        """
+        child = self.children.get(name)
+        if (child is None) or (child.kind != kind):
+            child = PCTScope(kind, name=name, parent=self, indent=indent,
+                             lineN=lineN)
+            self.children[name] = child
+        else:
+            child.indent = indent
+            child.members_indent = None
+        return child
+
+    def add_symbol(self, symbol):
+        """
+        Set symbol.scope and add it unless a symbol with the same name
+        was already declared in this scope (the first one wins, the
+        same as searching the list of symbols in order).
+        """
+        symbol.scope = self
+        if symbol.name not in self.symbols:
+            self.symbols[symbol.name] = symbol
+
+    def get_class_scope(self):
+        """Get the nearest class scope including this one, or None."""
+        scope = self
+        while scope is not None:
+            if scope.kind == "class":
+                return scope
+            scope = scope.parent
+        return None
+
+    def get_class_name(self):
+        """Get the dotted name of the nearest class, or None."""
+        class_scope = self.get_class_scope()
+        if class_scope is None:
+            return None
+        return class_scope._fqname
+
+    def get_method_name(self):
+        """
+        Get the name of the method (or function) if this is a method
+        scope, otherwise None.
+        """
+        if self.kind == "method":
+            return self.name
+        return None
+
+    def get_module(self):
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope
+
+    def find_member(self, name):
+        """
+        Get the symbol declared directly in this scope as name, or else
+        as _name (the fallback used for ArrayList members), or None.
+        """
+        symbol = self.symbols.get(name)
+        if (symbol is None) and (name[:1] != "_"):
+            symbol = self.symbols.get("_" + name)
+        return symbol
+
+    def find_scope(self, fqname):
+        """
+        Get the scope with the dotted name (such as Outer.Inner)
+        relative to the module, or None.
+        """
+        scope = self.get_module()
+        for name in fqname.split("."):
+            scope = scope.children.get(name)
+            if scope is None:
+                return None
+        return scope
+
+    def resolve(self, name):
+        """
+        Get the symbol that name refers to from this scope, or None.
+        A plain name is looked up in this scope then each enclosing
+        method and the module (class bodies are skipped, as in Python,
+        unless the lookup starts there). "self.x" is looked up as
+        a member of the nearest class and "Class.x" as a member of the
+        class that the walk finds, both with the _x fallback (see
+        find_member).
+        """
+        if name.startswith(self_prefix):
+            member = name[len(self_prefix):]
+            if "." in member:
+                return None
+            class_scope = self.get_class_scope()
+            if class_scope is None:
+                return None
+            return class_scope.find_member(member)
+        dot_index = name.rfind(".")
+        if dot_index > -1:
+            owner = self.find_visible_scope(name[:dot_index])
+            if owner is None:
+                return None
+            return owner.find_member(name[dot_index+1:])
+        scope = self
+        while scope is not None:
+            if (scope is self) or (scope.kind != "class"):
+                symbol = scope.symbols.get(name)
+                if symbol is not None:
+                    return symbol
+            scope = scope.parent
+        return None
+
+    def find_visible_scope(self, dotted_name):
+        """
+        Get the scope that dotted_name (such as Outer.Inner) refers to
+        from this scope, or None.
+        """
+        names = dotted_name.split(".")
+        scope = self
+        owner = None
+        while scope is not None:
+            if scope.name == names[0]:
+                owner = scope
+                break
+            owner = scope.children.get(names[0])
+            if owner is not None:
+                break
+            scope = scope.parent
+        for name in names[1:]:
+            if owner is None:
+                break
+            owner = owner.children.get(name)
+        return owner
+
+    def walk(self):
+        """Get this scope and every descendant, depth-first."""
+        results = list()
+        stack = [self]
+        while len(stack) > 0:
+            scope = stack.pop()
+            results.append(scope)
+            stack.extend(reversed(list(scope.children.values())))
+        return results
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Change .NET Substring calls to Python slices in one left-to-right pass
+over a line:
+
+s.Substring(a) -> s[a:]
+s.Substring(a, b) -> s[a:a+ b]
+
+A bracket-pair table (built in the same scan that finds the calls)
+gives each call's closing parenthesis and top-level commas, so nested
+calls such as s.Substring(a.IndexOf(b), 2) and chained calls such as
+s.Substring(1).Substring(2) are handled in linear time.
+"""
+import re
+
+bracket_openers = "([{"
+bracket_closers = ")]}"
+substring_name = "Substring"
+_special_rx = re.compile(r"Substring(?!\w)|[()\[\]{}'\",#\\]")
+
+
+def get_bracket_pairs(line):
+    """
+    Scan the line once (skipping quoted text and stopping at a
+    comment).
+
+    Returns a tuple (pairs, commas, names) where:
+    pairs -- a dict of the index of each bracket opener to the index of
+             its closer (openers without a closer are left out)
+    commas -- a dict of the index of each bracket opener to a list of
+              the indices of commas directly inside that pair
+    names -- a list of the indices where substring_name occurs
+    """
+    pairs = {}
+    commas = {}
+    names = list()
+    stack = list()
+    in_quote = None
+    skip_index = -1
+    for match in _special_rx.finditer(line):
+        index = match.start()
+        if index == skip_index:
+            continue
+        c = line[index]
+        if in_quote is not None:
+            if c == "\\":
+                skip_index = index + 1
+            elif c == in_quote:
+                in_quote = None
+            continue
+        if c == "S":
+            names.append(index)
+        elif (c == "\"") or (c == "'"):
+            in_quote = c
+        elif c == "#":
+            break
+        elif c in bracket_openers:
+            stack.append(index)
+        elif c in bracket_closers:
+            opener = bracket_openers[bracket_closers.index(c)]
+            if (len(stack) > 0) and (line[stack[-1]] == opener):
+                pairs[stack.pop()] = index
+            # else an unmatched closer is ignored
+        elif c == ",":
+            if len(stack) > 0:
+                commas.setdefault(stack[-1], list()).append(index)
+    return pairs, commas, names
+
+
+def substrings_to_slices(line):
+    """
+    Sequential arguments:
+    line -- Provide a line of code.
+
+    Returns a tuple (line, changed_indices, errors) where
+    changed_indices lists the original index of each Substring that
+    was changed and errors is a list of (index, message) for each one
+    that could not be (and so was left as-is).
+    """
+    pairs, commas, names = get_bracket_pairs(line)
+    if len(names) < 1:
+        return line, list(), list()
+    changed_indices = list()
+    errors = list()
+    parts = list()
+    next_name = [0]  # shared by each level of render
+
+    def render(start, end):
+        """Append line[start:end] with its calls changed to parts."""
+        pos = start
+        while (next_name[0] < len(names)) and (names[next_name[0]] < end):
+            name_index = names[next_name[0]]
+            next_name[0] += 1
+            if name_index < pos:
+                continue
+            if line[name_index-1:name_index] != ".":
+                errors.append((name_index,
+                               "expected '.' before " + substring_name))
+                continue
+            oparen_index = name_index + len(substring_name)
+            while (oparen_index < end) and (line[oparen_index] in " \t"):
+                oparen_index += 1
+            if line[oparen_index:oparen_index+1] != "(":
+                errors.append((name_index,
+                               "expected '(' after " + substring_name))
+                continue
+            cparen_index = pairs.get(oparen_index)
+            if (cparen_index is None) or (cparen_index >= end):
+                errors.append((name_index, "expected unquoted ')' after "
+                               + substring_name))
+                continue
+            bounds = ([oparen_index]
+                      + commas.get(oparen_index, list())
+                      + [cparen_index])
+            if len(bounds) - 1 > 2:
+                errors.append((name_index, "expected at most 2 arguments"
+                               " for " + substring_name))
+                continue
+            is_param_missing = False
+            for param_i in range(len(bounds) - 1):
+                if len(line[bounds[param_i]+1:bounds[param_i+1]].strip()) < 1:
+                    is_param_missing = True
+            if is_param_missing:
+                errors.append((name_index, "expected an argument before"
+                               " each ',' or ')' for " + substring_name))
+                continue
+            parts.append(line[pos:name_index-1])
+            params = list()
+            for param_i in range(len(bounds) - 1):
+                params_mark = len(parts)
+                render(bounds[param_i] + 1, bounds[param_i+1])
+                params.append("".join(parts[params_mark:]))
+                del parts[params_mark:]
+            if len(params) > 1:
+                parts.append("[" + params[0] + ":" + params[0] + "+"
+                             + params[1] + "]")
+            else:
+                parts.append("[" + params[0] + ":]")
+            changed_indices.append(name_index)
+            pos = cparen_index + 1
+        parts.append(line[pos:end])
+
+    render(0, len(line))
+    return "".join(parts), changed_indices, errors
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Record which original (converter output) line each translated line came
+from, so that a line number in a traceback from translated code can be
+mapped back in O(1).
+
+The file written by save is JSON:
+{"source": path, "output": path, "lines": [...]}
+where lines[n-1] is the original line number of translated line n, or
+0 (inserted_marker) if the translator inserted that line.
+"""
+import json
+from array import array
+from outputwriter import PCTOutputWriter
+
+inserted_marker = 0
+
+
+class PCTSourceMap:
+    source_path = None
+    output_path = None
+    origins = None  # original line number for each output line
+
+    def __init__(self, source_path=None, output_path=None):
+        self.source_path = source_path
+        self.output_path = output_path
+        self.origins = array('l')
+
+    def __len__(self):
+        return len(self.origins)
+
+    def append(self, source_lineN):
+        """
+        Add the next output line.
+
+        Sequential arguments:
+        source_lineN -- Provide the original line number (starting at
+                        1), or inserted_marker if the line is new.
+        """
+        self.origins.append(source_lineN)
+
+    def get_source_lineN(self, lineN):
+        """
+        Get the original line number for output line number lineN, or
+        None if the line was inserted (or is past the end).
+        """
+        if (lineN < 1) or (lineN > len(self.origins)):
+            return None
+        source_lineN = self.origins[lineN-1]
+        if source_lineN == inserted_marker:
+            return None
+        return source_lineN
+
+    def save(self, path, encoding=None):
+        outfile = PCTOutputWriter(path, encoding=encoding)
+        outfile.write_line(json.dumps({
+            "source": self.source_path,
+            "output": self.output_path,
+            "lines": self.origins.tolist(),
+        }))
+        outfile.close()
+
+    @classmethod
+    def load(cls, path):
+        infile = open(path, 'r')
+        data = json.load(infile)
+        infile.close()
+        result = cls(source_path=data.get("source"),
+                     output_path=data.get("output"))
+        result.origins = array('l', data["lines"])
+        return result
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Find which known type (a PCTType) is constructed in some code, in one
+scan of the code instead of one search per type.
+"""
+import re
+from parsing import quoted_or_comment_rx
+
+constructor_call_rx = re.compile(r"(\w+)\(")
+
+
+class PCTTypeIndex:
+    """
+    Index PCTType objects by name. Custom types take priority over
+    builtin types, and otherwise the earliest type added wins (the
+    same as searching custom_types + builtin_types in order).
+    """
+    _custom = None  # name to (priority, PCTType)
+    _builtin = None
+    _custom_list = None  # the list the custom types were synced from
+    _custom_count = None
+    _builtin_list = None
+    _builtin_count = None
+
+    def __init__(self):
+        self._custom = {}
+        self._builtin = {}
+        self._custom_count = 0
+        self._builtin_count = 0
+
+    def sync(self, custom_types, builtin_types):
+        """
+        Add any types appended to either list since the last sync
+        (or start over if a list was replaced by another).
+        """
+        if custom_types is not self._custom_list:
+            self._custom = {}
+            self._custom_list = custom_types
+            self._custom_count = 0
+        if builtin_types is not self._builtin_list:
+            self._builtin = {}
+            self._builtin_list = builtin_types
+            self._builtin_count = 0
+        self._custom_count = self._add(self._custom, custom_types,
+                                       self._custom_count)
+        self._builtin_count = self._add(self._builtin, builtin_types,
+                                        self._builtin_count)
+
+    def _add(self, names, types, start):
+        if len(types) < start:
+            # The list got shorter, so start over.
+            names.clear()
+            start = 0
+        for index in range(start, len(types)):
+            this_type = types[index]
+            if (this_type is not None) and (this_type.name not in names):
+                names[this_type.name] = (index, this_type)
+        return len(types)
+
+    def find_type(self, name):
+        """Get the PCTType with the name, or None."""
+        found = self._custom.get(name)
+        if found is None:
+            found = self._builtin.get(name)
+        if found is None:
+            return None
+        return found[1]
+
+    def find_constructed_type(self, code):
+        """
+        Get the PCTType that has a constructor call (its name followed
+        by '(') in code outside of quotes and comments, or None.
+        """
+        if ('"' in code) or ("'" in code) or ("#" in code):
+            code = quoted_or_comment_rx.sub(" ", code)
+        custom_best = None
+        builtin_best = None
+        for match in constructor_call_rx.finditer(code):
+            name = match.group(1)
+            found = self._custom.get(name)
+            if found is not None:
+                if (custom_best is None) or (found[0] < custom_best[0]):
+                    custom_best = found
+                continue
+            if custom_best is not None:
+                continue
+            found = self._builtin.get(name)
+            if found is not None:
+                if (builtin_best is None) or (found[0] < builtin_best[0]):
+                    builtin_best = found
+        if custom_best is not None:
+            return custom_best[1]
+        if builtin_best is not None:
+            return builtin_best[1]
+        return None
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+from __future__ import print_function
+"""
+Infer the type_identifier of symbols assigned from other symbols (such
+as x = y or self.a = self.b + 1) by propagating types to a fixed
+point. A worklist holds the symbols to (re)check, and each symbol is
+only checked again when one of the symbols it depends on gets a type,
+so no pass rescans the whole symbol table.
+"""
+import re
+from collections import deque
+from literals import classify_literal
+from literals import literal_type_names
+
+reference_rx = re.compile(r"[^\W\d][\w.]*\Z")
+call_rx = re.compile(r"((?:[^\W\d]\w*\.)*)([^\W\d]\w*)\s*\(")
+self_prefix = "self."
+keyword_operators = ["await", "yield", "yield from"]
+# ^ unary operators (see PCTExpression) that do not keep the type
+
+
+def get_type_name(type_identifier):
+    """Get a type_identifier (a str or a PCTType) as a str."""
+    if type_identifier is None:
+        return None
+    name = getattr(type_identifier, "name", None)
+    if name is not None:
+        return name
+    return type_identifier
+
+
+class PCTTypeInference:
+    symbols = None
+    expression_parser = None
+    type_index = None
+    bool_operators = None
+    _by_fqname = None
+
+    def __init__(self, symbols, expression_parser, type_index,
+                 bool_operators):
+        """
+        Sequential arguments:
+        symbols -- Provide PCTSymbol objects (types are set in place).
+        expression_parser -- Provide a PCTExpressionParser.
+        type_index -- Provide a synced PCTTypeIndex for constructors.
+        bool_operators -- Provide the binary operators that always
+                          result in a bool (such as comparisons).
+        """
+        self.symbols = symbols
+        self.expression_parser = expression_parser
+        self.type_index = type_index
+        self.bool_operators = set(bool_operators)
+        self._by_fqname = {}
+        for symbol in symbols:
+            fqname = symbol.get_fully_qualified_name()
+            if fqname not in self._by_fqname:
+                self._by_fqname[fqname] = symbol
+
+    def run(self):
+        """Set types where possible and return how many were set."""
+        expressions = {}  # id(symbol) to its parsed value
+        dependents = {}  # id(symbol) to the symbols assigned from it
+        worklist = deque()
+        queued = set()
+        for symbol in self.symbols:
+            if symbol.type_identifier is not None:
+                continue
+            value = get_symbol_value(symbol)
+            if (value is None) or (len(value.strip()) < 1):
+                continue
+            expression = self.expression_parser.parse(value.strip())
+            expressions[id(symbol)] = expression
+            for operand in expression.get_operands():
+                dependency = self.resolve(operand, symbol)
+                if (dependency is not None) and (dependency is not symbol):
+                    dependents.setdefault(id(dependency),
+                                          list()).append(symbol)
+            worklist.append(symbol)
+            queued.add(id(symbol))
+        count = 0
+        while len(worklist) > 0:
+            symbol = worklist.popleft()
+            queued.discard(id(symbol))
+            type_identifier = self._infer(expressions[id(symbol)], symbol)
+            if (type_identifier is None) or (symbol.type_identifier
+                                             is not None):
+                continue
+            symbol.type_identifier = get_type_name(type_identifier)
+            count += 1
+            for dependent in dependents.get(id(symbol), []):
+                if ((dependent.type_identifier is None)
+                        and (id(dependent) not in queued)):
+                    worklist.append(dependent)
+                    queued.add(id(dependent))
+        return count
+
+    def resolve(self, name, symbol):
+        """
+        Get the symbol that name refers to from the scope of symbol
+        (trying "self.x" or "Class.x" as the member x then _x like the
+        ArrayList rule in PCTParser), or None. If symbol.scope is set,
+        the scope tree is walked instead of matching dotted names.
+        """
+        if reference_rx.match(name) is None:
+            return None
+        scope = getattr(symbol, "scope", None)
+        if scope is not None:
+            return scope.resolve(name)
+        fqnames = list()
+        if symbol.class_name is not None:
+            if name.startswith(self_prefix):
+                member = name[len(self_prefix):]
+                fqnames.append(symbol.class_name + "." + member)
+                fqnames.append(symbol.class_name + "._" + member)
+            else:
+                fqnames.append(symbol.class_name + "." + name)
+        if not name.startswith(self_prefix):
+            fqnames.append(name)
+            dot_index = name.rfind(".")
+            if dot_index > -1:
+                # such as Class.member for Class._member
+                fqnames.append(name[:dot_index+1] + "_"
+                               + name[dot_index+1:])
+        for fqname in fqnames:
+            result = self._by_fqname.get(fqname)
+            if result is not None:
+                return result
+        return None
+
+    def _infer(self, expression, symbol):
+        kind = expression.kind
+        if kind == "operand":
+            return self._infer_operand(expression.text, symbol)
+        if kind == "group":
+            return self._infer(expression.children[0], symbol)
+        if kind == "unary":
+            if expression.operator == "not":
+                return "bool"
+            if expression.operator in keyword_operators:
+                return None  # depends on the coroutine or generator
+            return self._infer(expression.children[0], symbol)
+        if kind == "binary":
+            if expression.operator in self.bool_operators:
+                return "bool"
+            left = self._infer(expression.children[0], symbol)
+            right = self._infer(expression.children[1], symbol)
+            left_name = get_type_name(left)
+            right_name = get_type_name(right)
+            if (left_name is not None) and (left_name == right_name):
+                return left
+            if (set([left_name, right_name])
+                    == set(["int", literal_type_names["float"]])):
+                return literal_type_names["float"]
+            if ((expression.operator == "%")
+                    and (left_name == literal_type_names["string"])):
+                return left
+            return None
+        if (kind == "conditional") and (len(expression.children) > 2):
+            value = self._infer(expression.children[0], symbol)
+            alternative = self._infer(expression.children[2], symbol)
+            if ((get_type_name(value) is not None)
+                    and (get_type_name(value)
+                         == get_type_name(alternative))):
+                return value
+        return None
+
+    def _infer_operand(self, text, symbol):
+        literal_kind = classify_literal(text)[0]
+        if literal_kind is not None:
+            return literal_type_names.get(literal_kind)
+        if text[:1] == "[":
+            return "list"
+        dependency = self.resolve(text, symbol)
+        if dependency is not None:
+            return dependency.type_identifier
+        match = call_rx.match(text)
+        if (match is not None) and text.endswith(")"):
+            return self.type_index.find_type(match.group(2))
+        return None
+
+
+def get_symbol_value(symbol):
+    """Get the code assigned to the symbol, or None."""
+    if symbol.default_value is not None:
+        return symbol.default_value
+    return getattr(symbol, "value", None)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+tests_path = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(os.path.dirname(tests_path), "pycodetool")
+if module_path not in sys.path:
+    sys.path.insert(0, module_path)
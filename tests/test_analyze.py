@@ -0,0 +1,120 @@
+import os
+import re
+
+import pytest
+
+from analyze import analyze_data
+from analyze import analyze_paths
+from analyze import console_rx
+from pct import PCTParser
+
+tests_path = os.path.dirname(os.path.abspath(__file__))
+fixture_path = os.path.join(tests_path, "YAMLObject_fromCodeConverter.py")
+
+sample = """import System
+from System import String
+from System.IO import StreamReader
+
+
+class Greeter:
+    _name = ""
+
+    def greet(self, count):
+        Console.WriteLine("hi " + self._name.Substring(1))
+        Console.Error.WriteLine()
+        line = Console.ReadLine()
+        Console.Out.Flush()
+        reader = StreamReader("names.txt")
+        text = count.ToString()
+        # Console.WriteLine(text)
+        return text.Substring(0, 1)  # Substring(0, 1)
+"""
+
+duplicate_method = """
+    def greet(self):
+        Console.WriteLine(self._name.Substring(2))
+"""
+
+# Each family is counted by a pattern that the converter removes from
+# the code when it changes one.
+change_patterns = {
+    "system_imports": re.compile(r"^[ \t]*from System[. ]", re.MULTILINE),
+    "substring_calls": re.compile(r"\.Substring\s*\("),
+    "stream_readers": re.compile(r"\bStreamReader\s*\("),
+    "stream_writers": re.compile(r"\bStreamWriter\s*\("),
+    "enumerator_loops": re.compile(r"\benumerator\.MoveNext\(\)"),
+    "console_calls": console_rx,
+    "tostring_calls": re.compile(r"\.ToString\s*\("),
+}
+
+
+def convert(tmp_path, text):
+    source_path = str(tmp_path / "source.py")
+    with open(source_path, "wb") as outfile:
+        outfile.write(text.encode("utf-8"))
+    output_path = str(tmp_path / "output.py")
+    parser = PCTParser(source_path)
+    parser.framework_to_standard_python(output_path)
+    with open(output_path, "rb") as infile:
+        return infile.read().decode("utf-8")
+
+
+def get_changes(text, output):
+    """Count what the conversion removed from the active code."""
+    def active(code):
+        return "\n".join([line for line in code.split("\n")
+                          if line.strip()[:1] != "#"])
+    text = active(text)
+    output = active(output)
+    results = {}
+    for key, change_rx in change_patterns.items():
+        results[key] = (len(change_rx.findall(text))
+                        - len(change_rx.findall(output)))
+    return results
+
+
+def test_analyze_sample():
+    report = analyze_data(sample)
+    assert report["lines"] == 17
+    assert report["system_imports"] == 2
+    assert report["substring_calls"] == 2
+    assert report["stream_readers"] == 1
+    assert report["console_calls"] == 3  # not ReadLine nor the comment
+    assert report["tostring_calls"] == 1
+    assert report["duplicate_methods"] == 0
+
+
+def test_duplicate_method_is_not_counted_again():
+    report = analyze_data(sample + duplicate_method)
+    assert report["duplicate_methods"] == 1
+    assert report["substring_calls"] == 2
+    assert report["console_calls"] == 3
+
+
+def test_analyze_sample_matches_conversion(tmp_path):
+    report = analyze_data(sample)
+    changes = get_changes(sample, convert(tmp_path, sample))
+    for key, count in changes.items():
+        assert (key, report[key]) == (key, count)
+
+
+def test_analyze_fixture_matches_conversion(tmp_path):
+    with open(fixture_path, "rb") as infile:
+        text = infile.read().decode("utf-8")
+    report = analyze_data(text)
+    changes = get_changes(text, convert(tmp_path, text))
+    for key, count in changes.items():
+        assert (key, report[key]) == (key, count)
+    assert report["console_calls"] == 33
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_analyze_paths(tmp_path, processes):
+    for name in ["a.py", "b.py"]:
+        with open(str(tmp_path / name), "wb") as outfile:
+            outfile.write(sample.encode("utf-8"))
+    result = analyze_paths([str(tmp_path)], processes=processes)
+    assert sorted(result["files"].keys()) == [str(tmp_path / "a.py"),
+                                              str(tmp_path / "b.py")]
+    assert result["totals"]["files"] == 2
+    assert result["totals"]["console_calls"] == 6
@@ -0,0 +1,141 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from archive import get_tar_write_mode
+from archive import translate_archive
+from pct import PCTParser
+
+code_text = b"""import System
+
+
+class Greeter:
+    _name = ""
+
+    def get_rest(self):
+        return self._name.Substring(1)
+"""
+
+bad_text = b"class Bad:\n    _name = '\xff'\n"
+
+members = [
+    ("pkg/", None),
+    ("pkg/greeter.py", code_text),
+    ("pkg/README.txt", b"Substring(1)\n"),
+    ("pkg/bad.py", bad_text),
+    ("pkg/other.PY", code_text.replace(b"Greeter", b"Other")),
+]
+
+
+def convert(data, name):
+    parser = PCTParser()
+    parser.parse_path(name, data=data)
+    outfile = io.BytesIO()
+    parser.framework_to_standard_python(outfile, source_map_enable=False)
+    return outfile.getvalue()
+
+
+def without_date(data):
+    return [line for line in data.split(b"\n")
+            if b"Processed by" not in line]
+
+
+def write_zip(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in members:
+            info = zipfile.ZipInfo(name, date_time=(2001, 2, 3, 4, 5, 6))
+            info.external_attr = 0o640 << 16
+            archive.writestr(info, data or b"")
+
+
+def read_zip(path):
+    results = list()
+    with zipfile.ZipFile(path, "r") as archive:
+        for info in archive.infolist():
+            assert info.date_time == (2001, 2, 3, 4, 5, 6)
+            assert info.external_attr >> 16 == 0o640
+            data = None
+            if not info.filename.endswith("/"):
+                data = archive.read(info)
+            results.append((info.filename, data))
+    return results
+
+
+def write_tar(path):
+    with tarfile.open(path, get_tar_write_mode(path)) as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name.rstrip("/"))
+            info.mtime = 981173106
+            info.mode = 0o640
+            if data is None:
+                info.type = tarfile.DIRTYPE
+                archive.addfile(info)
+            else:
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+
+def read_tar(path):
+    results = list()
+    with tarfile.open(path, "r:*") as archive:
+        for info in archive:
+            assert info.mtime == 981173106
+            assert info.mode == 0o640
+            name = info.name
+            data = None
+            if info.isdir():
+                name += "/"
+            else:
+                data = archive.extractfile(info).read()
+            results.append((name, data))
+    return results
+
+
+@pytest.mark.parametrize("suffix", [".zip", ".tar", ".tar.gz", ".tgz"])
+@pytest.mark.parametrize("processes", [1, 2])
+def test_translate_archive(tmp_path, suffix, processes):
+    source_path = str(tmp_path / ("source" + suffix))
+    destination_path = str(tmp_path / ("destination" + suffix))
+    write, read = write_tar, read_tar
+    if suffix == ".zip":
+        write, read = write_zip, read_zip
+    write(source_path)
+    failures = translate_archive(source_path, destination_path,
+                                 processes=processes, window_size=2)
+    assert [name for name, error in failures] == ["pkg/bad.py"]
+    assert "UnicodeDecodeError" in failures[0][1]
+    results = read(destination_path)
+    assert [name for name, data in results] == [name for name, data
+                                                in members]
+    for (name, data), (source_name, source_data) in zip(results,
+                                                         members):
+        if name in ["pkg/greeter.py", "pkg/other.PY"]:
+            assert without_date(data) == without_date(
+                convert(source_data, name)
+            )
+            assert b"self._name[1:]" in data
+        else:
+            assert data == source_data  # copied as it was
+
+
+def test_tar_write_mode():
+    assert get_tar_write_mode("a.TGZ") == "w:gz"
+    assert get_tar_write_mode("a.tar.xz") == "w:xz"
+    assert get_tar_write_mode("a.tar") == "w"
+    assert get_tar_write_mode("a.zip") is None
+
+
+def test_bad_archives(tmp_path):
+    source_path = str(tmp_path / "source.zip")
+    write_zip(source_path)
+    with pytest.raises(ValueError):
+        translate_archive(source_path, str(tmp_path / "out.tar"),
+                          processes=1)
+    plain_path = str(tmp_path / "plain.py")
+    with open(plain_path, "wb") as outfile:
+        outfile.write(code_text)
+    with pytest.raises(ValueError):
+        translate_archive(plain_path, str(tmp_path / "out.zip"),
+                          processes=1)
@@ -0,0 +1,67 @@
+from pct import PCTParser
+
+sample = """class A:
+    def run(self):
+        self.step()
+
+    def step(self):
+        pass
+
+    def unused(self):
+        pass
+
+
+class B(A):
+    def step(self):
+        pass
+
+
+class C(B):
+    def step(self):
+        pass
+
+
+class D:
+    def step(self):
+        pass
+
+
+def helper():
+    pass
+
+
+def main():
+    helper()
+    A().run()
+"""
+
+
+def get_dotted_name(scope):
+    names = list()
+    while scope.parent is not None:
+        names.insert(0, scope.name)
+        scope = scope.parent
+    return ".".join(names)
+
+
+def get_unreachable_names(tmp_path, entry_points):
+    source_path = str(tmp_path / "sample.py")
+    with open(source_path, "w") as outfile:
+        outfile.write(sample)
+    parser = PCTParser(source_path)
+    graph = parser.get_call_graph()
+    return [get_dotted_name(method)
+            for method in graph.get_unreachable(entry_points)]
+
+
+def test_overrides_are_reached_through_self(tmp_path):
+    assert get_unreachable_names(tmp_path, ["main"]) == [
+        "A.unused", "D.step",
+    ]
+
+
+def test_nothing_reached_without_entry_points(tmp_path):
+    assert get_unreachable_names(tmp_path, None) == [
+        "A.run", "A.step", "A.unused", "B.step", "C.step", "D.step",
+        "helper", "main",
+    ]
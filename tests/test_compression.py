@@ -0,0 +1,98 @@
+import gzip
+import io
+
+import pytest
+
+from analyze import analyze_data
+from analyze import analyze_path
+from analyze import find_python_files
+from compression import get_compression
+from compression import lzma
+from compression import open_compressed
+from compression import read_compressed
+from pct import PCTParser
+
+text = u"""import System
+
+
+class Greeter:
+    _name = "é"
+
+    def get_initial(self):
+        return self._name.Substring(0, 1)
+"""
+
+
+@pytest.mark.parametrize("path, compression", [
+    ("code.py.gz", "gzip"),
+    ("CODE.PY.GZ", "gzip"),
+    ("code.py.xz", "xz"),
+    ("code.py", None),
+    ("code.gz.py", None),
+    (io.BytesIO(), None),
+])
+def test_get_compression(path, compression):
+    assert get_compression(path) == compression
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".xz"])
+def test_round_trip(tmp_path, suffix):
+    if (suffix == ".xz") and (lzma is None):
+        pytest.skip("requires the lzma module")
+    path = str(tmp_path / ("code.py" + suffix))
+    data = text.encode("utf-8") * 100
+    outfile = open_compressed(path, 'wb')
+    outfile.write(data)
+    outfile.close()
+    with open(path, "rb") as infile:
+        assert len(infile.read()) < len(data)
+    assert read_compressed(path) == data
+
+
+def test_explicit_compression(tmp_path):
+    path = str(tmp_path / "code.bin")
+    with gzip.open(path, "wb") as outfile:
+        outfile.write(b"x = 1\n")
+    assert read_compressed(path, compression="gzip") == b"x = 1\n"
+    with pytest.raises(ValueError):
+        read_compressed(path)
+
+
+def test_parser_reads_and_writes_compressed(tmp_path):
+    plain_path = str(tmp_path / "code.py")
+    with open(plain_path, "wb") as outfile:
+        outfile.write(text.encode("utf-8"))
+    compressed_path = plain_path + ".gz"
+    with gzip.open(compressed_path, "wb") as outfile:
+        outfile.write(text.encode("utf-8"))
+    parser = PCTParser(plain_path)
+    expected_path = str(tmp_path / "expected.py")
+    parser.framework_to_standard_python(expected_path,
+                                        source_map_enable=False)
+    parser = PCTParser(compressed_path)
+    assert parser.lines == PCTParser(plain_path).lines
+    output_path = str(tmp_path / "output.py.gz")
+    parser.framework_to_standard_python(output_path,
+                                        source_map_enable=False)
+    with open(expected_path, "rb") as infile:
+        expected = infile.read().split(b"\n")
+    output = read_compressed(output_path).split(b"\n")
+    assert len(output) == len(expected)
+    for line, expected_line in zip(output, expected):
+        if b"Processed by" not in line:
+            assert line == expected_line
+
+
+def test_analyze_compressed(tmp_path):
+    (tmp_path / "sub").mkdir()
+    paths = [str(tmp_path / "a.py"), str(tmp_path / "sub" / "b.py.gz"),
+             str(tmp_path / "sub" / "c.txt.gz")]
+    with open(paths[0], "wb") as outfile:
+        outfile.write(b"x = 1\n")
+    for path in paths[1:]:
+        with gzip.open(path, "wb") as outfile:
+            outfile.write(text.encode("utf-8"))
+    assert list(find_python_files(str(tmp_path))) == paths[:2]
+    path, report = analyze_path(paths[1])
+    assert report == analyze_data(text)
+    assert report["lines"] == 8
@@ -0,0 +1,147 @@
+import difflib
+import json
+import random
+
+import pytest
+
+from diffwriter import PCTDiffWriter
+
+old_lines = ["line " + str(i) for i in range(1, 21)]
+
+
+def write_diff(tmp_path, pairs, diff_format="unified", old=None,
+               **options):
+    """
+    Write pairs of (line, loaded_index) as a diff of old (default:
+    old_lines) and get the result.
+    """
+    if old is None:
+        old = old_lines
+    path = str(tmp_path / "out.diff")
+    writer = PCTDiffWriter(path, old.__getitem__, len(old),
+                           from_path="a.py", to_path="b.py",
+                           diff_format=diff_format, encoding="utf-8",
+                           **options)
+    for line, loaded_index in pairs:
+        writer.write_line(line, loaded_index)
+    writer.close()
+    with open(path, "rb") as infile:
+        return writer, infile.read().decode("utf-8")
+
+
+def apply_edits(old, edits):
+    """Apply a json edit list (see diffwriter.py) to old."""
+    results = list()
+    old_index = 0
+    for edit in edits:
+        lineN = edit[1]
+        # edits are in order, so copy the untouched lines before it:
+        stop = lineN - 1
+        if edit[0] == "i":
+            stop = lineN
+        results.extend(old[old_index:stop])
+        old_index = max(old_index, stop)
+        if edit[0] == "r":
+            results.append(edit[2])
+            old_index = lineN
+        elif edit[0] == "i":
+            results.append(edit[2])
+        else:
+            old_index = lineN
+    results.extend(old[old_index:])
+    return results
+
+
+def apply_unified(old, diff):
+    """Apply a unified diff (without "\\ No newline" markers) to old."""
+    results = list()
+    old_index = 0
+    for diff_line in diff.split("\n")[2:]:
+        if diff_line.startswith("@@"):
+            old_range = diff_line.split()[1][1:]
+            start = int(old_range.split(",")[0])
+            if old_range.endswith(",0"):
+                start += 1  # an empty range names the line before it
+            results.extend(old[old_index:start-1])
+            old_index = start - 1
+        elif diff_line[:1] == " ":
+            assert old[old_index] == diff_line[1:]
+            results.append(diff_line[1:])
+            old_index += 1
+        elif diff_line[:1] == "-":
+            assert old[old_index] == diff_line[1:]
+            old_index += 1
+        elif diff_line[:1] == "+":
+            results.append(diff_line[1:])
+    results.extend(old[old_index:])
+    return results
+
+
+def get_example_pairs():
+    pairs = [(line, i) for i, line in enumerate(old_lines)]
+    pairs[2] = ("changed 3", 2)
+    del pairs[10]
+    pairs.insert(15, ("inserted", -1))
+    return pairs
+
+
+def test_unified_matches_difflib(tmp_path):
+    pairs = get_example_pairs()
+    writer, output = write_diff(tmp_path, pairs)
+    new_lines = [line for line, loaded_index in pairs]
+    expected = difflib.unified_diff(old_lines, new_lines, "a.py", "b.py",
+                                    lineterm="")
+    assert output == "\n".join(expected) + "\n"
+    assert writer.edit_count == 3
+
+
+def test_json_edits(tmp_path):
+    pairs = get_example_pairs()
+    writer, output = write_diff(tmp_path, pairs, diff_format="json")
+    result = json.loads(output)
+    assert result["from"] == "a.py"
+    assert result["to"] == "b.py"
+    assert result["edits"] == [["r", 3, "changed 3"], ["d", 11],
+                               ["i", 16, "inserted"]]
+
+
+def test_no_changes(tmp_path):
+    pairs = [(line, i) for i, line in enumerate(old_lines)]
+    writer, output = write_diff(tmp_path, pairs)
+    assert output == "--- a.py\n+++ b.py\n"
+    assert writer.edit_count == 0
+
+
+def test_missing_final_newline(tmp_path):
+    old = ["a", "b"]
+    writer, output = write_diff(tmp_path, [("a", 0), ("b", 1)], old=old,
+                                from_final_newline_enable=False)
+    assert output == ("--- a.py\n+++ b.py\n@@ -1,2 +1,2 @@\n a\n-b\n"
+                      "\\ No newline at end of file\n+b\n")
+
+
+def test_bad_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_diff(tmp_path, [], diff_format="html")
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_edits(tmp_path, seed):
+    rng = random.Random(seed)
+    pairs = list()
+    for i, line in enumerate(old_lines):
+        choice = rng.random()
+        if choice < 0.15:
+            continue  # deleted
+        if choice < 0.3:
+            line = "changed " + str(i)
+        pairs.append((line, i))
+        if rng.random() < 0.15:
+            pairs.append(("inserted after " + str(i), -1))
+    new_lines = [line for line, loaded_index in pairs]
+    writer, output = write_diff(tmp_path, pairs, diff_format="json")
+    assert apply_edits(old_lines, json.loads(output)["edits"]) == new_lines
+    for context_count in [0, 1, 3]:
+        writer, output = write_diff(tmp_path, pairs,
+                                    context_count=context_count)
+        assert apply_unified(old_lines, output) == new_lines
@@ -0,0 +1,83 @@
+import pytest
+
+from pct import PCTParser
+
+
+@pytest.fixture(scope="module")
+def expression_parser():
+    return PCTParser().expression_parser
+
+
+def parse(expression_parser, text):
+    expression = expression_parser.parse(text)
+    assert expression_parser.errors == []
+    return expression
+
+
+def test_precedence(expression_parser):
+    expression = parse(expression_parser, "a + b * -c ** 2")
+    assert str(expression) == "(a + (b * (- (c ** 2))))"
+    assert expression.get_operands() == ["a", "b", "c", "2"]
+
+
+def test_conditional_and_logical(expression_parser):
+    expression = parse(expression_parser, "x if not y or z else w")
+    assert expression.kind == "conditional"
+    assert expression.get_operands() == ["x", "y", "z", "w"]
+
+
+def test_calls_and_subscripts_are_operands(expression_parser):
+    expression = parse(expression_parser, "f(x).y[1] + (a, b)")
+    assert expression.get_operands() == ["f(x).y[1]", "a", "b"]
+
+
+def test_lambda_body_is_not_listed(expression_parser):
+    expression = parse(expression_parser, "lambda x: x + y, z")
+    assert expression.get_operands() == ["lambda x: x + y", "z"]
+
+
+@pytest.mark.parametrize("text", [
+    "(x for x in y)",
+    "[x for x in y if x]",
+    "{k: v for k, v in d.items()}",
+    "sum(x for x in y)",
+])
+def test_comprehension_is_one_operand(expression_parser, text):
+    assert parse(expression_parser, text).get_operands() == [text]
+
+
+def test_generator_in_expression(expression_parser):
+    expression = parse(expression_parser, "(x for x in y) or (a + b)")
+    assert expression.get_operands() == ["(x for x in y)", "a", "b"]
+
+
+@pytest.mark.parametrize("text, expected, operands", [
+    ("yield", "(yield)", []),
+    ("yield x, y", "(yield (x, y))", ["x", "y"]),
+    ("yield from g()", "(yield from g())", ["g()"]),
+    ("(yield x) + 1", "(((yield x)) + 1)", ["x", "1"]),
+    ("await f() + 1", "((await f()) + 1)", ["f()", "1"]),
+    ("await", "await", ["await"]),
+])
+def test_keyword_operators(expression_parser, text, expected, operands):
+    expression = parse(expression_parser, text)
+    assert str(expression) == expected
+    assert expression.get_operands() == operands
+
+
+@pytest.mark.parametrize("text", ["1_000", "0x_ff", "0o17", "0b1_0",
+                                  "1_000.5e1_0j", ".5", "10L"])
+def test_number(expression_parser, text):
+    assert parse(expression_parser, text).get_operands() == [text]
+
+
+def test_matrix_product(expression_parser):
+    expression = parse(expression_parser, "a @ b + c")
+    assert str(expression) == "((a @ b) + c)"
+
+
+def test_errors(expression_parser):
+    expression_parser.parse("a + ")
+    assert expression_parser.errors == [(4, "expected an operand")]
+    expression_parser.parse("f(a")
+    assert expression_parser.errors == [(1, "expected ')'")]
@@ -0,0 +1,83 @@
+import keyword
+import sys
+import tokenize
+
+import identindex
+from identindex import index_identifiers
+from identindex import index_path
+from pct import PCTParser
+
+lines = [
+    "x = y + 1  # x is y",
+    "self.x = 'x' + \"y\" + x2",
+    "s = \"\"\"x",
+    "y x",
+    "x\"\"\" + x",
+    "r = r'\\x' if x is None else 0x1F",
+    "t = '''x''' + y",
+]
+
+
+def index_slowly(lines):
+    """Index the names that the tokenize module finds in lines."""
+    results = {}
+    readline = iter([line + "\n" for line in lines]).__next__
+    for token in tokenize.generate_tokens(readline):
+        if ((token.type == tokenize.NAME)
+                and not keyword.iskeyword(token.string)):
+            results.setdefault(token.string, list()).append(token.start)
+    return results
+
+
+def test_find():
+    index = index_identifiers(lines)
+    assert index.line_count == len(lines)
+    assert index.find("x") == [(1, 0), (2, 5), (5, 7), (6, 13)]
+    assert index.find("y") == [(1, 4), (7, 14)]
+    assert index.find("x2") == [(2, 21)]
+    assert index.find("missing") == []
+    assert "self" in index
+    assert "None" not in index  # keywords are skipped by default
+    assert "x1F" not in index  # numbers are not identifiers
+    assert index.find_names("s") == ["s", "self"]
+
+
+def test_keywords():
+    index = index_identifiers(lines, keywords_enable=True)
+    assert index.find("None") == [(6, 18)]
+    assert index.find("is") == [(6, 15)]
+    assert len(index) == len(index_identifiers(lines)) + 4
+
+
+def test_add_lines_continues():
+    index = index_identifiers(lines[:3])
+    index.add_lines(lines[3:])
+    assert index.positions == index_identifiers(lines).positions
+
+
+def test_same_as_tokenize():
+    assert index_identifiers(lines).positions == index_slowly(lines)
+
+
+def test_path_and_parser(tmp_path):
+    path = str(tmp_path / "sample.py")
+    with open(path, "wb") as outfile:
+        outfile.write("\r\n".join(lines).encode("utf-8") + b"\r\n")
+    index = index_path(path)
+    assert index.positions == index_identifiers(lines).positions
+    parser = PCTParser(path)
+    assert parser.find_identifier_uses("x") == index.find("x")
+
+
+def test_main(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "sample.py")
+    with open(path, "w") as outfile:
+        outfile.write("\n".join(lines) + "\n")
+    monkeypatch.setattr(sys, "argv", ["identindex.py", path, "x2"])
+    assert identindex.main() == 0
+    assert capsys.readouterr().out == path + ":2:22: x2\n"
+    monkeypatch.setattr(sys, "argv", ["identindex.py", path])
+    assert identindex.main() == 0
+    assert "self: 1\n" in capsys.readouterr().out
+    monkeypatch.setattr(sys, "argv", ["identindex.py", path, "missing"])
+    assert identindex.main() == 1
@@ -0,0 +1,35 @@
+import random
+
+from linemap import PCTLineMap
+
+
+def test_insert_before_and_after():
+    line_map = PCTLineMap(5)
+    line_map.insert(2, 2)  # before loaded line 2
+    line_map.insert(len(line_map))  # appended
+    assert len(line_map) == 8
+    loaded_indices = [line_map.get_loaded_index(line_index)
+                      for line_index in range(len(line_map))]
+    assert loaded_indices == [0, 1, -1, -1, 2, 3, 4, -1]
+    assert line_map.get_line_index(2) == 4
+    assert line_map.get_lineN(4) == 3
+    assert line_map.get_lineN(2) == 2  # the loaded line before it
+    assert line_map.get_lineN(7) == 5
+
+
+def test_matches_a_list():
+    generator = random.Random(7)
+    loaded_count = 40
+    line_map = PCTLineMap(loaded_count)
+    origins = list(range(loaded_count))  # -1 for each inserted line
+    for _ in range(200):
+        line_index = generator.randint(0, len(origins))
+        count = generator.randint(1, 3)
+        line_map.insert(line_index, count)
+        origins[line_index:line_index] = [-1] * count
+    assert len(line_map) == len(origins)
+    for line_index in range(len(origins)):
+        assert line_map.get_loaded_index(line_index) == origins[line_index]
+    for loaded_index in range(loaded_count):
+        line_index = line_map.get_line_index(loaded_index)
+        assert origins[line_index] == loaded_index
@@ -0,0 +1,74 @@
+import math
+
+import pytest
+
+from literals import classify_literal
+from literals import classify_literals
+from parsing import get_dict_modified_by_conf_file
+
+
+@pytest.mark.parametrize("text, kind, value", [
+    ("None", "null", None),
+    ("~", "null", None),
+    ("TRUE", "bool", True),
+    ("false", "bool", False),
+    ("-12", "int", -12),
+    ("+1_000", "int", 1000),
+    ("0x1F", "int", 31),
+    ("-0o17", "int", -15),
+    ("0b1_01", "int", 5),
+    ("10L", "int", 10),
+    ("1.5", "float", 1.5),
+    (".5", "float", 0.5),
+    ("5.", "float", 5.0),
+    ("-1e-3", "float", -0.001),
+    ("1_0.5e1", "float", 105.0),
+    ("inf", "float", float("inf")),
+    ("'a b'", "string", "a b"),
+    ("u\"\\u00e9\"", "string", u"\xe9"),
+    ("b'x'", "string", b"x"),
+    ("r'\\d'", "string", "\\d"),
+    ("  7  ", "int", 7),
+    ("x", None, None),
+    ("1 + 2", None, None),
+    ("0x", None, None),
+    ("'unclosed", None, None),
+    ("1__0", None, None),
+])
+def test_classify_literal(text, kind, value):
+    assert classify_literal(text) == (kind, value)
+
+
+def test_nan():
+    kind, value = classify_literal("NaN")
+    assert kind == "float"
+    assert math.isnan(value)
+
+
+def test_classify_literals():
+    assert classify_literals(["1", "x", "'s'"]) == [
+        ("int", 1), (None, None), ("string", "s"),
+    ]
+
+
+def test_conf_file(tmp_path):
+    path = str(tmp_path / "settings.conf")
+    with open(path, "w") as outfile:
+        outfile.write("# comment\n"
+                      "count = 3\n"
+                      "mask = 0x1F\n"
+                      "ratio=0.5\n"
+                      "enabled = true\n"
+                      "missing = null\n"
+                      "name = 'quoted'\n"
+                      "word = plain\n")
+    results = get_dict_modified_by_conf_file({"count": 3}, path)
+    assert results == {
+        "count": 3,
+        "mask": "0x1F",  # only decimal ints are converted (as before)
+        "ratio": 0.5,
+        "enabled": True,
+        "missing": None,
+        "name": "'quoted'",
+        "word": "plain",
+    }
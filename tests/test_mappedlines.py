@@ -0,0 +1,79 @@
+from mappedlines import PCTMappedLines
+from pct import PCTParser
+
+
+def test_lines():
+    lines = PCTMappedLines(b"a\r\nb\n\nc")
+    assert len(lines) == 4
+    assert list(lines) == ["a", "b", "", "c"]
+    assert lines[-1] == "c"
+    assert lines[1:3] == ["b", ""]
+
+
+def test_final_newline():
+    assert list(PCTMappedLines(b"a\nb\n")) == ["a", "b"]
+    assert list(PCTMappedLines(b"")) == []
+
+
+def test_overlay():
+    data = b"0\n1\n2\n3\n"
+    lines = PCTMappedLines(data)
+    lines[1] = "one"
+    lines[3:3] = ["x", "y"]
+    lines.append("end")
+    lines.insert(0, "start")
+    expected = ["start", "0", "one", "2", "x", "y", "3", "end"]
+    assert list(lines) == expected
+    assert [lines[i] for i in range(len(lines))] == expected
+    lines[4] = "X"
+    assert lines[4] == "X"
+    assert lines.get_loaded_line(1) == "1"
+    assert lines.get_loaded_count() == 4
+
+
+def test_from_path(tmp_path):
+    path = str(tmp_path / "lines.py")
+    with open(path, "wb") as outfile:
+        outfile.write(u"x = 1\ny = \u00e9\n".encode("utf-8"))
+    lines = PCTMappedLines.from_path(path, encoding="utf-8")
+    try:
+        assert list(lines) == [u"x = 1", u"y = \u00e9"]
+    finally:
+        lines.close()
+
+
+def test_parser_maps_big_files(tmp_path):
+    path = str(tmp_path / "sample.py")
+    with open(path, "w") as outfile:
+        outfile.write("import System\n\n\nclass A:\n"
+                      "    def get(self, s):\n"
+                      "        return s.Substring(1)  # rest\n")
+    outputs = list()
+    for mmap_min_size in [None, 1]:
+        parser = PCTParser()
+        parser.mmap_min_size = mmap_min_size
+        parser.parse_path(path)
+        assert isinstance(parser.lines, PCTMappedLines) == (
+            mmap_min_size is not None
+        )
+        if mmap_min_size is not None:
+            assert parser.lex is None  # see mmap_min_size
+        output_path = str(tmp_path / "output.py")
+        parser.framework_to_standard_python(output_path)
+        parser.close_file()
+        with open(output_path) as infile:
+            outputs.append(infile.read().split("\n")[2:])
+    assert outputs[0] == outputs[1]
+    assert "        return s[1:]  # rest" in outputs[0]
+
+
+def test_from_path_with_lex(tmp_path):
+    path = str(tmp_path / "lines.py")
+    with open(path, "wb") as outfile:
+        outfile.write(b"x = 1\r\n\n  # y\nz")
+    lines = PCTMappedLines.from_path(path, lex_enable=True)
+    try:
+        assert list(lines) == ["x = 1", "", "  # y", "z"]
+        assert len(lines.lex) == 4
+    finally:
+        lines.close()
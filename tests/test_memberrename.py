@@ -0,0 +1,121 @@
+import io
+
+from memberrename import PCTMemberRenamer
+from pct import PCTParser
+from pct import rename_members_in_files
+from project import PCTProjectIndex
+
+shared_name_sample = """import System
+
+
+class A:
+    _count = 0
+    _size = 0
+
+    def bump(self):
+        self._count += 1
+        self._size += 1
+
+
+class B:
+    def _count(self):
+        return 1
+
+    def run(self):
+        return self._count()
+"""
+
+
+def get_parser(text):
+    parser = PCTParser()
+    parser.parse_text(text, name="sample.py")
+    return parser
+
+
+def test_rename_line():
+    renamer = PCTMemberRenamer({"_name": "name"})
+    assert renamer.rename_line("x = self._name + obj._name") == (
+        "x = self.name + obj.name", 2
+    )
+    assert renamer.rename_line("x = self._names") == ("x = self._names", 0)
+    assert renamer.rename_line('x = "self._name"  # self._name') == (
+        'x = "self._name"  # self._name', 0
+    )
+    assert renamer.rename_line("    _name = None",
+                               is_member_line=True) == ("    name = None", 1)
+
+
+def test_method_of_another_class_is_not_renamed():
+    renames, conflicts = get_parser(shared_name_sample).get_member_renames()
+    assert renames == {"_size": "size"}
+    assert conflicts == {"_count": "'B._count' is a method"}
+
+
+def test_other_classes_conflict():
+    parser = get_parser(shared_name_sample)
+    renames, conflicts = parser.get_member_renames(
+        other_classes={"C": {"members": {"size": "int"}, "methods": []}}
+    )
+    assert renames == {}
+    assert conflicts["_size"] == "'C.size' is already a member"
+
+
+def test_rewrite_with_renames():
+    parser = get_parser(shared_name_sample)
+    renames, conflicts = parser.get_member_renames()
+    parser.member_renames = renames
+    outfile = io.BytesIO()
+    parser.framework_to_standard_python(outfile, source_map_enable=False)
+    output = outfile.getvalue().decode("utf-8")
+    assert "    size = 0\n" in output
+    assert "        self.size += 1\n" in output
+    assert "        self._count += 1\n" in output
+    assert "        return self._count()\n" in output
+
+
+def write_files(tmp_path, texts):
+    path_pairs = list()
+    for name, text in texts:
+        infile_path = str(tmp_path / (name + ".py"))
+        with open(infile_path, "w") as outfile:
+            outfile.write(text)
+        path_pairs.append((infile_path,
+                           str(tmp_path / (name + "_out.py"))))
+    return path_pairs
+
+
+batch_texts = [
+    ("a", "import System\n\n\nclass A:\n    _name = \"\"\n\n"
+          "    def get(self):\n        return self._name\n"),
+    ("b", "import System\n\n\nclass B:\n    _name = \"\"\n    _size = 0\n\n"
+          "    def show(self, a):\n        return a._name + self._name\n"),
+]
+
+
+def test_same_member_in_several_files_is_renamed(tmp_path):
+    path_pairs = write_files(tmp_path, batch_texts)
+    renames, conflicts = rename_members_in_files(path_pairs)
+    assert renames == {"_name": "name", "_size": "size"}
+    assert conflicts == {}
+    with open(path_pairs[1][1]) as infile:
+        output = infile.read()
+    assert "    size = 0\n" in output
+    assert "        return a.name + self.name\n" in output
+
+
+def test_member_outside_of_the_batch_is_not_renamed(tmp_path):
+    path_pairs = write_files(tmp_path, batch_texts)
+    outside_path = write_files(tmp_path, [
+        ("c", "import System\n\n\nclass C:\n    _size = 0\n"),
+    ])[0][0]
+    project_index = PCTProjectIndex()
+    for infile_path in [path_pairs[0][0], path_pairs[1][0], outside_path]:
+        project_index.add_summary(PCTParser(infile_path).get_symbol_summary())
+    renames, conflicts = rename_members_in_files(
+        path_pairs,
+        project_index=project_index
+    )
+    assert renames == {"_name": "name"}
+    assert conflicts == {
+        "_size": "'C._size' is a member in a file that is not rewritten",
+    }
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from multimatch import PCTMultiMatcher
+
+
+def find_all_slowly(words, haystack):
+    results = list()
+    for end in range(1, len(haystack) + 1):
+        # (The longest word comes first if several end at once.)
+        for word in sorted(words, key=len, reverse=True):
+            start = end - len(word)
+            if (start >= 0) and (haystack[start:end] == word):
+                results.append((start, word))
+    return results
+
+
+def test_overlapping_words():
+    matcher = PCTMultiMatcher(["he", "she", "his", "hers"])
+    assert len(matcher) == 4
+    assert matcher.find_all("ushers") == [(1, "she"), (2, "he"),
+                                         (2, "hers")]
+
+
+def test_no_words():
+    assert PCTMultiMatcher([]).find_all("anything") == []
+
+
+def test_writer_objects():
+    matcher = PCTMultiMatcher(["sw.WriteLine(", "self.sw.WriteLine("])
+    line = "self.sw.WriteLine(x); sw.WriteLine(y)"
+    assert matcher.find_all(line) == [(0, "self.sw.WriteLine("),
+                                      (5, "sw.WriteLine("),
+                                      (22, "sw.WriteLine(")]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_same_as_slow_search(seed):
+    rng = random.Random(seed)
+    words = list()
+    for word_i in range(rng.randint(1, 8)):
+        word = "".join(rng.choice("ab.") for i in range(rng.randint(1, 4)))
+        if word not in words:
+            words.append(word)
+    haystack = "".join(rng.choice("ab.c") for i in range(60))
+    matcher = PCTMultiMatcher(words)
+    assert matcher.find_all(haystack) == find_all_slowly(words, haystack)
@@ -0,0 +1,94 @@
+import gzip
+import io
+import os
+
+from outputwriter import PCTOutputWriter
+
+
+def read_bytes(path):
+    with open(path, "rb") as infile:
+        return infile.read()
+
+
+def test_buffered_lines(tmp_path):
+    path = str(tmp_path / "out.txt")
+    writer = PCTOutputWriter(path, encoding="utf-8",
+                             translate_enable=False, buffer_line_count=2)
+    writer.write_line("a")
+    assert writer.line_count == 0
+    writer.write_lines(["b", "c"])
+    assert writer.line_count == 2
+    writer.close()
+    assert writer.line_count == 3
+    assert read_bytes(path) == b"a\nb\nc\n"
+
+
+def test_newline_and_encoding(tmp_path):
+    path = str(tmp_path / "out.txt")
+    with PCTOutputWriter(path, encoding="latin-1", newline="\r\n",
+                         translate_enable=False) as writer:
+        writer.write_lines([u"caf\xe9", u""])
+    assert read_bytes(path) == b"caf\xe9\r\n\r\n"
+
+
+def test_bom(tmp_path):
+    path = str(tmp_path / "out.txt")
+    with PCTOutputWriter(path, encoding="utf-8",
+                         translate_enable=False) as writer:
+        writer.write_line(u"\ufeffx")
+    assert read_bytes(path) == b"\xef\xbb\xbfx\n"
+    with PCTOutputWriter(path, encoding="utf-16",
+                         translate_enable=False) as writer:
+        writer.write_line(u"\ufeffx")
+    assert read_bytes(path) == u"x\n".encode("utf-16")
+    with PCTOutputWriter(path, encoding="ascii",
+                         translate_enable=False) as writer:
+        writer.write_line(u"\ufeffx")
+    assert read_bytes(path) == b"x\n"
+
+
+def test_atomic(tmp_path):
+    path = str(tmp_path / "out.txt")
+    with open(path, "wb") as outfile:
+        outfile.write(b"old\n")
+    writer = PCTOutputWriter(path, encoding="utf-8",
+                             translate_enable=False, atomic_enable=True,
+                             buffer_line_count=1)
+    writer.write_line("new")
+    assert read_bytes(path) == b"old\n"
+    writer.close()
+    assert read_bytes(path) == b"new\n"
+    assert os.listdir(str(tmp_path)) == ["out.txt"]
+
+
+def test_atomic_abort(tmp_path):
+    path = str(tmp_path / "out.txt")
+    with open(path, "wb") as outfile:
+        outfile.write(b"old\n")
+    try:
+        with PCTOutputWriter(path, encoding="utf-8",
+                             atomic_enable=True) as writer:
+            writer.write_line("new")
+            raise RuntimeError("stop")
+    except RuntimeError:
+        pass
+    assert read_bytes(path) == b"old\n"
+    assert os.listdir(str(tmp_path)) == ["out.txt"]
+
+
+def test_stream_is_left_open():
+    stream = io.BytesIO()
+    with PCTOutputWriter(stream, encoding="utf-8",
+                         translate_enable=False) as writer:
+        writer.write_lines(["a", "b"])
+    assert not stream.closed
+    assert stream.getvalue() == b"a\nb\n"
+
+
+def test_compressed(tmp_path):
+    path = str(tmp_path / "out.txt.gz")
+    with PCTOutputWriter(path, encoding="utf-8",
+                         translate_enable=False) as writer:
+        writer.write_line("a")
+    with gzip.open(path, "rb") as infile:
+        assert infile.read() == b"a\n"
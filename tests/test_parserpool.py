@@ -0,0 +1,78 @@
+import io
+
+import pytest
+
+from parserpool import PCTParserPool
+from pct import PCTParser
+from project import PCTProjectIndex
+
+first_text = """import System
+
+
+class First:
+    _name = ""
+
+    def get_initial(self):
+        return self._name.Substring(0, 1)
+"""
+
+second_text = """import System
+
+
+class Second:
+    def get_name(self):
+        return self.name.ToString()
+"""
+
+
+def convert(parser, text):
+    parser.parse_text(text, name="sample.py")
+    outfile = io.BytesIO()
+    parser.framework_to_standard_python(outfile, source_map_enable=False)
+    lines = outfile.getvalue().decode("utf-8").split("\n")
+    return [line for line in lines if "Processed by" not in line]
+
+
+def test_reuses_idle_parsers():
+    pool = PCTParserPool(max_idle=1, options={"show_notices": False})
+    first = pool.acquire()
+    second = pool.acquire()
+    assert pool.created_count == 2
+    assert first is not second
+    assert first.show_notices is False
+    pool.release(first)
+    pool.release(second)  # dropped (only one is kept)
+    assert pool.acquire() is first
+    assert pool.acquire() is not second
+    assert pool.created_count == 3
+
+
+def test_project_index():
+    project_index = PCTProjectIndex()
+    pool = PCTParserPool(project_index=project_index)
+    assert pool.acquire().project_index is project_index
+
+
+def test_released_after_exception():
+    pool = PCTParserPool()
+    with pytest.raises(RuntimeError):
+        with pool.parser() as parser:
+            parser.custom_types.append("leftover")
+            raise RuntimeError("conversion failed")
+    with pool.parser() as reused:
+        assert reused is parser
+        assert reused.custom_types == []
+        assert reused.file_path is None
+    assert pool.created_count == 1
+
+
+def test_reused_parser_converts_the_same():
+    pool = PCTParserPool()
+    with pool.parser() as parser:
+        convert(parser, first_text)
+    with pool.parser() as reused:
+        assert reused is parser
+        output = convert(reused, second_text)
+    assert output == convert(PCTParser(), second_text)
+    assert "        return str(self.name)" in output
+    assert pool.created_count == 1
@@ -0,0 +1,288 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from pct import PCTParser
+from pct import get_rule_families
+from pct import tostring_to_str
+
+sample = """import System
+from System import String
+
+
+class Greeter:
+    _name = ""
+
+    def __init__(self, name):
+        self._name = name
+
+    def get_initial(self):
+        return self._name.Substring(0, 1)
+
+    def get_rest(self):
+        return self._name.Substring(1)
+"""
+
+
+def write_sample(tmp_path, text):
+    source_path = str(tmp_path / "sample.py")
+    with open(source_path, "wb") as outfile:
+        outfile.write(text.encode("utf-8"))
+    return source_path
+
+
+def rewrite(tmp_path, text):
+    parser = PCTParser(write_sample(tmp_path, text))
+    output_path = str(tmp_path / "output.py")
+    parser.framework_to_standard_python(output_path)
+    with open(output_path, "rb") as infile:
+        output = infile.read().decode("utf-8")
+    return parser, output
+
+
+def test_rewrite(tmp_path):
+    parser, output = rewrite(tmp_path, sample)
+    lines = output.split("\n")
+    assert lines[0] == "import System"
+    assert lines[1].startswith("# Processed by pycodetool")
+    assert lines[2] == "import sys"
+    assert lines[3] == "#from System import String"
+    assert "        return self._name[0:0+ 1]" in lines
+    assert "        return self._name[1:]" in lines
+    assert "Substring" not in output
+    assert output.endswith("self._name[1:]\n")
+
+
+def test_rewrite_source_map(tmp_path):
+    parser, output = rewrite(tmp_path, sample)
+    source_map = parser.source_map
+    assert len(source_map) == len(output.split("\n")) - 1
+    assert source_map.get_source_lineN(1) == 1
+    assert source_map.get_source_lineN(2) is None  # inserted
+    assert source_map.get_source_lineN(3) is None  # inserted
+    assert source_map.get_source_lineN(4) == 2
+    assert source_map.get_source_lineN(len(source_map)) == 15
+
+
+def test_rewrite_line_map(tmp_path):
+    parser, output = rewrite(tmp_path, sample)
+    line_map = parser.line_map
+    assert line_map.get_loaded_index(0) == 0
+    assert line_map.get_loaded_index(1) == -1
+    assert line_map.get_line_index(1) == 3
+
+
+def test_preprocess_facets(tmp_path):
+    parser = PCTParser(write_sample(tmp_path, sample))
+    parser.preprocess(["symbols"])
+    assert "symbols" in parser.preprocessed
+    greeter = parser.scope_tree.find_scope("Greeter")
+    assert greeter.kind == "class"
+    assert greeter.children["get_rest"].kind == "method"
+    assert "_name" in greeter.symbols
+
+
+duplicate_sample = """class A:
+    def f(self):
+        try:
+            return 1
+        except Exception:
+        finally:
+
+    def f(self):
+        return 2
+"""
+
+
+def test_preprocess_only_what_is_missing(tmp_path, monkeypatch):
+    parser = PCTParser(write_sample(tmp_path, duplicate_sample))
+    calls = list()
+    process_python_lines = parser.process_python_lines
+
+    def counted(parser_op, facets=None):
+        calls.append(list(facets))
+        return process_python_lines(parser_op, facets=facets)
+
+    monkeypatch.setattr(parser, "process_python_lines", counted)
+    original = list(parser.lines)
+    parser.preprocess(["symbols"])
+    assert parser.lines == original
+    parser.preprocess(["duplicates"])
+    assert parser.lines[7:] == ["#    def f(self):", "#        return 2"]
+    parser.preprocess(["symbols", "exceptions"])
+    assert parser.lines[5:8] == ["            pass", "        finally:",
+                                 "            pass"]
+    parser.preprocess(["duplicates", "exceptions"])
+    assert calls == [["symbols"], ["duplicates"], ["exceptions"]]
+    parser.preprocess()
+    assert calls[-1] == ["header"]
+    assert parser.lines[2] == "import sys"
+    assert parser.preprocessed == set(["symbols", "duplicates",
+                                       "exceptions", "header"])
+    with pytest.raises(ValueError):
+        parser.preprocess(["imports"])
+
+
+def test_identifier_lists_only_collect_symbols(tmp_path):
+    parser = PCTParser(write_sample(tmp_path, duplicate_sample))
+    original = list(parser.lines)
+    parser.save_identifier_lists(str(tmp_path / "identifiers.txt"))
+    assert parser.preprocessed == set(["symbols"])
+    assert parser.lines == original
+
+
+@pytest.mark.skipif(shutil.which("patch") is None,
+                    reason="requires the patch command")
+@pytest.mark.parametrize("text", [sample, sample.rstrip("\n")],
+                         ids=["final_newline", "no_final_newline"])
+def test_unified_diff_applies(tmp_path, text):
+    source_path = write_sample(tmp_path, text)
+    code_path = str(tmp_path / "code.py")
+    diff_path = str(tmp_path / "sample.diff")
+    parser = PCTParser(source_path)
+    parser.framework_to_standard_python(
+        None,
+        source_map_enable=False,
+        sinks={"code": code_path, "unified": diff_path}
+    )
+    subprocess.check_call(["patch", "-s", source_path, diff_path])
+    with open(source_path, "rb") as infile:
+        patched = infile.read()
+    with open(code_path, "rb") as infile:
+        expected = infile.read()
+    assert patched == expected
+    assert not os.path.exists(source_path + ".rej")
+
+
+def test_assignment_operands(tmp_path, capsys):
+    text = ("import System\n"
+            "total = sum(x for x in range(1_000))\n"
+            "product = yield a @ b\n")
+    parser = PCTParser(write_sample(tmp_path, text))
+    capsys.readouterr()
+    assert (parser.collect_python_identifiers(1, [" = "])
+            == [1, "sum(x for x in range(1_000))"])
+    assert parser.collect_python_identifiers(2, [" = "]) == [1, "a", "b"]
+    assert "ERROR" not in capsys.readouterr().out
+
+
+def test_tostring_to_str():
+    assert tostring_to_str("s = n.ToString() + m.ToString()") == (
+        "s = str(n) + str(m)", [("n", "()"), ("m", "()")], []
+    )
+    line, changes, errors = tostring_to_str('s = n.ToString("0.00")')
+    assert line == 's = str(n)  # ("0.00")'
+    assert changes == [("n", '("0.00")')]
+    assert tostring_to_str("f = n.ToString")[1:] == (
+        [], [(6, "expected open parenthesis after ToString(")]
+    )
+
+
+def test_get_rule_families():
+    assert get_rule_families(b"x = 1\n") == set()
+    assert get_rule_families(sample.encode("utf-8")) == {"substring"}
+    text = u"r = StreamReader(p)\nConsole.WriteLine(n.ToString())\n"
+    assert get_rule_families(text.encode("utf-16"), encoding="utf-16") == {
+        "stream_reader", "console", "tostring",
+    }
+
+
+def test_prefilter_does_not_change_output(tmp_path):
+    fixture_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "YAMLObject_fromCodeConverter.py")
+    outputs = list()
+    for prefilter_enable in [True, False]:
+        parser = PCTParser()
+        parser.prefilter_enable = prefilter_enable
+        for path in [fixture_path, write_sample(tmp_path, sample)]:
+            parser.parse_path(path)
+            assert (parser.rule_families is None) != prefilter_enable
+            output_path = str(tmp_path / "output.py")
+            parser.framework_to_standard_python(output_path)
+            with open(output_path, "rb") as infile:
+                output = infile.read().decode("utf-8")
+            outputs.append(output.split("\n", 2)[2])  # after the date
+    assert outputs[:2] == outputs[2:]
+
+
+def test_tracked_stream_writer(tmp_path):
+    text = ("import System\n"
+            "\n"
+            "\n"
+            "class Log:\n"
+            "    def save(self, path):\n"
+            "        writer = StreamWriter(path)\n"
+            "        writer.WriteLine(\"a\")\n"
+            "        other.WriteLine(\"b\")\n"
+            "        writer.Close()\n")
+    parser, output = rewrite(tmp_path, text)
+    lines = output.split("\n")
+    assert "        writer.write(\"a\"+\"\\n\")" in lines
+    assert "        other.WriteLine(\"b\")" in lines
+    assert "        writer.close()" in lines
+
+
+def read_text(path):
+    """Get the text at path without the dated "Processed by" line."""
+    with open(path, "rb") as infile:
+        lines = infile.read().decode("utf-8").split("\n")
+    return "\n".join(line for line in lines if "Processed by" not in line)
+
+
+def test_sinks_match_separate_outputs(tmp_path):
+    source_path = write_sample(tmp_path, sample)
+    code_path = str(tmp_path / "out.py")  # (the source map has it)
+    expected = {}
+    for output_format in ["code", "unified", "json"]:
+        parser = PCTParser(source_path)
+        path = str(tmp_path / ("expected." + output_format))
+        if output_format == "code":
+            path = code_path
+        parser.framework_to_standard_python(path,
+                                            output_format=output_format,
+                                            source_map_enable=True)
+        expected[output_format] = read_text(path)
+        if output_format == "code":
+            expected["source_map"] = read_text(
+                path + parser.source_map_suffix
+            )
+    parser = PCTParser(source_path)
+    path = str(tmp_path / "expected.identifiers")
+    parser.save_identifier_lists(path)
+    expected["identifiers"] = read_text(path)
+
+    parser = PCTParser(source_path)
+    sinks = {}
+    for sink_name in ["unified", "json", "source_map", "identifiers",
+                      "report"]:
+        sinks[sink_name] = str(tmp_path / ("out." + sink_name))
+    parser.framework_to_standard_python(code_path, sinks=sinks)
+    assert read_text(code_path) == expected["code"]
+    for sink_name in expected:
+        if sink_name != "code":
+            assert read_text(sinks[sink_name]) == expected[sink_name]
+    with open(sinks["report"], "rb") as infile:
+        report = json.loads(infile.read().decode("utf-8"))
+    assert report["source"] == source_path
+    assert report["loaded_line_count"] == 15
+    assert report["line_count"] == 17
+    assert report["inserted_count"] == 2
+    assert report["changed_count"] == 3
+    assert report["deleted_count"] == 0
+    assert report["outputs"]["code"] == code_path
+    assert report["outputs"]["report"] == sinks["report"]
+    assert len(report["messages"]) > 0
+
+
+def test_stream_sink_without_outfile(tmp_path):
+    parser = PCTParser(write_sample(tmp_path, sample))
+    outfile = io.BytesIO()
+    parser.framework_to_standard_python(None, sinks={"code": outfile})
+    assert b"self._name[1:]" in outfile.getvalue()
+    with pytest.raises(ValueError):
+        parser.framework_to_standard_python(None,
+                                            sinks={"html": outfile})
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from compression import get_compression
+from compression import read_compressed
+from pipeline import translate_pipelined
+from project import get_path_pairs
+from project import translate_project
+
+base_text = """import System
+
+
+class Base:
+    _items = None
+
+    def __init__(self):
+        self._items = []
+
+    def first(self):
+        return self._items[0].ToString()
+"""
+
+
+def write_files(folder, files):
+    os.makedirs(folder)
+    for name, data in files.items():
+        with open(os.path.join(folder, name), "wb") as outfile:
+            outfile.write(data)
+
+
+def read_output(path):
+    """Get the output without the dated "Processed by" line."""
+    if get_compression(path) is not None:
+        data = read_compressed(path)
+    else:
+        with open(path, "rb") as infile:
+            data = infile.read()
+    lines = data.decode("utf-8").split("\n")
+    return [line for line in lines if "Processed by" not in line]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_same_as_translate_project(tmp_path, processes):
+    source = str(tmp_path / "source")
+    files = {}
+    for i in range(5):
+        files["module" + str(i) + ".py"] = base_text.replace(
+            "Base", "Base" + str(i)
+        ).encode("utf-8")
+    write_files(source, files)
+    expected_pairs = get_path_pairs(source, str(tmp_path / "expected"))
+    translate_project(expected_pairs, processes=1)
+    path_pairs = get_path_pairs(source, str(tmp_path / "out"))
+    failures = translate_pipelined(path_pairs, processes=processes,
+                                   queue_size=2)
+    assert failures == []
+    for expected_pair, path_pair in zip(expected_pairs, path_pairs):
+        assert read_output(path_pair[1]) == read_output(expected_pair[1])
+
+
+def test_compressed_destination(tmp_path):
+    source = str(tmp_path / "source")
+    write_files(source, {"base.py": base_text.encode("utf-8")})
+    source_path = os.path.join(source, "base.py")
+    output_path = str(tmp_path / "out" / "base.py.gz")
+    plain_path = str(tmp_path / "out" / "again.py")
+    assert translate_pipelined([(source_path, output_path)]) == []
+    with open(output_path, "rb") as infile:
+        assert infile.read(2) == b"\x1f\x8b"
+    assert "        return str(self._items[0])" in read_output(output_path)
+    # A compressed source is decompressed before it is converted:
+    assert translate_pipelined([(output_path, plain_path)]) == []
+    assert read_output(plain_path) == read_output(output_path)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_failures(tmp_path, processes):
+    source = str(tmp_path / "source")
+    write_files(source, {
+        "base.py": base_text.encode("utf-8"),
+        "bad.py": b"class Bad:\n    _name = '\xff'\n",
+    })
+    destination = str(tmp_path / "out")
+    os.makedirs(os.path.join(destination, "taken.py"))
+    path_pairs = [
+        (os.path.join(source, "bad.py"),
+         os.path.join(destination, "bad.py")),
+        (os.path.join(source, "missing.py"),
+         os.path.join(destination, "missing.py")),
+        (os.path.join(source, "base.py"),
+         os.path.join(destination, "taken.py")),  # a folder
+        (os.path.join(source, "base.py"),
+         os.path.join(destination, "base.py")),
+    ]
+    failures = translate_pipelined(path_pairs, processes=processes,
+                                   queue_size=1)
+    errors = dict(failures)
+    assert sorted(errors) == sorted(path_pairs[:3])
+    assert "UnicodeDecodeError" in errors[path_pairs[0]]
+    assert not os.path.exists(path_pairs[0][1])
+    assert not os.path.exists(path_pairs[1][1])
+    assert os.path.isfile(path_pairs[3][1])
+
+
+def test_bad_queue_size():
+    with pytest.raises(ValueError):
+        translate_pipelined([], queue_size=0)
@@ -0,0 +1,84 @@
+import pytest
+
+from pct import PCTParser
+from prelex import LEX_BACKSLASH
+from prelex import LEX_BLANK
+from prelex import LEX_BRACKET
+from prelex import LEX_HASH
+from prelex import LEX_NONASCII
+from prelex import LEX_QUOTE
+from prelex import can_prelex
+from prelex import np
+from prelex import prelex_data
+
+data = (b"x = 1\r\n"
+        b"    \n"
+        b"  f(a)  # call\n"
+        b"s = 'a#b'\n"
+        b"t = \\\n"
+        b"u = '\xc3\xa9'")
+
+numpy_flags = [False]
+if np is not None:
+    numpy_flags.append(True)
+
+
+@pytest.mark.parametrize("numpy_enable", numpy_flags)
+def test_prelex_data(numpy_enable):
+    lex = prelex_data(data, numpy_enable=numpy_enable)
+    assert len(lex) == 6
+    assert list(lex.flags) == [0, LEX_BLANK, LEX_BRACKET | LEX_HASH,
+                               LEX_QUOTE | LEX_HASH, LEX_BACKSLASH,
+                               LEX_QUOTE | LEX_NONASCII]
+    assert list(lex.indents) == [0, -1, 2, 0, 0, 0]
+    assert list(lex.comment_indices) == [-1, -1, 8, 6, -1, -1]
+    assert lex.get_lines(data) == ["x = 1", "    ", "  f(a)  # call",
+                                   "s = 'a#b'", "t = \\", u"u = '\xe9'"]
+
+
+def test_can_prelex():
+    assert can_prelex(b"a\r\nb\n")
+    assert not can_prelex(b"a\rb\n")
+    assert not can_prelex(b"a\r")
+    assert not can_prelex(u"a\nb\n".encode("utf-16"), encoding="utf-16")
+
+
+def test_get_lines_needs_ascii_compatible_encoding():
+    encoded = u"a\nb\n".encode("utf-16")
+    with pytest.raises(ValueError):
+        prelex_data(encoded).get_lines(encoded, encoding="utf-16")
+
+
+def load(tmp_path, raw, encoding="utf-8", mmap_min_size=None):
+    path = str(tmp_path / "sample.py")
+    with open(path, "wb") as outfile:
+        outfile.write(raw)
+    parser = PCTParser()
+    parser.mmap_min_size = mmap_min_size
+    parser.load_file(path, encoding=encoding)
+    return parser
+
+
+@pytest.mark.parametrize("mmap_min_size", [None, 0])
+@pytest.mark.parametrize("encoding", ["utf-16", "utf-32"])
+def test_load_wide_encoding(tmp_path, encoding, mmap_min_size):
+    text = u"import System\nx = 1  # \xe9\n"
+    parser = load(tmp_path, text.encode(encoding), encoding=encoding,
+                  mmap_min_size=mmap_min_size)
+    assert list(parser.lines) == ["import System", u"x = 1  # \xe9"]
+    assert parser.lex is None
+    assert parser.loaded_final_newline_enable
+
+
+@pytest.mark.parametrize("mmap_min_size", [None, 0])
+def test_load_lone_cr(tmp_path, mmap_min_size):
+    parser = load(tmp_path, b"import System\rx = 1\ry = 2",
+                  mmap_min_size=mmap_min_size)
+    assert list(parser.lines) == ["import System", "x = 1", "y = 2"]
+    assert not parser.loaded_final_newline_enable
+
+
+def test_load_prelexed(tmp_path):
+    parser = load(tmp_path, b"import System\r\nx = 1\r\n")
+    assert parser.lines == ["import System", "x = 1"]
+    assert parser.lex is not None
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from project import get_path_pairs
+from project import translate_project
+
+base_text = """import System
+
+
+class Base:
+    _items = None
+
+    def __init__(self):
+        self._items = []
+"""
+
+derived_text = """import System
+from base import Base
+
+
+class Derived(Base):
+    def count(self):
+        return len(self._items)
+"""
+
+
+def write_project(tmp_path, files):
+    source = tmp_path / "source"
+    source.mkdir()
+    for name, data in files.items():
+        with open(str(source / name), "wb") as outfile:
+            outfile.write(data)
+    return str(source), str(tmp_path / "destination")
+
+
+def test_get_path_pairs(tmp_path):
+    source, destination = write_project(tmp_path, {"a.py": b"x = 1\n"})
+    assert get_path_pairs(source, destination) == [
+        (os.path.join(source, "a.py"), os.path.join(destination, "a.py")),
+    ]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_translate_project(tmp_path, processes):
+    source, destination = write_project(tmp_path, {
+        "base.py": base_text.encode("utf-8"),
+        "derived.py": derived_text.encode("utf-8"),
+    })
+    path_pairs = get_path_pairs(source, destination)
+    project_index, failures = translate_project(path_pairs,
+                                                processes=processes)
+    assert failures == []
+    assert sorted(project_index.classes.keys()) == ["Base", "Derived"]
+    assert project_index.find_member("Derived", "items") == ("Base",
+                                                             "_items")
+    for path_pair in path_pairs:
+        assert os.path.isfile(path_pair[1])
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_undecodable_file_is_a_failure(tmp_path, processes):
+    source, destination = write_project(tmp_path, {
+        "base.py": base_text.encode("utf-8"),
+        "bad.py": b"import System\n\n\nclass Bad:\n    _name = '\xff'\n",
+        "derived.py": derived_text.encode("utf-8"),
+    })
+    path_pairs = get_path_pairs(source, destination)
+    project_index, failures = translate_project(path_pairs,
+                                                processes=processes)
+    assert [path_pair[0] for path_pair, error in failures] == [
+        os.path.join(source, "bad.py"),
+    ]
+    assert "UnicodeDecodeError" in failures[0][1]
+    assert "Bad" not in project_index.classes
+    assert not os.path.exists(os.path.join(destination, "bad.py"))
+    assert os.path.isfile(os.path.join(destination, "derived.py"))
@@ -0,0 +1,133 @@
+import pytest
+
+from pct import PCTParser
+from pct import PCTSymbol
+from scopetree import PCTScope
+
+sample = """class Outer(object):
+    limit = 5
+
+    def __init__(self, name):
+        self._name = name
+
+    class Inner(Outer):
+
+        def run(self, x):
+            return x
+
+
+def helper(a):
+    return a
+"""
+
+
+def add_symbol(scope, name):
+    symbol = PCTSymbol(name, 1)
+    scope.add_symbol(symbol)
+    return symbol
+
+
+@pytest.fixture
+def module():
+    return PCTScope("module")
+
+
+def test_bad_kind():
+    with pytest.raises(ValueError):
+        PCTScope("package")
+
+
+def test_fully_qualified_names(module):
+    outer = module.add_child("class", "Outer")
+    inner = outer.add_child("class", "Inner")
+    run = inner.add_child("method", "run")
+    assert module.get_fully_qualified_name() is None
+    assert module.get_fully_qualified_name("x") == "x"
+    assert run.get_fully_qualified_name() == "Outer.Inner.run"
+    assert run.get_fully_qualified_name("x") == "Outer.Inner.run.x"
+    assert run.depth == 3
+    assert run.get_class_name() == "Outer.Inner"
+    assert run.get_method_name() == "run"
+    assert inner.get_method_name() is None
+    assert module.get_class_name() is None
+    assert run.get_module() is module
+    assert module.find_scope("Outer.Inner.run") is run
+    assert module.find_scope("Outer.Missing") is None
+    assert [scope.name for scope in module.walk()] == [None, "Outer",
+                                                       "Inner", "run"]
+
+
+def test_add_child_reuses_scope(module):
+    outer = module.add_child("class", "Outer", indent="")
+    outer.members_indent = "    "
+    assert module.add_child("class", "Outer", indent="") is outer
+    assert outer.members_indent is None
+    replaced = module.add_child("method", "Outer")
+    assert replaced is not outer
+    assert module.children["Outer"] is replaced
+
+
+def test_first_symbol_wins(module):
+    first = add_symbol(module, "x")
+    second = add_symbol(module, "x")
+    assert second.scope is module
+    assert module.symbols["x"] is first
+    assert second.get_fully_qualified_name() == "x"
+
+
+def test_resolve(module):
+    count = add_symbol(module, "count")
+    outer = module.add_child("class", "Outer")
+    limit = add_symbol(outer, "limit")
+    name = add_symbol(outer, "_name")
+    init = outer.add_child("method", "__init__")
+    local = add_symbol(init, "total")
+    inner = outer.add_child("class", "Inner")
+    size = add_symbol(inner, "size")
+    run = inner.add_child("method", "run")
+    assert init.resolve("total") is local
+    assert init.resolve("count") is count
+    assert init.resolve("limit") is None  # class bodies are skipped
+    assert outer.resolve("limit") is limit  # unless starting there
+    assert init.resolve("self.limit") is limit
+    assert init.resolve("self.name") is name  # the _name fallback
+    assert init.resolve("self._name") is name
+    assert init.resolve("self.name.upper") is None
+    assert module.resolve("self.limit") is None
+    assert run.resolve("self.size") is size
+    assert run.resolve("self.limit") is None
+    assert run.resolve("Outer.limit") is limit
+    assert run.resolve("Inner.size") is size
+    assert run.resolve("Outer.Inner.size") is size
+    assert run.resolve("Other.size") is None
+    assert run.resolve("total") is None
+
+
+def test_parser_scope_tree(tmp_path):
+    source_path = str(tmp_path / "sample.py")
+    with open(source_path, "w") as outfile:
+        outfile.write(sample)
+    parser = PCTParser(source_path)
+    parser.preprocess(["symbols"])
+    module = parser.scope_tree
+    outer = module.find_scope("Outer")
+    inner = module.find_scope("Outer.Inner")
+    run = module.find_scope("Outer.Inner.run")
+    helper = module.find_scope("helper")
+    # (A body ends at the line before the next dedented line.)
+    assert (outer.kind, outer.lineN, outer.last_lineN) == ("class", 1, 12)
+    assert outer.base_names == ["object"]
+    assert inner.base_names == ["Outer"]
+    assert (inner.lineN, inner.last_lineN) == (7, 12)
+    assert run.param_names == ["self", "x"]
+    assert (helper.kind, helper.lineN, helper.last_lineN) == ("method",
+                                                              13, 14)
+    assert helper.param_names == ["a"]
+    assert sorted(outer.symbols) == ["_name", "limit"]
+    assert run.resolve("self.name") is None
+    assert module.find_scope("Outer.__init__").resolve("self.name") is (
+        outer.symbols["_name"]
+    )
+    for symbol in parser.symbols:
+        assert symbol.scope is outer
+        assert symbol.get_fully_qualified_name() == "Outer." + symbol.name
@@ -0,0 +1,41 @@
+from slicerewrite import substrings_to_slices
+
+
+def test_substring_with_length():
+    line, changed, errors = substrings_to_slices(
+        "        return self._name.Substring(0, 1)"
+    )
+    assert line == "        return self._name[0:0+ 1]"
+    assert len(changed) == 1
+    assert errors == []
+
+
+def test_substring_with_start_only():
+    line, changed, errors = substrings_to_slices("x = s.Substring(i)")
+    assert line == "x = s[i:]"
+    assert len(changed) == 1
+
+
+def test_nested_substring():
+    line, changed, errors = substrings_to_slices(
+        "x = s.Substring(t.Substring(1).Length)"
+    )
+    assert line == "x = s[t[1:].Length:]"
+    assert len(changed) == 2
+    assert errors == []
+
+
+def test_bad_substrings_are_unchanged():
+    for original in ["x = s.Substring()", "x = s.Substring(1, 2, 3)",
+                     "x = s.Substring(, 2)", "x = Substring(1)"]:
+        line, changed, errors = substrings_to_slices(original)
+        assert line == original
+        assert changed == []
+        assert len(errors) == 1
+
+
+def test_quoted_substring_is_unchanged():
+    original = 'x = "s.Substring(1)"  # s.Substring(2)'
+    line, changed, errors = substrings_to_slices(original)
+    assert line == original
+    assert changed == []
@@ -0,0 +1,26 @@
+from sourcemap import PCTSourceMap
+from sourcemap import inserted_marker
+
+
+def test_lookup():
+    source_map = PCTSourceMap()
+    for source_lineN in [1, inserted_marker, 2, 3]:
+        source_map.append(source_lineN)
+    assert len(source_map) == 4
+    assert source_map.get_source_lineN(1) == 1
+    assert source_map.get_source_lineN(2) is None
+    assert source_map.get_source_lineN(4) == 3
+    assert source_map.get_source_lineN(0) is None
+    assert source_map.get_source_lineN(5) is None
+
+
+def test_save_and_load(tmp_path):
+    source_map = PCTSourceMap(source_path="in.py", output_path="out.py")
+    for source_lineN in [inserted_marker, 1, 2]:
+        source_map.append(source_lineN)
+    path = str(tmp_path / "out.py.map.json")
+    source_map.save(path)
+    loaded = PCTSourceMap.load(path)
+    assert loaded.source_path == "in.py"
+    assert loaded.output_path == "out.py"
+    assert loaded.origins.tolist() == [inserted_marker, 1, 2]
@@ -0,0 +1,59 @@
+from pct import PCTParser
+from pct import PCTType
+from typeindex import PCTTypeIndex
+
+
+def make_types(*names):
+    return [PCTType(name) for name in names]
+
+
+def test_find_type():
+    custom_types = make_types("Node")
+    builtin_types = make_types("list", "Node")
+    type_index = PCTTypeIndex()
+    type_index.sync(custom_types, builtin_types)
+    assert type_index.find_type("Node") is custom_types[0]
+    assert type_index.find_type("list") is builtin_types[0]
+    assert type_index.find_type("dict") is None
+
+
+def test_find_constructed_type():
+    custom_types = make_types("Node", "Tree")
+    builtin_types = make_types("list", "dict")
+    type_index = PCTTypeIndex()
+    type_index.sync(custom_types, builtin_types)
+    find = type_index.find_constructed_type
+    assert find("dict(list())") is builtin_types[0]  # added first
+    assert find("wrap(list(), Tree(Node()))") is custom_types[0]
+    assert find("'Node()' + str(x)  # Tree()") is None
+    assert find("Nodes(x)") is None
+
+
+def test_sync_adds_and_starts_over():
+    custom_types = make_types("Node")
+    builtin_types = make_types("list")
+    type_index = PCTTypeIndex()
+    type_index.sync(custom_types, builtin_types)
+    custom_types.append(PCTType("Tree"))
+    assert type_index.find_type("Tree") is None
+    type_index.sync(custom_types, builtin_types)
+    assert type_index.find_type("Tree") is custom_types[1]
+    del custom_types[:]
+    type_index.sync(custom_types, builtin_types)
+    assert type_index.find_type("Node") is None
+    other_builtin_types = make_types("dict")
+    type_index.sync(custom_types, other_builtin_types)
+    assert type_index.find_type("list") is None
+    assert type_index.find_type("dict") is other_builtin_types[0]
+
+
+def test_parser_first_explicit_type():
+    parser = PCTParser()
+    parser.custom_types.append(PCTType("Node"))
+    get_type = parser.get_python_first_explicit_type_id
+    assert get_type("staticmethod(f)") == "staticmethod"
+    assert get_type("\"a\" + b") == "string"
+    assert get_type("Node(list())") is parser.custom_types[-1]
+    assert get_type("f(x)") is None
+    parser.custom_types.append(PCTType("Tree"))
+    assert get_type("Tree()") is parser.custom_types[-1]
@@ -0,0 +1,71 @@
+import pytest
+
+from pct import PCTParser
+from pct import PCTSymbol
+from pct import PCTType
+
+
+@pytest.fixture
+def parser():
+    return PCTParser()
+
+
+def make_symbol(name, value, class_name=None, type_identifier=None):
+    symbol = PCTSymbol(name, 1, type_identifier=type_identifier)
+    symbol.class_name = class_name
+    symbol.default_value = value
+    return symbol
+
+
+def infer(parser, symbols):
+    parser.symbols = symbols
+    return parser.infer_symbol_types()
+
+
+@pytest.mark.parametrize("value", ["yield", "yield 1", "await f(1)",
+                                   "(yield x) + 1"])
+def test_keyword_operators_have_no_type(parser, value):
+    symbols = [make_symbol("x", "1"), make_symbol("y", value)]
+    infer(parser, symbols)
+    assert symbols[1].type_identifier is None
+
+
+def test_propagates_in_any_order(parser):
+    symbols = [
+        make_symbol("c", "b > a"),
+        make_symbol("d", "b + 0.5"),
+        make_symbol("b", "a"),
+        make_symbol("a", "1"),
+        make_symbol("e", "not x"),
+        make_symbol("f", "unknown(a)"),
+    ]
+    assert infer(parser, symbols) == 5
+    types = [symbol.type_identifier for symbol in symbols]
+    assert types == ["bool", "decimal", "int", "int", "bool", None]
+
+
+def test_members_and_constructors(parser):
+    parser.custom_types.append(PCTType("Node"))
+    symbols = [
+        make_symbol("_count", "0", class_name="Tree"),
+        make_symbol("total", "self.count + 1", class_name="Tree"),
+        make_symbol("root", "Node(self.total)", class_name="Tree"),
+        make_symbol("copy", "Tree.root"),
+        make_symbol("label", "'%d' % x"),
+        make_symbol("items", "[]"),
+    ]
+    assert infer(parser, symbols) == 6
+    types = [symbol.type_identifier for symbol in symbols]
+    assert types == ["int", "int", "Node", "Node", "string", "list"]
+
+
+def test_keeps_explicit_types(parser):
+    symbols = [
+        make_symbol("a", "1", type_identifier="decimal"),
+        make_symbol("b", "a"),
+        make_symbol("c", "b if x else 2"),
+        make_symbol("d", "c"),
+    ]
+    assert infer(parser, symbols) == 1
+    types = [symbol.type_identifier for symbol in symbols]
+    assert types == ["decimal", "decimal", None, None]